@@ -1,155 +1,260 @@
+import asyncio
 import os
-from openai import OpenAI
-from typing import List, Dict
-import json
+import httpx
+from openai import AsyncOpenAI
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
 import re
 from dotenv import load_dotenv
 
+from hedging import DeadlineExceeded, LatencyPolicy
+from json_stream import extract_json, schema_outline, validate_fields
+from models import (
+    AnalysisResponse,
+    CareerSwitchResponse,
+    ConsistencyCheckResponse,
+    LearningRoadmapResponse,
+    MockInterviewResponse,
+    RecruiterLensResponse,
+    VoiceInterviewResponse,
+    WhatIfResponse
+)
+from response_cache import ResponseCache
+from section_retriever import SectionRetriever
+from rate_limiter import RateLimiter
+from singleflight import SingleFlight
+from token_budget import PromptBudgets, count_tokens
+
 load_dotenv()
 
+# AnalysisResponse fields the server fills in rather than the model; the
+# keyword fields are exact-match facts computed by SkillMatcher
+ANALYSIS_SERVER_FIELDS = (
+    "resume_id", "match_score", "resume_text", "job_description",
+    "keywords_found", "keywords_missing", "keyword_density_score", "degraded"
+)
+
+# WhatIfResponse fields WhatIfEngine computes; the model only writes the narrative
+WHATIF_SERVER_FIELDS = ("original_score", "new_score", "score_change", "keyword_score_change", "similarity_change")
+
+# JSON mode: the API only returns syntactically valid JSON objects
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
 
 class AIAnalyzer:
     
-    def __init__(self):
+    # Methods whose responses are cached by default: low temperature, so an
+    # identical prompt should give an equivalent answer. Creative generators
+    # stay uncached unless enabled explicitly.
+    DEFAULT_CACHED_METHODS = {"analyze_match", "check_consistency"}
+    
+    def __init__(self, cache: Optional[ResponseCache] = None, cached_methods: Optional[Iterable[str]] = None,
+                 budgets: Optional[PromptBudgets] = None, retriever: Optional[SectionRetriever] = None,
+                 limiter: Optional[RateLimiter] = None, latency: Optional[LatencyPolicy] = None,
+                 http_client: Optional[httpx.AsyncClient] = None):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OpenAI API key not found - please add it to your .env file")
-        self.client = OpenAI(api_key=api_key)
+        # Retries are left to the rate limiter, which needs to see every 429;
+        # http_client shares one connection pool with the other services
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0, http_client=http_client)
         self.model = "gpt-4o-mini"
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        if cached_methods is None:
+            env_methods = os.getenv("LLM_CACHE_METHODS")
+            cached_methods = env_methods.split(",") if env_methods is not None else self.DEFAULT_CACHED_METHODS
+        self.cached_methods = {m.strip() for m in cached_methods if m.strip()}
+        self.inflight = SingleFlight()
+        self.budgets = budgets if budgets is not None else PromptBudgets.from_env()
+        self.retriever = retriever
+        self.limiter = limiter if limiter is not None else RateLimiter.from_env()
+        self.latency = latency if latency is not None else LatencyPolicy.from_env()
+    
+    def _create(self, messages: List[Dict], max_tokens: int, on_sent=None, on_latency=None, **kwargs):
+        """Send a chat completion through the rate limiter; kwargs go to the API.
+        
+        on_sent and on_latency are the rate limiter's upstream timing hooks.
+        """
+        tokens = sum(count_tokens(message["content"]) for message in messages) + max_tokens
+        return self.limiter.call(self.model, tokens, lambda: self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            **kwargs
+        ), on_sent=on_sent, on_latency=on_latency)
+    
+    async def _complete(self, method: str, messages: List[Dict], temperature: float,
+                        max_tokens: int, parse: Callable[[str], Any], json_mode: bool = False) -> Any:
+        """Run a chat completion and parse it, serving cacheable methods from the response cache.
+        
+        Only successfully parsed results are cached, so a malformed reply is
+        never replayed; parse should raise on anything it can't use. Identical
+        requests already in flight share one upstream call. json_mode requests
+        a JSON object response (the prompt must mention JSON).
+        
+        A slow call is hedged and the method's deadline raises
+        DeadlineExceeded, for the caller to fall back on. The upstream call
+        is cancelled once no caller is waiting for it, so abandoned requests
+        don't hold rate limiter slots.
+        """
+        key = ResponseCache.make_key(self.model, messages, temperature, max_tokens)
+        use_cache = method in self.cached_methods
+        if use_cache:
+            cached = await asyncio.to_thread(self.cache.get, key, method)
+            if cached is not None:
+                return cached
+        
+        async def fetch():
+            response = await self.latency.run(method, lambda on_sent, on_latency: self._create(
+                messages,
+                max_tokens,
+                on_sent=on_sent,
+                on_latency=on_latency,
+                temperature=temperature,
+                **({"response_format": JSON_RESPONSE_FORMAT} if json_mode else {})
+            ))
+            result = parse(response.choices[0].message.content)
+            if use_cache:
+                await asyncio.to_thread(self.cache.put, key, result)
+            return result
+        
+        deadline = self.latency.deadline(method)
+        try:
+            return await asyncio.wait_for(self.inflight.do(key, fetch, cancel_abandoned=True), deadline)
+        except asyncio.TimeoutError:
+            self.latency.missed(method)
+            raise DeadlineExceeded(f"{method} took longer than {deadline:g}s")
     
-    def analyze_match(self, resume_text: str, job_description: str, similarity_score: float) -> Dict:
+    async def _focus_resume(self, method: str, resume_text: str, job_description: str) -> str:
+        """Resume text for a prompt: the parts relevant to the job's requirements, within the method's budget.
         
-        example_json = '''{
-  "match_percentage": 65,
-  "match_explanation": "Specific explanation",
-  "missing_skills": ["skill 1", "skill 2"],
-  "weak_areas": ["weakness 1", "weakness 2"],
-  "strengths": ["strength 1", "strength 2"],
-  "ats_suggestions": ["suggestion 1", "suggestion 2"],
-  "keywords_found": ["keyword 1", "keyword 2"],
-  "keywords_missing": ["missing keyword"],
-  "keyword_density_score": 65,
-  "role_suitability": {"level": "Mid-Level", "confidence": "Medium", "reasoning": "reason"},
-  "resume_sections_analysis": {
-    "experience": {"score": 70, "impact": "High", "feedback": "feedback"},
-    "skills": {"score": 60, "impact": "High", "feedback": "feedback"},
-    "education": {"score": 75, "impact": "Medium", "feedback": "feedback"}
-  },
-  "bullet_point_analysis": ["observation"],
-  "consistency_issues": ["issue"],
-  "career_gaps": [],
-  "summary": "2-sentence assessment"
-}'''
+        Uses the section retriever when one is configured and falls back to
+        priority-based trimming if it isn't or retrieval fails.
+        """
+        if self.retriever is not None:
+            try:
+                resume_text = await self.retriever.select(
+                    resume_text, job_description, self.budgets.limit(method, "resume")
+                )
+            except Exception as e:
+                print(f"Section retrieval error: {str(e)}")
+        return self.budgets.fit(method, "resume", resume_text)
+    
+    def _analysis_messages(self, resume_text: str, job_description: str, similarity_score: float) -> List[Dict]:
+        """Build the chat messages for analyze_match from an already focused resume."""
+        job_description = self.budgets.fit("analyze_match", "job", job_description)
         
-        prompt = f"""You are an expert technical recruiter analyzing a resume against a job description. Provide a DETAILED, ACCURATE, and CRITICAL analysis.
+        prompt = f"""Analyze this resume against the job description. Be critical, specific and accurate; base everything on the actual text.
 
 === RESUME ===
-{resume_text[:2500]}
+{resume_text}
 
 === JOB DESCRIPTION ===
-{job_description[:2500]}
-
-=== INSTRUCTIONS ===
-
-1. MATCH PERCENTAGE (0-100):
-   - Compare EVERY requirement in the job description against the resume
-   - 80-100: Nearly perfect match with all key requirements
-   - 60-79: Good match, missing 1-2 important skills
-   - 40-59: Moderate match, several gaps
-   - 0-39: Poor match, major gaps
-   - BE STRICT - don't inflate scores
-
-2. KEYWORDS ANALYSIS:
-   - Extract 5-10 SPECIFIC technical skills/tools from the job description
-   - Mark as "found" ONLY if explicitly mentioned in resume
-   - Mark as "missing" if in job but NOT in resume
-   - Include: programming languages, frameworks, tools, methodologies
-
-3. SKILLS ASSESSMENT:
-   - List 3-5 SPECIFIC missing skills from the job requirements
-   - List 2-3 SPECIFIC weak areas (things mentioned but underqualified)
-   - List 2-3 SPECIFIC strengths (where resume exceeds requirements)
-
-4. SECTION SCORES (0-100 each):
-   - Experience: Years + relevance + depth + achievements
-   - Skills: Technical breadth + depth + currency
-   - Education: Degree level + field relevance + certifications
-
-5. ATS & IMPROVEMENTS:
-   - 3-4 ACTIONABLE suggestions to improve resume
-   - Focus on missing keywords, formatting, quantification
-
-Return ONLY this JSON structure (no markdown blocks):
-{{
-  "match_percentage": <number>,
-  "match_explanation": "<specific reason for the score>",
-  "missing_skills": ["skill1", "skill2", "skill3"],
-  "weak_areas": ["area1", "area2"],
-  "strengths": ["strength1", "strength2"],
-  "ats_suggestions": ["tip1", "tip2", "tip3"],
-  "keywords_found": ["keyword1", "keyword2", "keyword3"],
-  "keywords_missing": ["missing1", "missing2"],
-  "keyword_density_score": <number>,
-  "role_suitability": {{"level": "Entry/Mid-Level/Senior/Lead", "confidence": "High/Medium/Low", "reasoning": "why this level"}},
-  "resume_sections_analysis": {{
-    "experience": {{"score": <number>, "impact": "High/Medium/Low", "feedback": "specific feedback"}},
-    "skills": {{"score": <number>, "impact": "High/Medium/Low", "feedback": "specific feedback"}},
-    "education": {{"score": <number>, "impact": "High/Medium/Low", "feedback": "specific feedback"}}
-  }},
-  "bullet_point_analysis": ["observation1", "observation2"],
-  "consistency_issues": ["issue if any"],
-  "career_gaps": [],
-  "summary": "2-3 sentence honest assessment"
-}}
-
-Be CRITICAL, SPECIFIC, and ACCURATE. Base everything on actual content."""
+{job_description}
 
+Match percentage: compare every job requirement with the resume. 80-100 nearly all key requirements met, 60-79 missing 1-2 important skills, 40-59 several gaps, 0-39 major gaps. Don't inflate scores.
+Section scores: experience = years, relevance, depth, achievements; skills = breadth, depth, currency; education = degree, field, certifications.
+Suggestions: focus on missing keywords, formatting and quantified impact.
+
+Reply with a JSON object:
+{schema_outline(AnalysisResponse, ANALYSIS_SERVER_FIELDS)}"""
+        
+        return [
+            {"role": "system", "content": "You are an expert technical recruiter. Analyze resumes with precision and honesty. Reply in JSON."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _parse_analysis(self, content: str) -> Dict:
+        """Parse an analyze_match reply; raises if no usable JSON object is found."""
+        print(f"Raw OpenAI response length: {len(content)} chars")
+        # Fields the server computes itself are never taken from the model
+        return validate_fields(
+            extract_json(content, "object"),
+            AnalysisResponse,
+            exclude=ANALYSIS_SERVER_FIELDS
+        )
+    
+    async def analyze_match(self, resume_text: str, job_description: str, similarity_score: float) -> Dict:
+        resume_text = await self._focus_resume("analyze_match", resume_text, job_description)
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert technical recruiter with 15+ years of experience. Analyze resumes with precision and honesty. Return ONLY valid JSON with no markdown formatting."},
-                    {"role": "user", "content": prompt}
-                ],
+            return await self._complete(
+                "analyze_match",
+                messages=self._analysis_messages(resume_text, job_description, similarity_score),
                 temperature=0.2,
-                max_tokens=3000
+                max_tokens=3000,
+                parse=self._parse_analysis,
+                json_mode=True
             )
+        except Exception as e:
+            print(f"Analysis error: {str(e)}")
+            return self._create_fallback_analysis(similarity_score)
+    
+    async def stream_analyze_match(self, resume_text: str, job_description: str,
+                                   similarity_score: float) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of analyze_match.
+        
+        Args:
+            resume_text: Resume text
+            job_description: Job description text
+            similarity_score: Embedding similarity, used by the fallback
             
-            content = response.choices[0].message.content.strip()
-            print(f"Raw OpenAI response length: {len(content)} chars")
-            
-            # Remove markdown code blocks
-            content = re.sub(r'^```json\s*', '', content)
-            content = re.sub(r'^```\s*', '', content)
-            content = re.sub(r'\s*```$', '', content)
-            content = content.strip()
-            
-            # Try to parse directly first
+        Yields:
+            ("delta", text) for each piece of model output as it arrives, then
+            exactly one ("result", analysis dict). A cached analysis is yielded
+            as the result straight away, with no deltas.
+        """
+        resume_text = await self._focus_resume("analyze_match", resume_text, job_description)
+        messages = self._analysis_messages(resume_text, job_description, similarity_score)
+        use_cache = "analyze_match" in self.cached_methods
+        key = ResponseCache.make_key(self.model, messages, 0.2, 3000)
+        if use_cache:
+            cached = await asyncio.to_thread(self.cache.get, key, "analyze_match")
+            if cached is not None:
+                yield "result", cached
+                return
+        
+        chunks = []
+        deadline = self.latency.deadline("analyze_match")
+        ends_at = asyncio.get_running_loop().time() + deadline
+        try:
+            stream = await asyncio.wait_for(self._create(
+                messages,
+                3000,
+                temperature=0.2,
+                response_format=JSON_RESPONSE_FORMAT,
+                stream=True
+            ), deadline)
+            iterator = stream.__aiter__()
             try:
-                result = json.loads(content)
-                print("Successfully parsed JSON")
-                return result
-            except json.JSONDecodeError:
-                # Try to extract JSON object
-                json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', content, re.DOTALL)
-                if json_match:
+                while True:
                     try:
-                        result = json.loads(json_match.group())
-                        print("Successfully extracted and parsed JSON")
-                        return result
-                    except json.JSONDecodeError as e:
-                        print(f"JSON decode error: {str(e)}")
-                        print(f"Content: {content[:300]}...")
-                        return self._create_fallback_analysis(similarity_score)
-            
-            print("No valid JSON found in response")
-            return self._create_fallback_analysis(similarity_score)
-                
+                        chunk = await asyncio.wait_for(
+                            iterator.__anext__(), max(0.0, ends_at - asyncio.get_running_loop().time())
+                        )
+                    except StopAsyncIteration:
+                        break
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        chunks.append(delta)
+                        yield "delta", delta
+            finally:
+                # Past the deadline or the client went away: release the
+                # pooled connection and stop the model generating tokens
+                await stream.response.aclose()
+            result = self._parse_analysis("".join(chunks))
+            if use_cache:
+                await asyncio.to_thread(self.cache.put, key, result)
+        except asyncio.TimeoutError:
+            self.latency.missed("analyze_match")
+            print(f"Streaming analysis error: analyze_match took longer than {deadline:g}s")
+            result = self._create_fallback_analysis(similarity_score)
         except Exception as e:
-            print(f"Analysis error: {str(e)}")
-            return self._create_fallback_analysis(similarity_score)
+            print(f"Streaming analysis error: {str(e)}")
+            result = self._create_fallback_analysis(similarity_score)
+        
+        yield "result", result
     
-    def generate_bullet_points(self, experience: str, job_title: str) -> List[str]:
+    async def generate_bullet_points(self, experience: str, job_title: str) -> List[str]:
         
         prompt = f"""Transform this work experience into professional resume bullet points.
 
@@ -174,29 +279,31 @@ Requirements for EACH bullet:
 
 Return ONLY the bullet points, one per line, without numbers, dashes, or bullet symbols."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert resume writer who creates powerful, ATS-optimized bullet points with strong action verbs and quantifiable achievements."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=600
-            )
-            
-            content = response.choices[0].message.content.strip()
+        def parse(content: str) -> List[str]:
             # Clean and extract bullet points
             bullet_points = []
-            for line in content.split('\n'):
+            for line in content.strip().split('\n'):
                 line = line.strip()
                 # Remove any numbering, bullets, or dashes
                 line = re.sub(r'^[\d\.\-•*]+\s*', '', line)
                 if line and len(line) > 20:  # Filter out too short lines
                     bullet_points.append(line)
-            
-            return bullet_points[:10] if len(bullet_points) > 0 else self._create_fallback_bullets()
-            
+            if not bullet_points:
+                raise ValueError("No bullet points in response")
+            return bullet_points[:10]
+
+        try:
+            return await self._complete(
+                "generate_bullet_points",
+                messages=[
+                    {"role": "system", "content": "You are an expert resume writer who creates powerful, ATS-optimized bullet points with strong action verbs and quantifiable achievements."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.8,
+                max_tokens=600,
+                parse=parse
+            )
+
         except Exception as e:
             print(f"Bullet point generation error: {str(e)}")
             return self._create_fallback_bullets()
@@ -213,11 +320,12 @@ Return ONLY the bullet points, one per line, without numbers, dashes, or bullet
             "Presented technical solutions to stakeholders and secured buy-in for strategic initiatives"
         ]
     
-    def generate_interview_questions(self, job_description: str) -> List[str]:
+    async def generate_interview_questions(self, job_description: str) -> List[str]:
+        job_description = self.budgets.fit("generate_interview_questions", "job", job_description)
         prompt = f"""Based on this job description, generate 5 relevant interview questions a candidate should prepare for:
 
 Job Description:
-{job_description[:1500]}
+{job_description}
 
 Generate questions that cover:
 1. Technical skills
@@ -227,30 +335,30 @@ Generate questions that cover:
 
 Return only the questions, one per line, numbered."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an experienced technical recruiter."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=400
-            )
-            
-            content = response.choices[0].message.content.strip()
+        def parse(content: str) -> List[str]:
             # Clean up numbered questions
             questions = []
-            for line in content.split('\n'):
+            for line in content.strip().split('\n'):
                 line = line.strip()
                 if line:
                     # Remove numbering
                     cleaned = re.sub(r'^\d+[\.\)]\s*', '', line)
                     if cleaned:
                         questions.append(cleaned)
-            
             return questions[:5]
-            
+
+        try:
+            return await self._complete(
+                "generate_interview_questions",
+                messages=[
+                    {"role": "system", "content": "You are an experienced technical recruiter."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=400,
+                parse=parse
+            )
+
         except Exception as e:
             print(f"Interview questions generation error: {str(e)}")
             return [
@@ -261,116 +369,79 @@ Return only the questions, one per line, numbered."""
                 "Where do you see yourself in 3-5 years?"
             ]
     
-    def generate_learning_roadmap(self, missing_skills: List[str], current_level: str, target_role: str) -> Dict:
+    async def generate_learning_roadmap(self, missing_skills: List[str], current_level: str, target_role: str) -> Dict:
         skills_str = ", ".join(missing_skills[:5])
-        prompt = f"""Create a focused 30-60-90 day learning roadmap for someone at {current_level} level targeting a {target_role} role.
+        prompt = f"""Create a focused, practical 30-60-90 day learning roadmap for someone at {current_level} level targeting a {target_role} role.
 
 Missing Skills: {skills_str}
 
-Provide a practical plan in JSON format:
-{{
-  "days_0_30": {{
-    "focus": "Foundation building",
-    "skills": ["skill1", "skill2"],
-    "resources": ["Online course", "Documentation"],
-    "projects": ["Small project idea"],
-    "milestones": ["Milestone 1", "Milestone 2"]
-  }},
-  "days_31_60": {{
-    "focus": "Intermediate practice",
-    "skills": ["skill3", "skill4"],
-    "resources": ["Advanced tutorial", "Practice platform"],
-    "projects": ["Medium project idea"],
-    "milestones": ["Milestone 1", "Milestone 2"]
-  }},
-  "days_61_90": {{
-    "focus": "Advanced application",
-    "skills": ["skill5", "integration"],
-    "resources": ["Real-world examples", "Community"],
-    "projects": ["Portfolio project idea"],
-    "milestones": ["Milestone 1", "Milestone 2"]
-  }},
-  "weekly_time_commitment": "10-15 hours",
-  "success_metrics": ["Metric 1", "Metric 2"]
-}}"""
+Reply with a JSON object:
+{schema_outline(LearningRoadmapResponse)}"""
+
+        def parse(content: str) -> Dict:
+            return validate_fields(extract_json(content, "object"), LearningRoadmapResponse)
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._complete(
+                "generate_learning_roadmap",
                 messages=[
                     {"role": "system", "content": "You are a career development coach."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=800
+                max_tokens=800,
+                parse=parse,
+                json_mode=True
             )
-            
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return self._create_fallback_roadmap()
         except Exception as e:
             print(f"Roadmap generation error: {str(e)}")
             return self._create_fallback_roadmap()
     
-    def generate_mock_interview_questions(self, resume_text: str, job_description: str) -> List[Dict]:
-        prompt = f"""Based on this resume and job description, generate 6 targeted interview questions.
+    async def generate_mock_interview_questions(self, resume_text: str, job_description: str) -> List[Dict]:
+        resume_text = await self._focus_resume("generate_mock_interview_questions", resume_text, job_description)
+        job_description = self.budgets.fit("generate_mock_interview_questions", "job", job_description)
+        prompt = f"""Based on this resume and job description, generate 6 targeted interview questions with detailed guidance.
 
 Resume highlights:
-{resume_text[:1500]}
+{resume_text}
 
 Job Description:
-{job_description[:1500]}
-
-For each question, provide detailed guidance.
-
-Format as JSON array:
-[
-  {{
-    "question": "The interview question",
-    "category": "Technical/Behavioral/Situational",
-    "difficulty": "Easy/Medium/Hard",
-    "why_asked": "Brief explanation of why interviewers ask this",
-    "key_points": ["Point 1 to cover", "Point 2 to cover", "Point 3 to cover"],
-    "sample_answer": "A brief sample answer approach using STAR method",
-    "red_flags": ["Red flag 1 to avoid", "Red flag 2 to avoid"]
-  }}
-]"""
+{job_description}
+
+Reply with a JSON object:
+{schema_outline(MockInterviewResponse)}"""
+
+        def parse(content: str) -> List[Dict]:
+            # JSON mode replies are objects; a bare array is still accepted
+            data = extract_json(content)
+            items = data.get("questions", []) if isinstance(data, dict) else data
+            questions = [q for q in items if isinstance(q, dict) and q.get("question")]
+            if not questions:
+                raise ValueError("No questions in response")
+            # Ensure all required fields are present
+            for q in questions:
+                if 'difficulty' not in q:
+                    q['difficulty'] = 'Medium'
+                if 'key_points' not in q:
+                    q['key_points'] = []
+                if 'sample_answer' not in q:
+                    q['sample_answer'] = ''
+                if 'red_flags' not in q:
+                    q['red_flags'] = []
+            return questions
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._complete(
+                "generate_mock_interview_questions",
                 messages=[
                     {"role": "system", "content": "You are an experienced technical recruiter and interview coach who creates targeted, thoughtful interview questions with detailed guidance."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=1500
+                max_tokens=1500,
+                parse=parse,
+                json_mode=True
             )
-            
-            content = response.choices[0].message.content
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                questions = json.loads(json_match.group())
-                # Ensure all required fields are present
-                for q in questions:
-                    if 'difficulty' not in q:
-                        q['difficulty'] = 'Medium'
-                    if 'key_points' not in q:
-                        q['key_points'] = []
-                    if 'sample_answer' not in q:
-                        q['sample_answer'] = ''
-                    if 'red_flags' not in q:
-                        q['red_flags'] = []
-                return questions
-            else:
-                print("Could not parse JSON from response")
-                return self._create_fallback_questions()
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error in mock questions: {str(e)}")
-            return self._create_fallback_questions()
         except Exception as e:
             print(f"Mock questions generation error: {str(e)}")
             return self._create_fallback_questions()
@@ -399,7 +470,8 @@ Format as JSON array:
                 "milestones": ["Polished portfolio", "Ready for interviews"]
             },
             "weekly_time_commitment": "10-15 hours",
-            "success_metrics": ["Projects completed", "Skills acquired"]
+            "success_metrics": ["Projects completed", "Skills acquired"],
+            "degraded": True
         }
     
     def _create_fallback_questions(self) -> List[Dict]:
@@ -463,226 +535,172 @@ Format as JSON array:
             "bullet_point_analysis": ["API analysis failed - check your OpenAI key"],
             "consistency_issues": ["Analysis incomplete"],
             "career_gaps": [],
-            "summary": "⚠️ AI analysis failed. This is fallback data. Check your OpenAI API key and credits."
+            "summary": "⚠️ AI analysis failed. This is fallback data. Check your OpenAI API key and credits.",
+            "degraded": True
         }
     
-    def analyze_voice_answer(self, transcript: str, question: str, job_desc: str, resume_text: str) -> Dict:
+    async def analyze_voice_answer(self, transcript: str, question: str, job_desc: str, resume_text: str) -> Dict:
+        job_desc = self.budgets.fit("analyze_voice_answer", "job", job_desc)
+        resume_text = self.budgets.fit("analyze_voice_answer", "resume", resume_text)
         prompt = f"""Analyze this interview answer for quality and alignment.
 
 Question: {question}
 
 Candidate's Answer: {transcript}
 
-Job Description: {job_desc[:800]}
+Job Description: {job_desc}
 
-Resume: {resume_text[:800]}
+Resume: {resume_text}
 
-Score the answer on:
-1. Relevance (0-100): How well does it answer the question?
-2. Clarity (0-100): Is it well-structured and clear?
-3. Skill Alignment (0-100): Does it demonstrate required skills?
+Reply with a JSON object:
+{schema_outline(VoiceInterviewResponse)}"""
 
-Return JSON:
-{{
-  "relevance_score": 85,
-  "clarity_score": 90,
-  "skill_alignment_score": 80,
-  "overall_score": 85,
-  "feedback": ["Point 1", "Point 2"],
-  "improved_answer": "A better version using STAR method...",
-  "follow_up_questions": ["Question 1", "Question 2"],
-  "key_points_covered": ["Point 1", "Point 2"],
-  "missing_points": ["What you should have mentioned"]
-}}"""
+        def parse(content: str) -> Dict:
+            return validate_fields(extract_json(content, "object"), VoiceInterviewResponse)
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._complete(
+                "analyze_voice_answer",
                 messages=[
                     {"role": "system", "content": "You're an expert interview coach."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=600
+                max_tokens=600,
+                parse=parse,
+                json_mode=True
             )
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            return self._fallback_voice_analysis()
         except Exception as e:
             print(f"Voice analysis error: {str(e)}")
             return self._fallback_voice_analysis()
     
-    def check_consistency(self, resume_text: str, interview_answers: List[Dict]) -> Dict:
+    async def check_consistency(self, resume_text: str, interview_answers: List[Dict]) -> Dict:
         answers_text = "\n".join([f"Q: {a['question']}\nA: {a['answer']}" for a in interview_answers[:5]])
+        resume_text = self.budgets.fit("check_consistency", "resume", resume_text)
         
-        prompt = f"""You are a HIGHLY SKEPTICAL recruiter verifying if interview answers match the resume. Be CRITICAL and THOROUGH.
+        prompt = f"""Verify whether these interview answers match the resume. Be critical and thorough.
 
 === RESUME ===
-{resume_text[:2000]}
+{resume_text}
 
 === INTERVIEW ANSWERS ===
 {answers_text}
 
-=== DETAILED ANALYSIS INSTRUCTIONS ===
-
-1. CHECK FOR CONTRADICTIONS:
-   - Compare dates, timelines, job titles, company names
-   - Compare technical skills claimed vs demonstrated
-   - Compare project descriptions
-   - Flag ANY inconsistency, no matter how small
-
-2. RELEVANCE CHECK:
-   - If answers discuss experiences NOT mentioned in resume = RED FLAG
-   - If answers are completely unrelated to resume content = MAJOR RED FLAG
-   - If answers mention technologies/skills not in resume = inconsistency
-
-3. SCORING CRITERIA (overall_consistency 0-100):
-   - 90-100: Perfect alignment, answers directly support resume
-   - 70-89: Good alignment, minor discrepancies
-   - 50-69: Moderate concerns, some inconsistencies
-   - 30-49: Significant issues, multiple contradictions
-   - 0-29: MAJOR RED FLAGS - answers don't match resume at all
-
-4. SEVERITY LEVELS:
-   - High: Contradicts major claims (job title, years, key skills)
-   - Medium: Contradicts minor details or shows weak evidence
-   - Low: Slight inconsistency or needs clarification
-
-Return ONLY this JSON (no markdown):
-{{
-  "overall_consistency": <number 0-100>,
-  "contradictions": [
-    {{"claim": "Resume states: [exact claim]", "answer": "Interview states: [exact quote]", "severity": "High/Medium/Low"}}
-  ],
-  "weak_claims": [
-    {{"claim": "Specific claim from resume", "issue": "Why interview answer doesn't support it"}}
-  ],
-  "areas_to_clarify": ["Specific area that needs explanation"],
-  "red_flags": ["Specific red flag with explanation"]
-}}
-
-BE BRUTALLY HONEST. If answers are unrelated to resume, score should be 20-40% with clear red flags."""
+Contradictions: compare dates, timelines, job titles, companies, claimed vs demonstrated skills and projects; flag any inconsistency.
+Red flags: experiences or technologies in the answers that the resume doesn't mention, or answers unrelated to the resume.
+overall_consistency: 90-100 answers directly support the resume, 70-89 minor discrepancies, 50-69 some inconsistencies, 30-49 multiple contradictions, 0-29 answers don't match the resume at all.
+Severity: High contradicts major claims (title, years, key skills), Medium minor details or weak evidence, Low needs clarification.
+
+Reply with a JSON object:
+{schema_outline(ConsistencyCheckResponse)}"""
+
+        def parse(content: str) -> Dict:
+            # Missing or invalid fields get neutral defaults
+            return validate_fields(
+                extract_json(content, "object"),
+                ConsistencyCheckResponse,
+                defaults={
+                    "overall_consistency": 50,
+                    "contradictions": [],
+                    "weak_claims": [],
+                    "areas_to_clarify": [],
+                    "red_flags": []
+                }
+            )
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._complete(
+                "check_consistency",
                 messages=[
-                    {"role": "system", "content": "You are a skeptical recruiter with a keen eye for inconsistencies. Return ONLY valid JSON."},
+                    {"role": "system", "content": "You are a skeptical recruiter with a keen eye for inconsistencies. Reply in JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.2,
-                max_tokens=2000
+                max_tokens=2000,
+                parse=parse,
+                json_mode=True
             )
-            content = response.choices[0].message.content.strip()
-            # Clean markdown if present
-            content = re.sub(r'^```json\\s*', '', content)
-            content = re.sub(r'^```\\s*', '', content)
-            content = re.sub(r'\\s*```$', '', content)
-            
-            json_match = re.search(r'\\{.*\\}', content, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                # Ensure all required fields exist
-                if 'overall_consistency' not in result:
-                    result['overall_consistency'] = 50
-                if 'contradictions' not in result:
-                    result['contradictions'] = []
-                if 'weak_claims' not in result:
-                    result['weak_claims'] = []
-                if 'areas_to_clarify' not in result:
-                    result['areas_to_clarify'] = []
-                if 'red_flags' not in result:
-                    result['red_flags'] = []
-                return result
-            return self._fallback_consistency()
         except Exception as e:
             print(f"Consistency check error: {str(e)}")
             return self._fallback_consistency()
     
-    def recruiter_lens_analysis(self, resume_text: str, job_desc: str) -> Dict:
-        prompt = f"""You're a busy recruiter spending 30 seconds on this resume.
+    async def recruiter_lens_analysis(self, resume_text: str, job_desc: str) -> Dict:
+        resume_text = await self._focus_resume("recruiter_lens_analysis", resume_text, job_desc)
+        job_desc = self.budgets.fit("recruiter_lens_analysis", "job", job_desc)
+        prompt = f"""You're a busy recruiter spending 30 seconds on this resume. What catches your eye immediately? What are red flags?
 
-Resume: {resume_text[:1200]}
+Resume: {resume_text}
 
-Job: {job_desc[:600]}
+Job: {job_desc}
 
-What catches your eye immediately? What are red flags?
+Reply with a JSON object:
+{schema_outline(RecruiterLensResponse)}"""
 
-Return JSON:
-{{
-  "first_impression_score": 75,
-  "attention_grabbers": ["Impressive thing 1", "Impressive thing 2"],
-  "red_flags": ["Red flag 1", "Red flag 2"],
-  "missing_essentials": ["Missing thing 1"],
-  "visual_appeal_score": 80,
-  "time_to_decision": "20 seconds",
-  "likelihood": "Would interview"
-}}"""
+        def parse(content: str) -> Dict:
+            return validate_fields(extract_json(content, "object"), RecruiterLensResponse)
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._complete(
+                "recruiter_lens_analysis",
                 messages=[
                     {"role": "system", "content": "You're a recruiter making quick decisions."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=400
+                max_tokens=400,
+                parse=parse,
+                json_mode=True
             )
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            return self._fallback_recruiter_lens()
         except Exception as e:
             print(f"Recruiter lens error: {str(e)}")
             return self._fallback_recruiter_lens()
     
-    def career_switch_analysis(self, resume_text: str, target_job: str) -> Dict:
-        prompt = f"""Analyze career switch feasibility.
+    async def career_switch_analysis(self, resume_text: str, target_job: str) -> Dict:
+        resume_text = self.budgets.fit("career_switch_analysis", "resume", resume_text)
+        prompt = f"""Assess whether this person can transition to the target role.
 
-Current Resume: {resume_text[:1000]}
+Current Resume: {resume_text}
 
 Target Job: {target_job}
 
-Assess if this person can transition to the target role.
-
-Return JSON:
-{{
-  "is_feasible": true,
-  "gap_percentage": 35,
-  "alternative_roles": [
-    {{"role": "Role 1", "match_percentage": 85, "reason": "Why", "required_skills": ["Skill 1"]}},
-    {{"role": "Role 2", "match_percentage": 75, "reason": "Why", "required_skills": ["Skill 1"]}}
-  ],
-  "transition_difficulty": "Moderate",
-  "recommended_path": ["Step 1", "Step 2", "Step 3"],
-  "timeline": "6-12 months"
-}}"""
+Reply with a JSON object:
+{schema_outline(CareerSwitchResponse)}"""
+
+        def parse(content: str) -> Dict:
+            return validate_fields(extract_json(content, "object"), CareerSwitchResponse)
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._complete(
+                "career_switch_analysis",
                 messages=[
                     {"role": "system", "content": "You're a career counselor."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=600
+                max_tokens=600,
+                parse=parse,
+                json_mode=True
             )
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            return self._fallback_career_switch()
         except Exception as e:
             print(f"Career switch error: {str(e)}")
             return self._fallback_career_switch()
     
-    def simulate_whatif(self, resume_text: str, job_desc: str, add_skills: List[str], 
-                        remove_skills: List[str], add_exp: str, original_score: int) -> Dict:
+    async def explain_whatif(self, job_desc: str, add_skills: List[str], remove_skills: List[str],
+                             add_exp: str, simulation: Dict) -> Dict:
+        """
+        Replace a local what-if result's narrative with the model's.
+        
+        Args:
+            job_desc: Job description
+            add_skills: Skills added
+            remove_skills: Skills removed
+            add_exp: Experience added
+            simulation: WhatIfEngine result; its scores are kept as they are
+            
+        Returns:
+            The simulation with the model's impact_analysis and recommendations,
+            or unchanged but flagged degraded if the call fails
+        """
         modifications = []
         if add_skills:
             modifications.append(f"Adding skills: {', '.join(add_skills)}")
@@ -691,42 +709,39 @@ Return JSON:
         if add_exp:
             modifications.append(f"Adding experience: {add_exp[:200]}")
         
-        prompt = f"""Predict resume match score change.
+        job_desc = self.budgets.fit("simulate_whatif", "job", job_desc)
+        
+        prompt = f"""Explain how these resume modifications change the match score.
 
-Original Resume Score: {original_score}%
+Match score: {simulation['original_score']}% -> {simulation['new_score']}%
+{simulation['impact_analysis']}
 
 Modifications: {' | '.join(modifications)}
 
-Job Description: {job_desc[:600]}
+Job Description: {job_desc}
+
+Reply with a JSON object:
+{schema_outline(WhatIfResponse, WHATIF_SERVER_FIELDS)}"""
 
-Return JSON:
-{{
-  "new_score": 78,
-  "score_change": 8,
-  "impact_analysis": "Adding Python increases relevance...",
-  "recommendations": ["Rec 1", "Rec 2"]
-}}"""
+        def parse(content: str) -> Dict:
+            return validate_fields(extract_json(content, "object"), WhatIfResponse, exclude=WHATIF_SERVER_FIELDS)
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            explanation = await self._complete(
+                "simulate_whatif",
                 messages=[
                     {"role": "system", "content": "You're analyzing resume modifications."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.6,
-                max_tokens=400
+                max_tokens=400,
+                parse=parse,
+                json_mode=True
             )
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                result["original_score"] = original_score
-                return result
-            return self._fallback_whatif(original_score)
+            return {**simulation, **explanation}
         except Exception as e:
-            print(f"What-if simulation error: {str(e)}")
-            return self._fallback_whatif(original_score)
+            print(f"What-if explanation error: {str(e)}")
+            return {**simulation, "degraded": True}
     
     def _fallback_voice_analysis(self) -> Dict:
         return {
@@ -738,7 +753,8 @@ Return JSON:
             "improved_answer": "Use the STAR method: Situation, Task, Action, Result. Be specific with metrics.",
             "follow_up_questions": ["Can you elaborate on that project?", "What was your specific role?"],
             "key_points_covered": ["Mentioned relevant experience"],
-            "missing_points": ["Quantifiable results", "Team collaboration details"]
+            "missing_points": ["Quantifiable results", "Team collaboration details"],
+            "degraded": True
         }
     
     def _fallback_consistency(self) -> Dict:
@@ -747,7 +763,8 @@ Return JSON:
             "contradictions": [{"claim": "Unable to analyze", "answer": "API error occurred", "severity": "Medium"}],
             "weak_claims": [{"claim": "Analysis incomplete", "issue": "Could not complete AI analysis"}],
             "areas_to_clarify": ["Retry analysis - API error occurred"],
-            "red_flags": ["Analysis may be inaccurate due to API error"]
+            "red_flags": ["Analysis may be inaccurate due to API error"],
+            "degraded": True
         }
     
     def _fallback_recruiter_lens(self) -> Dict:
@@ -758,7 +775,8 @@ Return JSON:
             "missing_essentials": ["Professional summary", "Skills section"],
             "visual_appeal_score": 75,
             "time_to_decision": "25 seconds",
-            "likelihood": "Maybe interview"
+            "likelihood": "Maybe interview",
+            "degraded": True
         }
     
     def _fallback_career_switch(self) -> Dict:
@@ -771,14 +789,6 @@ Return JSON:
             ],
             "transition_difficulty": "Moderate",
             "recommended_path": ["Build missing skills", "Get certifications", "Work on portfolio projects"],
-            "timeline": "6-12 months"
-        }
-    
-    def _fallback_whatif(self, original_score: int) -> Dict:
-        return {
-            "original_score": original_score,
-            "new_score": original_score + 5,
-            "score_change": 5,
-            "impact_analysis": "Modifications would slightly improve your match score.",
-            "recommendations": ["Add more relevant keywords", "Quantify achievements"]
+            "timeline": "6-12 months",
+            "degraded": True
         }
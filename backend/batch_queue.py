@@ -0,0 +1,380 @@
+import asyncio
+import json
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Item states; pending and running items are still to do
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+
+class PermanentError(Exception):
+    """An item failure that retrying won't fix (unreadable PDF, bad input)."""
+
+
+@dataclass
+class BatchItem:
+    """One (resume, job description) pair of a batch job, as handed to the worker."""
+    id: int
+    job_id: str
+    position: int
+    filename: str
+    job_description: str
+    pdf: Optional[bytes]
+    attempts: int
+    # Checkpoint saved by earlier attempts (parsed text, similarity, ...)
+    state: Dict[str, Any] = field(default_factory=dict)
+
+
+Checkpoint = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class BatchQueue:
+    """
+    Persistent queue of batch screening items, worked by background tasks.
+
+    Jobs and items live in SQLite, so a restart loses nothing: items that
+    were running go back to pending and resume from their last checkpoint.
+    Workers are asyncio tasks in the API process that touch the database
+    only from a thread, and there are few of them, so a large batch runs
+    at a steady pace beside interactive requests instead of competing
+    with them.
+
+    Several processes (uvicorn workers) may share one database. An item is
+    claimed atomically and leased to the claiming process, which renews
+    the lease while it works; a process only requeues its own items, and
+    items whose lease ran out (their process died) are claimed again by
+    whoever is alive.
+    """
+
+    def __init__(self, db_path: str, process: Callable[[BatchItem, Checkpoint], Awaitable[Dict]],
+                 workers: int = 2, max_attempts: int = 3, retry_delay: float = 5.0,
+                 poll_seconds: float = 5.0, lease_seconds: float = 60.0):
+        """
+        Initialize the queue.
+
+        Args:
+            db_path: SQLite file holding jobs, items, checkpoints and results
+            process: Coroutine function turning an item into its result; it
+                may await checkpoint(state) after each stage
+            workers: Items processed concurrently
+            max_attempts: Tries per item before it is marked failed
+            retry_delay: Seconds before the first retry, doubling per attempt
+            poll_seconds: Idle workers re-check the queue this often
+            lease_seconds: How long a claimed item stays with this process
+                without a renewal; renewed every third of it
+        """
+        self.process = process
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        # Identifies this process's leases in a database shared with others
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.retries = 0
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, created_at REAL NOT NULL, total INTEGER NOT NULL, "
+            "cancelled INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, position INTEGER NOT NULL, "
+            "filename TEXT NOT NULL, job_description TEXT NOT NULL, pdf BLOB, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, available_at REAL NOT NULL, "
+            "checkpoint TEXT, result TEXT, error TEXT, updated_at REAL NOT NULL, "
+            "owner TEXT, lease_until REAL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(items)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE items ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_items_queue ON items(status, available_at, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_items_job ON items(job_id, position)")
+        self._db.commit()
+
+    def submit(self, items: List[Dict[str, Any]]) -> str:
+        """
+        Queue a batch job.
+
+        Args:
+            items: {"filename", "job_description", "pdf": raw bytes} per resume
+
+        Returns:
+            job_id for the status and results endpoints
+        """
+        job_id = secrets.token_urlsafe(12)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO jobs (id, created_at, total) VALUES (?, ?, ?)", (job_id, now, len(items)))
+            self._db.executemany(
+                "INSERT INTO items (job_id, position, filename, job_description, pdf, status, available_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (job_id, i, item["filename"], item["job_description"], item["pdf"], PENDING, now, now)
+                    for i, item in enumerate(items)
+                ]
+            )
+            self._db.commit()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Progress of a job.
+
+        Args:
+            job_id: ID returned by submit
+
+        Returns:
+            {job_id, status, total, counts, created_at}, or None if unknown
+        """
+        with self._lock:
+            row = self._db.execute("SELECT created_at, total, cancelled FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        created_at, total, cancelled = row
+        counts = {status: counts.get(status, 0) for status in (PENDING, RUNNING, DONE, FAILED, CANCELLED)}
+
+        if counts[PENDING] or counts[RUNNING]:
+            status = "running" if counts[RUNNING] or counts[DONE] or counts[FAILED] else "queued"
+        else:
+            status = "cancelled" if cancelled else "done"
+        return {"job_id": job_id, "status": status, "total": total, "counts": counts, "created_at": created_at}
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 50,
+                status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        A page of a job's items in submission order.
+
+        Args:
+            job_id: ID returned by submit
+            offset: Items to skip
+            limit: Items to return
+            status: Only items in this state
+
+        Returns:
+            {position, filename, status, attempts, error, result} per item
+        """
+        query = "SELECT position, filename, status, attempts, error, result FROM items WHERE job_id = ?"
+        params: List[Any] = [job_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY position LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [
+            {
+                "position": position,
+                "filename": filename,
+                "status": item_status,
+                "attempts": attempts,
+                "error": error,
+                "result": json.loads(result) if result else None
+            }
+            for position, filename, item_status, attempts, error, result in rows
+        ]
+
+    def cancel(self, job_id: str) -> int:
+        """
+        Cancel a job's pending items; items already running still finish.
+
+        Args:
+            job_id: ID returned by submit
+
+        Returns:
+            Number of items cancelled
+        """
+        with self._lock:
+            self._db.execute("UPDATE jobs SET cancelled = 1 WHERE id = ?", (job_id,))
+            cursor = self._db.execute(
+                "UPDATE items SET status = ?, pdf = NULL, updated_at = ? WHERE job_id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, PENDING)
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def _claim(self) -> Optional[BatchItem]:
+        """
+        Lease the oldest available item to this process and return it.
+
+        Pending items are available once their retry time has passed, and
+        running items once their lease has expired. The single UPDATE ...
+        RETURNING makes the claim atomic across processes. An expired item
+        that has used up its attempts (its worker crashed or hung every
+        time) is marked failed instead of being leased again.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE items SET status = ?, error = ?, pdf = NULL, owner = NULL, lease_until = NULL, "
+                "updated_at = ? WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, f"lease expired on attempt {self.max_attempts} of {self.max_attempts}", now,
+                 RUNNING, now, self.max_attempts)
+            )
+            row = self._db.execute(
+                "UPDATE items SET status = ?, attempts = attempts + 1, owner = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM items WHERE (status = ? AND available_at <= ?) "
+                "OR (status = ? AND lease_until < ? AND attempts < ?) ORDER BY id LIMIT 1) "
+                "RETURNING id, job_id, position, filename, job_description, pdf, attempts, checkpoint",
+                (RUNNING, self.owner, now + self.lease_seconds, now, PENDING, now, RUNNING, now, self.max_attempts)
+            ).fetchone()
+            self._db.commit()
+        if row is None:
+            return None
+        item_id, job_id, position, filename, job_description, pdf, attempts, checkpoint = row
+        return BatchItem(item_id, job_id, position, filename, job_description, pdf, attempts,
+                         json.loads(checkpoint) if checkpoint else {})
+
+    def _save_checkpoint(self, item_id: int, state: Dict[str, Any]):
+        """Persist an item's progress so a retry or restart skips finished stages."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE items SET checkpoint = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                (json.dumps(state), time.time(), item_id, self.owner)
+            )
+            self._db.commit()
+
+    def _finish(self, item_id: int, status: str, result: Optional[Dict] = None, error: Optional[str] = None,
+                retry_at: Optional[float] = None):
+        """
+        Record an item's outcome; a retry puts it back in the queue at retry_at.
+
+        Nothing is written if the item's lease has passed to another process.
+        """
+        with self._lock:
+            if retry_at is not None:
+                self._db.execute(
+                    "UPDATE items SET status = ?, available_at = ?, error = ?, owner = NULL, lease_until = NULL, "
+                    "updated_at = ? WHERE id = ? AND owner = ?",
+                    (PENDING, retry_at, error, time.time(), item_id, self.owner)
+                )
+            else:
+                # The PDF is no longer needed once the item is settled
+                self._db.execute(
+                    "UPDATE items SET status = ?, result = ?, error = ?, pdf = NULL, owner = NULL, "
+                    "lease_until = NULL, updated_at = ? WHERE id = ? AND owner = ?",
+                    (status, json.dumps(result) if result is not None else None, error, time.time(), item_id,
+                     self.owner)
+                )
+            self._db.commit()
+
+    def _requeue_own(self) -> int:
+        """
+        Put this process's running items back in the queue when it stops.
+
+        The interrupted attempt isn't counted. Items of a process that
+        crashed are not touched here; they are claimed again once their
+        lease expires, and that attempt does count, so an item that keeps
+        killing its worker eventually fails.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE items SET status = ?, attempts = MAX(attempts - 1, 0), owner = NULL, lease_until = NULL, "
+                "updated_at = ? WHERE status = ? AND owner = ?",
+                (PENDING, time.time(), RUNNING, self.owner)
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def _renew_leases(self) -> int:
+        """Extend the lease on every item this process is running."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE items SET lease_until = ? WHERE status = ? AND owner = ?",
+                (time.time() + self.lease_seconds, RUNNING, self.owner)
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    async def _run(self, item: BatchItem):
+        """Process one claimed item and record the result, failure or retry."""
+        async def checkpoint(state: Dict[str, Any]):
+            await asyncio.to_thread(self._save_checkpoint, item.id, state)
+
+        try:
+            result = await self.process(item, checkpoint)
+        except asyncio.CancelledError:
+            # Shutting down: the item is retried from its checkpoint on restart
+            raise
+        except PermanentError as e:
+            await asyncio.to_thread(self._finish, item.id, FAILED, error=str(e))
+        except Exception as e:
+            print(f"Batch item {item.job_id}/{item.position} failed (attempt {item.attempts}): {str(e)}")
+            if item.attempts < self.max_attempts:
+                self.retries += 1
+                retry_at = time.time() + self.retry_delay * 2 ** (item.attempts - 1)
+                await asyncio.to_thread(self._finish, item.id, PENDING, error=str(e), retry_at=retry_at)
+            else:
+                await asyncio.to_thread(self._finish, item.id, FAILED, error=str(e))
+        else:
+            await asyncio.to_thread(self._finish, item.id, DONE, result=result)
+        self.processed += 1
+
+    async def _work(self):
+        """Worker loop: claim, process, repeat; sleep until woken when the queue is empty."""
+        while True:
+            self._wakeup.clear()
+            item = await asyncio.to_thread(self._claim)
+            if item is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(item)
+
+    async def _heartbeat(self):
+        """Renew this process's leases well before they expire."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await asyncio.to_thread(self._renew_leases)
+
+    async def start(self):
+        """Start the workers and the lease heartbeat."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        """Cancel the workers; items they were running are resumed by the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self._requeue_own)
+
+    def stats(self) -> Dict:
+        """Queue depth and worker counters."""
+        with self._lock:
+            counts = dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM items WHERE status IN (?, ?) GROUP BY status", (PENDING, RUNNING)
+            ).fetchall())
+        return {
+            "pending": counts.get(PENDING, 0),
+            "running": counts.get(RUNNING, 0),
+            "workers": self.workers if self._tasks else 0,
+            "processed": self.processed,
+            "retries": self.retries
+        }
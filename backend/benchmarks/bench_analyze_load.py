@@ -0,0 +1,213 @@
+"""
+Load-test /api/analyze against a stubbed OpenAI upstream.
+
+Usage (from backend/):
+    python -m benchmarks.bench_analyze_load
+    python -m benchmarks.bench_analyze_load --concurrency 1 10 50 --delay 1.0
+    python -m benchmarks.bench_analyze_load --url http://127.0.0.1:8000
+
+A local stub answers chat completions after --delay seconds and
+embeddings after a fifth of that, so every analysis costs about one
+upstream round trip and the server itself does little work. For each
+concurrency level the script keeps that many /api/analyze requests in
+flight and reports throughput and latency percentiles. A server that
+keeps its LLM calls in flight concurrently scales throughput with
+concurrency; one that blocks its event loop on each call stays near
+1 / delay requests per second.
+
+The stub runs in a child process. By default the app runs in this
+process (one uvicorn worker) against it. With --url an already running server is measured instead, e.g. an
+older checkout started with OPENAI_BASE_URL=http://127.0.0.1:<stub-port>/v1.
+Every request uploads a different resume, so the response and embedding
+caches never answer for the upstream. The in-process app gets rate limits
+far above what the stub is sent (override with OPENAI_RATE_LIMITS and
+OPENAI_INITIAL_CONCURRENCY).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+import fitz
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+
+JOB = ("Senior Backend Engineer. Requirements: 5+ years of Python, FastAPI or Django, PostgreSQL, "
+       "Redis, Docker and Kubernetes on AWS. Experience with distributed systems and CI/CD.")
+
+ANALYSIS = {
+    "match_percentage": 72,
+    "match_explanation": "Strong Python and AWS background; Kubernetes depth unclear.",
+    "missing_skills": ["Kubernetes"],
+    "weak_areas": ["System design"],
+    "strengths": ["Python", "AWS"],
+    "ats_suggestions": ["Add a skills section"],
+    "role_suitability": {"level": "Senior", "confidence": "Medium", "reasoning": "Six years of backend work"},
+    "resume_sections_analysis": {},
+    "bullet_point_analysis": [],
+    "consistency_issues": [],
+    "career_gaps": [],
+    "summary": "Good fit for the role.",
+}
+
+
+def make_stub(delay: float) -> FastAPI:
+    """An OpenAI-compatible upstream that answers after a fixed delay."""
+    stub = FastAPI()
+
+    @stub.post("/v1/chat/completions")
+    async def chat(body: dict):
+        await asyncio.sleep(delay)
+        return {
+            "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": json.dumps(ANALYSIS)}}],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 500, "total_tokens": 1500},
+        }
+
+    @stub.post("/v1/embeddings")
+    async def embeddings(body: dict):
+        await asyncio.sleep(delay / 5)
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        data = []
+        for i, text in enumerate(inputs):
+            rng = random.Random(hashlib.sha256(str(text).encode("utf-8")).digest())
+            data.append({"object": "embedding", "index": i, "embedding": [rng.uniform(-1, 1) for _ in range(1536)]})
+        return {"object": "list", "model": body["model"], "data": data,
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)}}
+
+    return stub
+
+
+def run_stub(delay: float, port: int):
+    """Serve the stub upstream (target of the stub process)."""
+    uvicorn.run(make_stub(delay), host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_stub(delay: float, port: int) -> multiprocessing.Process:
+    """Start the stub in its own process, so its work doesn't compete with the app for the GIL."""
+    process = multiprocessing.Process(target=run_stub, args=(delay, port), daemon=True)
+    process.start()
+    while True:
+        if not process.is_alive():
+            raise SystemExit(f"Could not start the stub on port {port}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+
+
+def serve(app, port: int) -> uvicorn.Server:
+    """Run an ASGI app on a background thread and wait until it accepts connections."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit(f"Could not start a server on port {port}")
+        time.sleep(0.05)
+    return server
+
+
+def make_resume(n: int) -> bytes:
+    """A one-page PDF resume, different for every n."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 72), "\n".join([
+        f"Candidate {n}",
+        "Backend engineer with six years of Python, FastAPI and PostgreSQL.",
+        f"Built {n % 17 + 3} services on AWS with Docker and Redis caching.",
+        f"Cut p95 latency by {n % 40 + 10}% by moving batch jobs to Kafka consumers.",
+        "Skills: Python, Django, FastAPI, PostgreSQL, Redis, Docker, AWS, CI/CD.",
+    ]), fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+async def run_level(client: httpx.AsyncClient, url: str, concurrency: int, requests: int, offset: int):
+    """Send `requests` analyses with `concurrency` in flight; (seconds, latencies, errors)."""
+    resumes = [make_resume(offset + i) for i in range(requests)]
+    queue = list(range(requests))
+    latencies, errors = [], []
+
+    async def worker():
+        while queue:
+            i = queue.pop()
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"{url}/api/analyze",
+                    files={"resume": (f"resume_{offset + i}.pdf", resumes[i], "application/pdf")},
+                    data={"job_description": JOB},
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(str(e))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - start, latencies, errors
+
+
+async def run(args, url: str):
+    print(f"upstream delay={args.delay}s target={url}")
+    print(f"{'concurrency':>11}{'requests':>10}{'seconds':>9}{'req/s':>8}{'p50 s':>8}{'p95 s':>8}{'errors':>8}")
+    offset = 0
+    async with httpx.AsyncClient(timeout=300, limits=httpx.Limits(max_connections=max(args.concurrency))) as client:
+        for concurrency in args.concurrency:
+            requests = max(args.requests, 2 * concurrency)
+            seconds, latencies, errors = await run_level(client, url, concurrency, requests, offset)
+            offset += requests
+            p50, p95 = (np.percentile(latencies, [50, 95]) if latencies else (float("nan"), float("nan")))
+            print(f"{concurrency:>11}{requests:>10}{seconds:>9.2f}{len(latencies) / seconds:>8.2f}"
+                  f"{p50:>8.2f}{p95:>8.2f}{len(errors):>8}")
+            if errors:
+                print(f"  first error: {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--requests", type=int, default=10, help="requests per level (at least 2x concurrency)")
+    parser.add_argument("--delay", type=float, default=0.5, help="stub chat completion latency in seconds")
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--port", type=int, default=8799, help="port for the in-process app")
+    parser.add_argument("--url", help="measure this running server instead of an in-process app")
+    args = parser.parse_args()
+
+    start_stub(args.delay, args.stub_port)
+    url = args.url
+    if not url:
+        # The app reads its settings at import time
+        os.environ.update({
+            "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "stub"),
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+            "EMBEDDING_BACKEND": "openai",
+            "EMBEDDING_CACHE_PATH": "",
+            "LLM_CACHE_PATH": "",
+            "DATA_DIR": tempfile.mkdtemp(prefix="bench_analyze_load_"),
+        })
+        # The stub has no rate limit; don't let the client-side budget be what's measured
+        os.environ.setdefault("OPENAI_RATE_LIMITS", "gpt-4o-mini=1000000:1000000000,"
+                                                    "text-embedding-3-small=1000000:1000000000")
+        os.environ.setdefault("OPENAI_INITIAL_CONCURRENCY", "64")
+        from main import app
+        serve(app, args.port)
+        url = f"http://127.0.0.1:{args.port}"
+    asyncio.run(run(args, url))
+
+
+if __name__ == "__main__":
+    main()
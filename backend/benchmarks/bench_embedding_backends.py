@@ -0,0 +1,137 @@
+"""
+Compare the OpenAI and local embedding backends on throughput and ranking.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_backends --model-dir models/all-MiniLM-L6-v2
+    python -m benchmarks.bench_embedding_backends --model-dir models/all-MiniLM-L6-v2 \\
+        --model-file model_quantized.onnx --candidates resumes.txt --jobs jobs.txt --threads 4
+
+Both backends embed the same candidate resumes and job descriptions
+without the embedding cache. Throughput is texts per second for the whole
+corpus, latency is a single short text (what a /api/analyze call waits
+for). Each job then ranks the candidates by cosine similarity under both
+backends, and the local ranking is compared with the remote one as the
+reference: Spearman correlation over the full ranking and overlap of the
+top-k. The remote model goes to the configured API (OPENAI_API_KEY /
+OPENAI_BASE_URL).
+
+--candidates and --jobs take one text per line; without them a corpus is
+generated from the resume bullets of bench_section_retrieval.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+from benchmarks.bench_section_retrieval import JOB, ROLES
+from embedding_backends import EmbeddingBackend, LocalEmbeddings, OpenAIEmbeddings
+from vector_store import recall_at_k
+
+SKILLS = ["Python", "Go", "Java", "Kubernetes", "Terraform", "AWS", "GCP", "PostgreSQL", "Redis", "Kafka",
+          "React", "TypeScript", "Django", "FastAPI", "Spark", "Airflow", "PyTorch", "SQL", "Figma", "Salesforce"]
+TITLES = ["Backend Engineer", "Platform Engineer", "Data Engineer", "Frontend Developer", "ML Engineer",
+          "Product Designer", "Sales Operations Analyst", "Site Reliability Engineer"]
+
+
+def make_corpus(candidates: int, jobs: int, seed: int = 0):
+    """Synthetic resumes (title, skills, a few bullets) and job descriptions (title, skills)."""
+    rng = np.random.default_rng(seed)
+    bullets = [bullet for _, role_bullets in ROLES for bullet in role_bullets]
+    resumes = []
+    for _ in range(candidates):
+        skills = rng.choice(SKILLS, size=rng.integers(3, 8), replace=False)
+        chosen = rng.choice(bullets, size=rng.integers(2, 6), replace=False)
+        resumes.append(f"{rng.choice(TITLES)}. Skills: {', '.join(skills)}. " + " ".join(chosen))
+    descriptions = [JOB]
+    for _ in range(jobs - 1):
+        skills = rng.choice(SKILLS, size=rng.integers(3, 6), replace=False)
+        descriptions.append(f"Hiring a {rng.choice(TITLES)}. Requirements: {', '.join(skills)}, "
+                            f"{rng.integers(2, 9)}+ years of experience.")
+    return resumes, descriptions
+
+
+def read_lines(path: str):
+    """Non-empty lines of a text file."""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    """Spearman rank correlation of two score vectors (no tie correction)."""
+    rank_a, rank_b = np.argsort(np.argsort(a)), np.argsort(np.argsort(b))
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+async def measure(backend: EmbeddingBackend, candidates, jobs, repeat: int):
+    """(candidate vectors, job vectors, corpus texts/s, single-text p50 ms)."""
+    start = time.perf_counter()
+    vectors = np.array(await backend.embed(candidates + jobs), dtype=np.float32)
+    throughput = (len(candidates) + len(jobs)) / (time.perf_counter() - start)
+
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        await backend.embed([f"{jobs[i % len(jobs)][:200]} ({i})"])
+        latencies.append(time.perf_counter() - start)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors[:len(candidates)], vectors[len(candidates):], throughput, 1000 * float(np.median(latencies))
+
+
+async def run(args):
+    if args.candidates:
+        candidates, jobs = read_lines(args.candidates), read_lines(args.jobs) if args.jobs else [JOB]
+    else:
+        candidates, jobs = make_corpus(args.n, args.queries)
+
+    backends = {
+        "local": LocalEmbeddings(args.model_dir, model_file=args.model_file, batch_size=args.batch_size,
+                                 max_length=args.max_length, threads=args.threads)
+    }
+    if not args.local_only:
+        backends = {"openai": OpenAIEmbeddings(model=args.remote_model), **backends}
+
+    print(f"candidates={len(candidates)} jobs={len(jobs)} k={args.k}")
+    print(f"{'backend':<8}{'model':<44}{'dim':>6}{'texts/s':>10}{'1-text ms':>11}")
+    results = {}
+    for name, backend in backends.items():
+        results[name] = await measure(backend, candidates, jobs, args.repeat)
+        _, _, throughput, latency = results[name]
+        print(f"{name:<8}{backend.model:<44}{backend.dimension:>6}{throughput:>10.1f}{latency:>11.1f}")
+
+    if "openai" not in results:
+        return
+    # Rank agreement with the remote model as the reference
+    k = min(args.k, len(candidates))
+    remote_scores = results["openai"][1] @ results["openai"][0].T
+    local_scores = results["local"][1] @ results["local"][0].T
+    rho = [spearman(remote, local) for remote, local in zip(remote_scores, local_scores)]
+    remote_top = np.argsort(-remote_scores, axis=1)[:, :k]
+    local_top = np.argsort(-local_scores, axis=1)[:, :k]
+    print(f"rank agreement (local vs openai): spearman mean={np.mean(rho):.3f} min={np.min(rho):.3f}, "
+          f"top-{k} overlap={recall_at_k(local_top, remote_top, k):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", required=True, help="directory with the ONNX model and tokenizer.json")
+    parser.add_argument("--model-file", default="model.onnx")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime threads (0 = every core)")
+    parser.add_argument("--remote-model", default="text-embedding-3-small")
+    parser.add_argument("--local-only", action="store_true", help="skip the API (no rank agreement)")
+    parser.add_argument("--candidates", help="resumes, one per line")
+    parser.add_argument("--jobs", help="job descriptions, one per line")
+    parser.add_argument("--n", type=int, default=1000, help="generated candidates")
+    parser.add_argument("--queries", type=int, default=20, help="generated job descriptions")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20, help="single-text latency samples")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
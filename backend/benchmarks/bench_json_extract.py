@@ -0,0 +1,123 @@
+"""
+Benchmark extract_json against the regex extraction AIAnalyzer used before.
+
+Usage (from backend/):
+    python -m benchmarks.bench_json_extract
+    python -m benchmarks.bench_json_extract --large-items 20000 --repeat 5
+
+For each kind of model output, reports time per parse and how many
+top-level fields each implementation recovers (0 means the call would
+have fallen back to canned results).
+"""
+import argparse
+import json
+import re
+import time
+
+from json_stream import extract_json
+
+
+def legacy_analysis_parse(content: str):
+    """analyze_match's parser: strip fences, json.loads, then the nested-brace regex."""
+    content = content.strip()
+    content = re.sub(r'^```json\s*', '', content)
+    content = re.sub(r'^```\s*', '', content)
+    content = re.sub(r'\s*```$', '', content)
+    content = content.strip()
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', content, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+    raise ValueError("No valid JSON found in response")
+
+
+def legacy_object_parse(content: str):
+    """Every other method's parser: greedy brace regex, then json.loads."""
+    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+    if not json_match:
+        raise ValueError("No JSON object in response")
+    return json.loads(json_match.group())
+
+
+def analysis(items: int) -> dict:
+    """An analyze_match-shaped reply with list fields of the given length."""
+    return {
+        "match_percentage": 72,
+        "match_explanation": "Strong backend experience; limited cloud exposure.",
+        "missing_skills": [f"skill {i}" for i in range(items)],
+        "weak_areas": ["Kubernetes", "Terraform"],
+        "strengths": [f"Shipped service {i} handling {i}k req/s" for i in range(items)],
+        "ats_suggestions": ["Add a skills section", "Quantify impact"],
+        "keywords_found": ["Python", "FastAPI", "PostgreSQL"],
+        "keywords_missing": ["AWS"],
+        "keyword_density_score": 64,
+        "role_suitability": {"level": "Senior", "confidence": "High", "reasoning": "8 years"},
+        "resume_sections_analysis": {
+            "experience": {"score": 80, "impact": "High", "feedback": "Relevant {and} recent"},
+            "skills": {"score": 70, "impact": "High", "feedback": "Broad"},
+            "education": {"score": 75, "impact": "Medium", "feedback": "BSc CS"}
+        },
+        "bullet_point_analysis": ["Most bullets lack metrics"],
+        "consistency_issues": [],
+        "career_gaps": [],
+        "summary": "Good fit for the role."
+    }
+
+
+def cases(large_items: int) -> dict:
+    """Named model outputs, from well-formed to broken."""
+    clean = json.dumps(analysis(5), indent=2)
+    large = json.dumps(analysis(large_items), indent=2)
+    return {
+        "clean": clean,
+        "fenced + prose": f"Here is the analysis:\n```json\n{clean}\n```\nLet me know if you need more.",
+        "trailing brace prose": f"{clean}\nNote: scores use the {{0-100}} scale.",
+        "truncated (max_tokens)": clean[: int(len(clean) * 0.7)],
+        "large": large,
+        "large truncated": large[: int(len(large) * 0.9)],
+        "brace prose before json": "Scores use the {0-100} scale.\n" + clean,
+        "unbalanced braces": "{" * large_items + clean,
+    }
+
+
+def run(fn, content: str, repeat: int):
+    """(microseconds per call, fields recovered)."""
+    try:
+        result = fn(content)
+        fields = len(result) if isinstance(result, dict) else 0
+    except (ValueError, json.JSONDecodeError):
+        fields = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            fn(content)
+        except (ValueError, json.JSONDecodeError):
+            pass
+    return (time.perf_counter() - start) / repeat * 1e6, fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--large-items", type=int, default=5000, help="list length in the large outputs")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    implementations = [
+        ("analyze_match regex", legacy_analysis_parse),
+        ("greedy regex", legacy_object_parse),
+        ("extract_json", lambda content: extract_json(content, "object")),
+    ]
+
+    print(f"{'case':24s} {'chars':>8s}  " + "  ".join(f"{name:>28s}" for name, _ in implementations))
+    for case, content in cases(args.large_items).items():
+        cells = []
+        for _, fn in implementations:
+            micros, fields = run(fn, content, args.repeat)
+            cells.append(f"{micros:12.1f} us {fields:3d} fields")
+        print(f"{case:24s} {len(content):8d}  " + "  ".join(f"{cell:>28s}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
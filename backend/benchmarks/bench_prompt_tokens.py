@@ -0,0 +1,158 @@
+"""
+Count prompt tokens per analyzer method, optionally against an older revision.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prompt_tokens
+    python -m benchmarks.bench_prompt_tokens --baseline HEAD~1
+
+Every JSON-producing AIAnalyzer method is called with the same realistic
+inputs against a recording client, and the input tokens of the messages it
+would send are counted. With --baseline, ai_analyzer.py from that git
+revision is loaded alongside the working tree and compared.
+
+Tokens are counted with tiktoken's o200k_base (gpt-4o family) when it is
+available, otherwise estimated at ~4 characters per token.
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ["LLM_CACHE_METHODS"] = ""
+
+RESUME = ("Jane Doe - Senior Backend Engineer\n"
+          "Experience: 8 years building Python services (FastAPI, Django) on AWS, PostgreSQL, Redis, Kafka. "
+          "Led a team of 5 migrating a monolith to microservices; cut p99 latency 40%. ") * 12
+JOB = ("We are hiring a Senior Platform Engineer. Requirements: Python, Go, Kubernetes, Terraform, AWS, "
+       "CI/CD, observability, 6+ years of backend experience, mentoring. ") * 10
+
+WHATIF_SIMULATION = {
+    "original_score": 62, "new_score": 70, "score_change": 8, "keyword_score_change": 14, "similarity_change": 0.004,
+    "impact_analysis": "Coverage of the job's skills goes from 58% to 72%. Adds Go, Kubernetes, which the job asks for.",
+    "recommendations": ["Show evidence of Terraform"],
+}
+
+CALLS = {
+    "analyze_match": lambda a: a.analyze_match(RESUME, JOB, 0.62),
+    "generate_learning_roadmap": lambda a: a.generate_learning_roadmap(["Go", "Kubernetes", "Terraform"], "Mid-Level", "Platform Engineer"),
+    "generate_mock_interview_questions": lambda a: a.generate_mock_interview_questions(RESUME, JOB),
+    "analyze_voice_answer": lambda a: a.analyze_voice_answer("I led the migration by first mapping dependencies...", "Tell me about a migration you led.", JOB, RESUME),
+    "check_consistency": lambda a: a.check_consistency(RESUME, [{"question": "What did you build at your last job?", "answer": "Mostly Go services on GCP."}]),
+    "recruiter_lens_analysis": lambda a: a.recruiter_lens_analysis(RESUME, JOB),
+    "career_switch_analysis": lambda a: a.career_switch_analysis(RESUME, "Machine Learning Engineer"),
+    "simulate_whatif": lambda a: (
+        a.explain_whatif(JOB, ["Go", "Kubernetes"], [], "", WHATIF_SIMULATION) if hasattr(a, "explain_whatif")
+        # Revisions before the local what-if engine
+        else a.simulate_whatif(RESUME, JOB, ["Go", "Kubernetes"], [], "", 62)
+    ),
+}
+
+
+def token_counter():
+    """(name, count function) for the best tokenizer available."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return "o200k_base", lambda text: len(encoding.encode(text))
+    except Exception:
+        return "~4 chars/token estimate", lambda text: len(text) // 4 + 1
+
+
+class RecordingCompletions:
+    """Stands in for client.chat.completions; records requests and fails them."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        raise RuntimeError("recording only")
+
+
+def load_analyzer(source: Path, name: str):
+    """Import an ai_analyzer.py file as its own module."""
+    spec = importlib.util.spec_from_file_location(name, source)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.AIAnalyzer
+
+
+def record(analyzer_cls) -> dict:
+    """Messages and options each method would send."""
+    analyzer = analyzer_cls()
+    recorder = RecordingCompletions()
+    analyzer.client.chat.completions = recorder
+    recorded = {}
+
+    async def run():
+        for method, call in CALLS.items():
+            recorder.requests.clear()
+            await call(analyzer)
+            recorded[method] = recorder.requests[0] if recorder.requests else None
+
+    asyncio.run(run())
+    return recorded
+
+
+def prompt_tokens(request, count) -> int:
+    """Input tokens for one chat request (content plus ~4 tokens per message)."""
+    if request is None:
+        return 0
+    return sum(count(message["content"]) + 4 for message in request["messages"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="git revision to compare against, e.g. HEAD~1")
+    args = parser.parse_args()
+
+    tokenizer, count = token_counter()
+    backend = Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(backend))
+
+    current = record(load_analyzer(backend / "ai_analyzer.py", "ai_analyzer_current"))
+    baseline = None
+    if args.baseline:
+        source = subprocess.run(
+            ["git", "show", f"{args.baseline}:backend/ai_analyzer.py"],
+            cwd=backend, check=True, capture_output=True, text=True
+        ).stdout
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as handle:
+            handle.write(source)
+        try:
+            baseline = record(load_analyzer(Path(handle.name), "ai_analyzer_baseline"))
+        finally:
+            os.unlink(handle.name)
+
+    print(f"tokenizer: {tokenizer}")
+    header = f"{'method':36s} {'tokens':>8s} {'json mode':>10s}"
+    if baseline:
+        header += f" {'baseline':>9s} {'saved':>7s}"
+    print(header)
+
+    total_current = total_baseline = 0
+    for method in CALLS:
+        tokens = prompt_tokens(current[method], count)
+        json_mode = bool(current[method] and current[method].get("response_format"))
+        total_current += tokens
+        line = f"{method:36s} {tokens:8d} {'yes' if json_mode else 'no':>10s}"
+        if baseline:
+            before = prompt_tokens(baseline[method], count)
+            total_baseline += before
+            line += f" {before:9d} {(before - tokens) / before if before else 0:7.0%}"
+        print(line)
+
+    line = f"{'total':36s} {total_current:8d} {'':>10s}"
+    if baseline:
+        line += f" {total_baseline:9d} {(total_baseline - total_current) / total_baseline:7.0%}"
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Compare resume prompt tokens and latency with and without section retrieval.
+
+Usage (from backend/):
+    python -m benchmarks.bench_section_retrieval
+    python -m benchmarks.bench_section_retrieval --resume cv.txt --job jd.txt --top-k 3
+
+Each retrieval-enabled AIAnalyzer method is called against a recording chat
+client twice: with the budget-trimmed resume (SECTION_RETRIEVAL=false) and
+with only the retrieved chunks. Embeddings go to the configured API
+(OPENAI_API_KEY / OPENAI_BASE_URL), so latency covers the chunk and
+requirement embedding calls: "cold" embeds a resume not seen before, "warm"
+reuses its per-document index and the embedding cache.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ["LLM_CACHE_METHODS"] = ""
+
+from ai_analyzer import AIAnalyzer
+from benchmarks.bench_prompt_tokens import RecordingCompletions, prompt_tokens, token_counter
+from embedding_service import EmbeddingService
+from section_retriever import SectionRetriever
+
+ROLES = [
+    ("Senior Backend Engineer, Acme Payments (2020-2024)", [
+        "Designed a Go and Kubernetes settlement service processing 2M transactions a day.",
+        "Cut p99 latency 40% by moving hot paths from PostgreSQL to Redis.",
+        "Wrote Terraform modules for AWS VPC, EKS and RDS used by 12 teams.",
+        "Mentored 4 engineers; ran the backend interview loop.",
+        "Introduced OpenTelemetry tracing and SLO dashboards in Grafana.",
+    ]),
+    ("Software Engineer, Shoply (2017-2020)", [
+        "Built Django REST APIs for the checkout and catalogue services.",
+        "Migrated nightly batch jobs to Kafka consumers, reducing data lag from hours to seconds.",
+        "Maintained the Jenkins CI pipeline and moved it to GitHub Actions.",
+        "Organised the company hackathon and internal tech talks.",
+    ]),
+    ("Junior Developer, Agency Co (2015-2017)", [
+        "Built WordPress and PHP marketing sites for retail clients.",
+        "Created email templates and landing pages with jQuery.",
+        "Provided on-site support for client content editors.",
+    ]),
+]
+
+JOB = """Senior Platform Engineer
+About us
+We are a fast-growing fintech with offices in three countries and a culture of ownership.
+Responsibilities
+- Own the Kubernetes platform our product teams deploy to
+- Build infrastructure as code with Terraform on AWS
+- Improve observability: tracing, metrics and alerting
+Requirements
+- 6+ years of backend experience with Go or Python
+- Production Kubernetes and AWS experience
+- CI/CD pipelines and release automation
+- Mentoring other engineers
+Benefits
+- Remote-first, 30 days holiday, learning budget
+"""
+
+
+def sample_resume(repeat: int) -> str:
+    """A long resume: summary, skills, repeated experience, education and interests."""
+    lines = ["Jane Doe", "jane@example.com | +1 555 0100", "Summary",
+             "Backend engineer with 9 years building payment and e-commerce systems.",
+             "Skills", "Go, Python, Django, PostgreSQL, Redis, Kafka, Kubernetes, Terraform, AWS, GitHub Actions",
+             "Experience"]
+    for i in range(repeat):
+        for title, bullets in ROLES:
+            lines.append(title if i == 0 else f"{title} - contract {i}")
+            lines.extend(f"- {bullet}" for bullet in bullets)
+    lines += ["Education", "BSc Computer Science, State University (2015)",
+              "Interests", "Climbing, chess, and contributing to open source documentation."]
+    return "\n".join(lines)
+
+
+CALLS = {
+    "analyze_match": lambda a, resume, job: a.analyze_match(resume, job, 0.62),
+    "recruiter_lens_analysis": lambda a, resume, job: a.recruiter_lens_analysis(resume, job),
+    "generate_mock_interview_questions": lambda a, resume, job: a.generate_mock_interview_questions(resume, job),
+}
+
+
+async def measure(analyzer: AIAnalyzer, method: str, resume: str, job: str):
+    """(prompt tokens, seconds until the chat request is sent) for one call."""
+    recorder = RecordingCompletions()
+    analyzer.client.chat.completions = recorder
+    start = time.perf_counter()
+    await CALLS[method](analyzer, resume, job)
+    return recorder.requests[0] if recorder.requests else None, time.perf_counter() - start
+
+
+async def run(args):
+    tokenizer, count = token_counter()
+    resume = open(args.resume).read() if args.resume else sample_resume(args.repeat)
+    job = open(args.job).read() if args.job else JOB
+
+    embedding_service = EmbeddingService()
+    plain = AIAnalyzer()
+    retrieving = AIAnalyzer(retriever=SectionRetriever(embedding_service, chunks_per_requirement=args.top_k))
+
+    print(f"tokenizer: {tokenizer}; resume: {count(resume)} tokens; top-k: {args.top_k}")
+    print(f"{'method':36s} {'budgeted':>9s} {'retrieved':>10s} {'saved':>7s} {'cold ms':>9s} {'warm ms':>9s}")
+    for i, method in enumerate(CALLS):
+        # A distinct resume per method so each "cold" call builds a fresh index
+        text = resume + "\n" * (i + 1)
+        before, _ = await measure(plain, method, text, job)
+        after, cold = await measure(retrieving, method, text, job)
+        _, warm = await measure(retrieving, method, text, job)
+        tokens_before, tokens_after = prompt_tokens(before, count), prompt_tokens(after, count)
+        saved = (tokens_before - tokens_after) / tokens_before if tokens_before else 0
+        print(f"{method:36s} {tokens_before:9d} {tokens_after:10d} {saved:7.0%} "
+              f"{cold * 1000:9.1f} {warm * 1000:9.1f}")
+        if args.show:
+            print(after["messages"][-1]["content"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resume", help="plain-text resume (default: generated long resume)")
+    parser.add_argument("--job", help="plain-text job description")
+    parser.add_argument("--repeat", type=int, default=3, help="experience blocks in the generated resume")
+    parser.add_argument("--top-k", type=int, default=2, help="chunks retrieved per requirement")
+    parser.add_argument("--show", action="store_true", help="print the retrieval prompts")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark normalize_text against the previous two-regex PDF cleaner.
+
+Usage (from backend/):
+    python -m benchmarks.bench_text_normalizer --pdf-dir ~/resumes
+    python -m benchmarks.bench_text_normalizer            # synthetic corpus
+
+Reports per-document time for both implementations and how many
+characters that matter in resumes (+ # / & ' and bullets) each keeps.
+"""
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from text_normalizer import normalize_text
+
+SIGNIFICANT = set("+#/&'•")
+
+
+def legacy_clean_text(text: str) -> str:
+    """The cleaner PDFParser used before text_normalizer existed."""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,;:()\-@]', '', text)
+    return text.strip()
+
+
+def load_pdfs(pdf_dir: str) -> list:
+    """Raw (unnormalised) text of every PDF in a directory."""
+    texts = []
+    for path in sorted(Path(pdf_dir).expanduser().glob("*.pdf")):
+        with fitz.open(path) as doc:
+            texts.append("".join(page.get_text() for page in doc))
+    return texts
+
+
+def synthetic_corpus(count: int) -> list:
+    """Resume-like text with the Unicode noise PDF exporters produce."""
+    rng = random.Random(0)
+    skills = ["Python", "C++", "C#", "CI/CD", "R&D", "Node.js", "Kubernetes", "AWS", "PostgreSQL"]
+    names = ["José García", "Łukasz Nowak", "Zoë O’Neil", "Anaïs Müller", "Søren Kierkegaard"]
+    texts = []
+    for _ in range(count):
+        lines = [rng.choice(names), "Senior Software Engineer — 2019–2024", ""]
+        for _ in range(rng.randint(20, 60)):
+            bullet = rng.choice(["•", "", "▪", "-"])
+            lines.append(
+                f"{bullet} Built {rng.choice(skills)} services for eﬃcient "
+                f"“pipelines”  handling {rng.randint(1, 99)}k req/s​"
+            )
+        texts.append("\r\n".join(lines))
+    return texts
+
+
+def time_per_doc(fn, texts, repeat: int) -> float:
+    """Mean microseconds per document."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="directory of resume PDFs")
+    parser.add_argument("--synthetic", type=int, default=200, help="synthetic documents when --pdf-dir is omitted")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    texts = load_pdfs(args.pdf_dir) if args.pdf_dir else synthetic_corpus(args.synthetic)
+    if not texts:
+        raise SystemExit("No documents found")
+
+    # Bypass the memoisation so every call does the full work
+    uncached = normalize_text.__wrapped__
+
+    legacy_us = time_per_doc(legacy_clean_text, texts, args.repeat)
+    new_us = time_per_doc(uncached, texts, args.repeat)
+
+    kept_legacy = sum(sum(c in SIGNIFICANT for c in legacy_clean_text(t)) for t in texts)
+    kept_new = sum(sum(c in SIGNIFICANT for c in uncached(t)) for t in texts)
+
+    avg_chars = sum(len(t) for t in texts) / len(texts)
+    print(f"documents={len(texts)} avg_chars={avg_chars:.0f}")
+    print(f"legacy two-regex cleaner : {legacy_us:8.1f} us/doc  significant chars kept={kept_legacy}")
+    print(f"normalize_text           : {new_us:8.1f} us/doc  significant chars kept={kept_new}")
+    print(f"speedup                  : {legacy_us / new_us:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare VectorStore index modes on QPS, latency, recall and memory.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_index --n 100000 --queries 500
+    python -m benchmarks.bench_vector_index --vectors embeddings.npy
+
+Without --vectors a clustered synthetic corpus is generated, which is a
+reasonable stand-in for resume embeddings (they cluster by role).
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from vector_store import INDEX_TYPES, VectorStore, recall_at_k
+
+
+def make_corpus(n: int, dimension: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Gaussian blobs around random centroids, L2-normalised."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centroids[labels] + 0.6 * rng.standard_normal((n, dimension)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def build_store(index_type: str, corpus: np.ndarray, args) -> VectorStore:
+    """Create, train and fill a store of the given type."""
+    store = VectorStore(
+        dimension=corpus.shape[1],
+        index_type=index_type,
+        nlist=args.nlist,
+        pq_m=args.pq_m,
+        nprobe=args.nprobe,
+        ef_search=args.ef_search
+    )
+    if not store.is_trained:
+        sample_size = min(len(corpus), max(args.nlist * 40, 10000))
+        store.train(corpus[np.random.default_rng(1).choice(len(corpus), sample_size, replace=False)])
+    # Bypass the metadata store: only the FAISS side is being measured
+    store.index.add_with_ids(corpus, np.arange(len(corpus), dtype=np.int64))
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", help=".npy file of float32 embeddings to index")
+    parser.add_argument("--n", type=int, default=50000, help="synthetic corpus size")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--modes", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    args = parser.parse_args()
+
+    if args.vectors:
+        corpus = np.ascontiguousarray(np.load(args.vectors), dtype=np.float32)
+        faiss.normalize_L2(corpus)
+    else:
+        corpus = make_corpus(args.n, args.dimension, clusters=max(8, args.n // 500))
+
+    queries = corpus[np.random.default_rng(2).choice(len(corpus), args.queries, replace=False)].copy()
+    queries += 0.05 * np.random.default_rng(3).standard_normal(queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    print(f"corpus={corpus.shape[0]} dim={corpus.shape[1]} queries={len(queries)} k={args.k}")
+    print(f"{'mode':<10}{'build s':>9}{'QPS':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'recall@k':>10}{'B/vector':>10}")
+
+    exact_ids = None
+    for mode in ["flat"] + [m for m in args.modes if m != "flat"]:
+        start = time.perf_counter()
+        store = build_store(mode, corpus, args)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ids = store.search_ids(queries, args.k)
+        qps = len(queries) / (time.perf_counter() - start)
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            store.search_ids(query[None, :], args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+
+        if exact_ids is None:
+            exact_ids = ids
+        recall = recall_at_k(ids, exact_ids, args.k)
+        bytes_per_vector = faiss.serialize_index(store.index).nbytes / max(1, store.index.ntotal)
+
+        if mode in args.modes:
+            print(f"{mode:<10}{build_seconds:>9.1f}{qps:>10.0f}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}"
+                  f"{recall:>10.3f}{bytes_per_vector:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+from openai import AsyncOpenAI
+
+from rate_limiter import RateLimiter
+
+try:
+    import onnxruntime
+    from tokenizers import Tokenizer
+except ImportError:  # optional: only the local backend needs them
+    onnxruntime = None
+    Tokenizer = None
+
+# Per-request limits for the embeddings endpoint (kept below the API maximums)
+MAX_BATCH_INPUTS = 2048
+MAX_BATCH_TOKENS = 250000
+
+# Vector sizes of the OpenAI embedding models
+OPENAI_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+BACKENDS = ("openai", "local")
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+class EmbeddingBackend(ABC):
+    """
+    Turns texts into vectors for EmbeddingService.
+
+    EmbeddingService handles caching and de-duplication; a backend only
+    embeds the texts it is given. model names the vectors in the cache, so
+    backends producing different vectors must use different names.
+    """
+
+    model: str
+    dimension: int
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts.
+
+        Args:
+            texts: Input texts, none of them cached
+
+        Returns:
+            Embedding vectors in the same order as texts
+        """
+
+    def stats(self) -> Dict:
+        """Backend name, model and vector size."""
+        return {"backend": type(self).__name__, "model": self.model, "dimension": self.dimension}
+
+
+class OpenAIEmbeddings(EmbeddingBackend):
+    """Embeddings from the OpenAI API, sent in as few requests as possible."""
+
+    def __init__(self, model: str = "text-embedding-3-small", limiter: Optional[RateLimiter] = None,
+                 http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            model: OpenAI embedding model, one of OPENAI_DIMENSIONS
+            limiter: Shared OpenAI rate limiter (built from env when None)
+            http_client: Shared connection pool for the OpenAI client
+        """
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        if model not in OPENAI_DIMENSIONS:
+            raise ValueError(f"Unknown embedding model '{model}', expected one of {tuple(OPENAI_DIMENSIONS)}")
+        # Retries are left to the rate limiter, which needs to see every 429;
+        # http_client shares one connection pool with the other services
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0, http_client=http_client)
+        self.model = model
+        self.dimension = OPENAI_DIMENSIONS[model]
+        self.limiter = limiter if limiter is not None else RateLimiter.from_env()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches bounded by MAX_BATCH_INPUTS and MAX_BATCH_TOKENS."""
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for batch in self._make_batches(list(enumerate(texts))):
+            inputs = [text for _, text in batch]
+            response = await self.limiter.call(
+                self.model,
+                sum(_estimate_tokens(text) for text in inputs),
+                lambda: self.client.embeddings.create(model=self.model, input=inputs)
+            )
+            for item in response.data:
+                vectors[batch[item.index][0]] = item.embedding
+        return vectors
+
+    @staticmethod
+    def _make_batches(items: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+        """Split (position, text) pairs into request-sized batches."""
+        batches = []
+        current: List[Tuple[int, str]] = []
+        current_tokens = 0
+
+        for item in items:
+            tokens = _estimate_tokens(item[1])
+            if current and (len(current) >= MAX_BATCH_INPUTS or current_tokens + tokens > MAX_BATCH_TOKENS):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+
+class LocalEmbeddings(EmbeddingBackend):
+    """
+    A sentence-transformer exported to ONNX, run on the CPU.
+
+    model_dir holds the ONNX model (full precision or quantized) and the
+    tokenizer.json of the same model, e.g. the onnx/ export of
+    all-MiniLM-L6-v2. Texts are sorted by length before batching so little
+    of each batch is padding, ONNX Runtime spreads every batch over
+    `threads` cores, and inference runs on its own thread so the event loop
+    keeps serving requests. No network round trip and no rate limit.
+    """
+
+    def __init__(self, model_dir: str, model_file: str = "model.onnx", batch_size: int = 32,
+                 max_length: int = 256, threads: int = 0):
+        """
+        Load the model and tokenizer.
+
+        Args:
+            model_dir: Directory with the ONNX model and tokenizer.json
+            model_file: Model file inside model_dir (e.g. a quantized variant)
+            batch_size: Texts per inference call
+            max_length: Tokens kept per text; longer texts are truncated
+            threads: ONNX Runtime intra-op threads (0 uses every core)
+        """
+        if onnxruntime is None:
+            raise ValueError("Local embeddings need onnxruntime and tokenizers (pip install onnxruntime tokenizers)")
+        self.model = f"local:{os.path.basename(os.path.normpath(model_dir))}/{model_file}"
+        self.batch_size = max(1, batch_size)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        if self.tokenizer.padding is None:
+            self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        outputs = {output.name: output for output in self.session.get_outputs()}
+        # Exports that include the pooling layer return the sentence vector directly;
+        # otherwise the token embeddings are mean-pooled here
+        output = outputs.get("sentence_embedding") or self.session.get_outputs()[0]
+        self.output_name = output.name
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embeddings")
+        self.texts = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+        dimension = output.shape[-1] if output.shape else None
+        self.dimension = dimension if isinstance(dimension, int) else self._run_batch(["dimension"]).shape[1]
+
+    @classmethod
+    def from_env(cls) -> "LocalEmbeddings":
+        """Build a backend configured from LOCAL_EMBEDDING_* environment variables."""
+        model_dir = os.getenv("LOCAL_EMBEDDING_MODEL_DIR")
+        if not model_dir:
+            raise ValueError("LOCAL_EMBEDDING_MODEL_DIR not found in environment variables")
+        return cls(
+            model_dir,
+            model_file=os.getenv("LOCAL_EMBEDDING_MODEL_FILE", "model.onnx"),
+            batch_size=int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32")),
+            max_length=int(os.getenv("LOCAL_EMBEDDING_MAX_LENGTH", "256")),
+            threads=int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))
+        )
+
+    def _run_batch(self, texts: List[str]) -> np.ndarray:
+        """Sentence vectors for one batch, shape (len(texts), dimension)."""
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        output = self.session.run([self.output_name], feeds)[0]
+        if output.ndim == 3:
+            mask = attention_mask[..., None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return output
+
+    def _embed_sync(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in length-sorted batches and L2-normalise them."""
+        start = time.perf_counter()
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for i in range(0, len(texts), self.batch_size):
+            positions = order[i:i + self.batch_size]
+            vectors[positions] = self._run_batch([texts[p] for p in positions])
+            self.batches += 1
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        self.texts += len(texts)
+        self.seconds += time.perf_counter() - start
+        return vectors.tolist()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts on the inference thread."""
+        if not texts:
+            return []
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._embed_sync, texts)
+
+    def stats(self) -> Dict:
+        """Model details plus texts embedded and inference throughput."""
+        return {
+            **super().stats(),
+            "texts": self.texts,
+            "batches": self.batches,
+            "texts_per_second": round(self.texts / self.seconds, 1) if self.seconds else 0.0
+        }
+
+
+def backend_from_env(limiter: Optional[RateLimiter] = None,
+                     http_client: Optional[httpx.AsyncClient] = None) -> EmbeddingBackend:
+    """
+    Build the backend named by EMBEDDING_BACKEND ("openai" or "local").
+
+    Args:
+        limiter: Shared OpenAI rate limiter, used by the openai backend
+        http_client: Shared connection pool, used by the openai backend
+
+    Returns:
+        The configured backend
+    """
+    name = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+    if name == "local":
+        return LocalEmbeddings.from_env()
+    if name == "openai":
+        return OpenAIEmbeddings(
+            model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+            limiter=limiter,
+            http_client=http_client
+        )
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}', expected one of {BACKENDS}")
@@ -0,0 +1,206 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Keys per IN (...) query, below SQLite's bound-parameter limit
+SQL_BATCH = 500
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + SQLite) cache for embedding vectors."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_memory_entries: int = 2048,
+        max_disk_entries: int = 100000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: SQLite file for the on-disk tier (None disables it)
+            max_memory_entries: Maximum vectors held in the in-memory LRU
+            max_disk_entries: Maximum vectors kept on disk before evicting
+        """
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        self._disk_count = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        """Build a cache configured from EMBEDDING_CACHE_* environment variables."""
+        return cls(
+            db_path=os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3") or None,
+            max_memory_entries=int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "2048")),
+            max_disk_entries=int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", "100000"))
+        )
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Content-address a (model, text) pair, ignoring whitespace differences."""
+        normalized = re.sub(r'\s+', ' ', text).strip()
+        return hashlib.sha256(f"{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """
+        Look up a vector by key, promoting disk hits into memory.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Embedding vector, or None on a miss
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up many vectors at once; disk hits are read and marked used in one transaction.
+
+        Blocking (SQLite): call from a thread in async code.
+
+        Args:
+            keys: Cache keys from make_key
+
+        Returns:
+            {key: embedding vector} for the keys found
+        """
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            missing = []
+            for key in unique:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector.tolist()
+                else:
+                    missing.append(key)
+
+            if self._db is not None and missing:
+                rows = []
+                for i in range(0, len(missing), SQL_BATCH):
+                    batch = missing[i:i + SQL_BATCH]
+                    rows += self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                    ).fetchall()
+                if rows:
+                    now = time.time()
+                    self._db.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                    )
+                    self._db.commit()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    found[key] = vector.tolist()
+                self.disk_hits += len(rows)
+
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put(self, key: str, vector: List[float]):
+        """
+        Store a vector in both tiers, evicting the least recently used entries.
+
+        Args:
+            key: Cache key from make_key
+            vector: Embedding vector
+        """
+        self.put_many({key: vector})
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """
+        Store many vectors in both tiers with one disk transaction.
+
+        Blocking (SQLite): call from a thread in async code.
+
+        Args:
+            vectors: {cache key: embedding vector}
+        """
+        if not vectors:
+            return
+        arrays = {key: np.asarray(vector, dtype=np.float32) for key, vector in vectors.items()}
+        with self._lock:
+            for key, vector_np in arrays.items():
+                self._remember(key, vector_np)
+
+            if self._db is not None:
+                keys = list(arrays)
+                existing = 0
+                for i in range(0, len(keys), SQL_BATCH):
+                    batch = keys[i:i + SQL_BATCH]
+                    existing += self._db.execute(
+                        f"SELECT COUNT(*) FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                    ).fetchone()[0]
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    [(key, vector_np.tobytes(), now) for key, vector_np in arrays.items()]
+                )
+                self._disk_count += len(keys) - existing
+                overflow = self._disk_count - self.max_disk_entries
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._disk_count -= overflow
+                    self.evictions += overflow
+                self._db.commit()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the memory tier; caller must hold the lock."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and tier sizes."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_count,
+            "evictions": self.evictions
+        }
+
+    def clear(self):
+        """Drop every cached vector from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+                self._disk_count = 0
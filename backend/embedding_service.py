@@ -1,41 +1,88 @@
-import os
-from openai import OpenAI
-from typing import List
+import asyncio
+import httpx
+from typing import Dict, List, Optional
 import numpy as np
 from dotenv import load_dotenv
 
+from embedding_backends import EmbeddingBackend, backend_from_env
+from embedding_cache import EmbeddingCache
+from rate_limiter import RateLimiter
+from singleflight import SingleFlight
+
 load_dotenv()
 
 
 class EmbeddingService:
-    """Generate embeddings using OpenAI API."""
-    
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-        self.client = OpenAI(api_key=api_key)
-        self.model = "text-embedding-3-small"
+    """Generate embeddings through the configured backend (OpenAI API or a local model)."""
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def __init__(self, cache: Optional[EmbeddingCache] = None, limiter: Optional[RateLimiter] = None,
+                 http_client: Optional[httpx.AsyncClient] = None, backend: Optional[EmbeddingBackend] = None):
+        # limiter and http_client are only used by the OpenAI backend
+        self.backend = backend if backend is not None else backend_from_env(limiter, http_client)
+        self.model = self.backend.model
+        self.dimension = self.backend.dimension
+        self.cache = cache if cache is not None else EmbeddingCache.from_env()
+        self.inflight = SingleFlight()
+
+    async def generate_embedding(self, text: str) -> List[float]:
         """
-        Generate embedding vector for given text.
-        
+        Generate embedding vector for given text, served from cache when possible.
+
         Args:
             text: Input text to embed
-            
+
         Returns:
             Embedding vector as list of floats
         """
+        return (await self.generate_embeddings([text]))[0]
+
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed many texts with as few API round trips as possible.
+
+        Cache hits are served locally and texts another request is already
+        embedding are awaited rather than re-sent; the remaining unique texts
+        are handed to the backend in one call.
+
+        Args:
+            texts: Input texts to embed
+
+        Returns:
+            Embedding vectors in the same order as texts
+        """
+        keys = [EmbeddingCache.make_key(self.model, text) for text in texts]
+        results: Dict[str, List[float]] = {}
+        pending: Dict[str, str] = {}
+
+        # The cache's disk tier is SQLite; look up and store whole batches off the event loop
+        results.update(await asyncio.to_thread(self.cache.get_many, keys))
+        for key, text in zip(keys, texts):
+            if key not in results:
+                pending[key] = text
+
+        owned, waiting = self.inflight.claim(pending)
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return response.data[0].embedding
+            vectors = await self.backend.embed([pending[key] for key in owned])
+            fetched = dict(zip(owned, vectors))
+            await asyncio.to_thread(self.cache.put_many, fetched)
+            for key, vector in fetched.items():
+                results[key] = vector
+                self.inflight.settle(key, result=vector)
         except Exception as e:
-            raise Exception(f"Failed to generate embedding: {str(e)}")
-    
+            error = Exception(f"Failed to generate embedding: {str(e)}")
+            for key in owned:
+                self.inflight.settle(key, error=error)
+            raise error
+        finally:
+            # Cancelled mid-request: release our keys so waiters don't hang
+            for key in owned:
+                self.inflight.settle(key, error=Exception("Failed to generate embedding: request cancelled"))
+
+        for key, future in waiting.items():
+            results[key] = await asyncio.shield(future)
+
+        return [results[key] for key in keys]
+
     def calculate_cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """
         Calculate cosine similarity between two vectors.
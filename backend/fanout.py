@@ -0,0 +1,42 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+# Most upstream calls a single request may fan out (e.g. /api/rank analyses)
+MAX_FAN_OUT = 20
+
+
+async def fan_out(calls: Dict[str, Callable[[], Awaitable[Any]]],
+                  max_concurrency: int = 4) -> AsyncIterator[Tuple[str, Any, Optional[Exception], float]]:
+    """
+    Run independent calls concurrently and yield each as it finishes.
+
+    At most max_concurrency calls run at once, so one report can't take
+    every upstream connection. A failing call is reported rather than
+    raised, leaving the others to finish. If the consumer stops early
+    (client disconnect), calls still running are cancelled.
+
+    Args:
+        calls: {name: zero-argument coroutine function}
+        max_concurrency: Calls allowed in flight together
+
+    Yields:
+        (name, result, exception or None, seconds the call took)
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(name: str, fn: Callable[[], Awaitable[Any]]):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                return name, await fn(), None, time.perf_counter() - start
+            except Exception as e:
+                return name, None, e, time.perf_counter() - start
+
+    tasks = [asyncio.ensure_future(run(name, fn)) for name, fn in calls.items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,189 @@
+import asyncio
+import os
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+# Seconds an AIAnalyzer method may take before its fallback is returned.
+# analyze_match sits on the /api/analyze SLA; the rest use the default.
+DEFAULT_DEADLINES = {
+    "analyze_match": 25.0,
+}
+
+# Latencies needed before the hedge delay follows the method's p95;
+# until then a hedge is sent at half the deadline
+MIN_SAMPLES = 20
+
+
+class DeadlineExceeded(Exception):
+    """An LLM call ran past its method's deadline."""
+
+
+class MethodLatency:
+    """Recent latencies and hedge counters for one method."""
+
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_misses = 0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q-th quantile (0-1) of the recent latencies, None without samples."""
+        return float(np.quantile(self.samples, q)) if self.samples else None
+
+
+class LatencyPolicy:
+    """
+    Per-method deadlines and hedged requests for LLM calls.
+
+    A call still running after its method's p95 latency gets a duplicate
+    request, and the first answer wins; the slower one is cancelled. Only
+    a few percent of calls cross their p95, and hedges are further capped
+    at max_hedge_ratio of calls, so the extra load stays small even when
+    the upstream is slow across the board. Callers enforce the deadline
+    and fall back when it passes.
+
+    Latencies are upstream time only (reported by RateLimiter.call), and
+    the hedge timer starts once the first attempt has been sent: a call
+    waiting in the rate limiter is not slow upstream, and hedging it would
+    only queue a second copy behind it.
+    """
+
+    def __init__(self, deadlines: Optional[Dict[str, float]] = None, default_deadline: float = 30.0,
+                 hedging: bool = True, hedge_quantile: float = 0.95, min_hedge_delay: float = 1.0,
+                 max_hedge_ratio: float = 0.1, window: int = 500):
+        """
+        Initialize the policy.
+
+        Args:
+            deadlines: {method: seconds}; defaults to DEFAULT_DEADLINES
+            default_deadline: Deadline for methods not in deadlines
+            hedging: Send hedged requests at all
+            hedge_quantile: Latency quantile after which a hedge is sent
+            min_hedge_delay: Shortest wait before hedging
+            max_hedge_ratio: Largest share of a method's calls that may be hedged
+            window: Latencies kept per method
+        """
+        self.deadlines = dict(deadlines if deadlines is not None else DEFAULT_DEADLINES)
+        self.default_deadline = default_deadline
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.window = window
+        self._methods: Dict[str, MethodLatency] = {}
+
+    @classmethod
+    def from_env(cls) -> "LatencyPolicy":
+        """
+        Build a policy configured from LLM_* environment variables.
+
+        LLM_DEADLINES takes per-method seconds, e.g.
+        "analyze_match=20,recruiter_lens_analysis=10".
+        """
+        deadlines = dict(DEFAULT_DEADLINES)
+        for item in os.getenv("LLM_DEADLINES", "").split(","):
+            if "=" in item:
+                method, value = item.split("=", 1)
+                deadlines[method.strip()] = float(value)
+        return cls(
+            deadlines=deadlines,
+            default_deadline=float(os.getenv("LLM_DEADLINE_SECONDS", "30")),
+            hedging=os.getenv("LLM_HEDGING", "true").lower() == "true",
+            hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", "0.95")),
+            min_hedge_delay=float(os.getenv("LLM_MIN_HEDGE_DELAY_SECONDS", "1")),
+            max_hedge_ratio=float(os.getenv("LLM_MAX_HEDGE_RATIO", "0.1"))
+        )
+
+    def _method(self, method: str) -> MethodLatency:
+        state = self._methods.get(method)
+        if state is None:
+            state = self._methods[method] = MethodLatency(self.window)
+        return state
+
+    def deadline(self, method: str) -> float:
+        """Seconds a method's LLM call may take."""
+        return self.deadlines.get(method, self.default_deadline)
+
+    def hedge_delay(self, method: str) -> Optional[float]:
+        """Seconds to wait before hedging a call, or None if it shouldn't be hedged."""
+        state = self._method(method)
+        if not self.hedging or state.hedges >= self.max_hedge_ratio * state.calls:
+            return None
+        deadline = self.deadline(method)
+        if len(state.samples) >= MIN_SAMPLES:
+            delay = state.quantile(self.hedge_quantile)
+        else:
+            delay = deadline / 2
+        delay = max(self.min_hedge_delay, delay)
+        return delay if delay < deadline else None
+
+    def missed(self, method: str):
+        """Count a call that ran past its deadline, sampling it at the deadline."""
+        state = self._method(method)
+        state.deadline_misses += 1
+        state.samples.append(self.deadline(method))
+
+    async def run(self, method: str,
+                  fn: Callable[[Callable[[], None], Callable[[float], None]], Awaitable[Any]]) -> Any:
+        """
+        Run fn, sending a hedged duplicate if it is slower than usual.
+
+        Args:
+            method: AIAnalyzer method the call is for
+            fn: Coroutine function sending the request; it is given
+                (on_sent, on_latency) to pass to RateLimiter.call
+
+        Returns:
+            Result of whichever attempt succeeds first; if every attempt
+            fails, the first error is raised
+        """
+        state = self._method(method)
+        state.calls += 1
+        sent = asyncio.Event()
+
+        tasks = [asyncio.ensure_future(fn(sent.set, state.samples.append))]
+        try:
+            delay = self.hedge_delay(method)
+            if delay is not None:
+                waiting = asyncio.ensure_future(sent.wait())
+                await asyncio.wait([tasks[0], waiting], return_when=asyncio.FIRST_COMPLETED)
+                waiting.cancel()
+                if not tasks[0].done():
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        state.hedges += 1
+                        tasks.append(asyncio.ensure_future(fn(lambda: None, state.samples.append)))
+
+            pending, errors = set(tasks), []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            state.hedge_wins += 1
+                        return task.result()
+                    errors.append(task.exception())
+            raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        """Per-method latency quantiles, hedge counts and deadline misses."""
+        stats = {}
+        for method, state in self._methods.items():
+            stats[method] = {
+                "calls": state.calls,
+                "hedged": state.hedges,
+                "hedge_wins": state.hedge_wins,
+                "deadline_misses": state.deadline_misses,
+                "deadline_seconds": self.deadline(method)
+            }
+            for name, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+                value = state.quantile(q)
+                stats[method][name] = round(value * 1000, 1) if value is not None else None
+        return stats
@@ -0,0 +1,150 @@
+import os
+import time
+from typing import Dict
+
+import httpx
+
+try:
+    import h2  # noqa: F401 - HTTP/2 support for httpx
+except ImportError:
+    h2 = None
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """
+    httpx transport that counts connections and time spent getting one.
+
+    httpcore reports connection events through the request's "trace"
+    extension: a new TCP connection or TLS handshake means the pool had no
+    reusable connection, and the time until the request headers go out is
+    the wait for a pooled connection (plus the handshake when one is opened).
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connects = 0
+        self.tls_handshakes = 0
+        self.errors = 0
+        self.acquire_seconds = 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        acquired = False
+        upstream_trace = request.extensions.get("trace")
+
+        async def trace(event: str, info: Dict):
+            nonlocal acquired
+            if event == "connection.connect_tcp.complete":
+                self.connects += 1
+            elif event == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+            elif event.endswith(".send_request_headers.started") and not acquired:
+                acquired = True
+                self.acquire_seconds += time.monotonic() - start
+            if upstream_trace is not None:
+                await upstream_trace(event, info)
+
+        request.extensions["trace"] = trace
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+
+class HTTPPool:
+    """
+    One HTTP connection pool shared by every OpenAI client in the process.
+
+    Passing the same httpx.AsyncClient to EmbeddingService and AIAnalyzer
+    keeps warm connections in one place, sized for the rate limiter's
+    concurrency, and keeps idle connections open long enough to be reused
+    between bursts instead of re-handshaking.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 64, keepalive_seconds: float = 60.0,
+                 http2: bool = True, connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 write_timeout: float = 10.0, pool_timeout: float = 10.0):
+        """
+        Initialize the pool.
+
+        Args:
+            max_connections: Open connections allowed (HTTP/2 multiplexes
+                requests over each)
+            max_keepalive: Idle connections kept for reuse
+            keepalive_seconds: Idle time before a kept connection is closed
+            http2: Negotiate HTTP/2 when the h2 package is installed
+            connect_timeout: Seconds to open a connection
+            read_timeout: Seconds between bytes of a response
+            write_timeout: Seconds to send a request
+            pool_timeout: Seconds to wait for a free connection
+        """
+        if http2 and h2 is None:
+            print("h2 not installed, using HTTP/1.1 (pip install h2 for HTTP/2)")
+            http2 = False
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.transport = InstrumentedTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_seconds
+            )
+        )
+        self.client = httpx.AsyncClient(
+            transport=self.transport,
+            timeout=httpx.Timeout(
+                connect=connect_timeout, read=read_timeout, write=write_timeout, pool=pool_timeout
+            )
+        )
+
+    @classmethod
+    def from_env(cls) -> "HTTPPool":
+        """Build a pool configured from HTTP_* environment variables."""
+        return cls(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "64")),
+            keepalive_seconds=float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60")),
+            http2=os.getenv("HTTP2", "true").lower() == "true",
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5")),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "60")),
+            write_timeout=float(os.getenv("HTTP_WRITE_TIMEOUT_SECONDS", "10")),
+            pool_timeout=float(os.getenv("HTTP_POOL_TIMEOUT_SECONDS", "10"))
+        )
+
+    async def aclose(self):
+        """Close every pooled connection."""
+        await self.client.aclose()
+
+    def stats(self) -> Dict:
+        """Pool occupancy and connection reuse counters."""
+        connections = self.transport._pool.connections
+        idle = sum(1 for connection in connections if connection.is_idle())
+        transport = self.transport
+        return {
+            "http2": self.http2,
+            "connections": len(connections),
+            "active_connections": len(connections) - idle,
+            "idle_connections": idle,
+            "max_connections": self.max_connections,
+            "utilization": round((len(connections) - idle) / self.max_connections, 4),
+            "requests": transport.requests,
+            "in_flight": transport.in_flight,
+            "peak_in_flight": transport.peak_in_flight,
+            "connects": transport.connects,
+            "tls_handshakes": transport.tls_handshakes,
+            "reuse_rate": round(1 - transport.connects / transport.requests, 4) if transport.requests else 0.0,
+            "errors": transport.errors,
+            "avg_acquire_ms": (
+                round(1000 * transport.acquire_seconds / transport.requests, 2) if transport.requests else 0.0
+            )
+        }
@@ -0,0 +1,310 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+# Characters that can change the scanner's state; everything else is skipped
+# by the regex engine rather than inspected one by one in Python
+_STRUCTURAL = re.compile(r'[\[\]{}",\\]')
+
+_OPENERS = {"object": "{", "array": "[", "any": "{["}
+_FIRST_OPENER = {expect: re.compile("[" + re.escape(chars) + "]") for expect, chars in _OPENERS.items()}
+_DECODER = json.JSONDecoder()
+_CLOSERS = {"{": "}", "[": "]"}
+
+_INVALID = object()
+
+
+class JSONExtractor:
+    """
+    Locate the first top-level JSON object or array in LLM output and decode it.
+
+    Works on streamed chunks or a whole string. Text before the opening
+    bracket (code fences, prose) and after the closing one is ignored, and
+    each character is examined once, so work is linear in the output size.
+    Top-level members are split out as they complete, which lets callers
+    stream fields and lets result() salvage every complete member of a
+    truncated or partly malformed reply.
+    """
+
+    def __init__(self, expect: str = "any"):
+        """
+        Initialize the extractor.
+
+        Args:
+            expect: "object", "array" or "any" - which bracket starts the value
+        """
+        self._openers = _OPENERS[expect]
+        self._kind: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member: List[str] = []
+        self._raw: List[str] = []
+        self.done = False
+        # Offset just past the closing bracket, for single-chunk scans
+        self.end = 0
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consume the next piece of output.
+
+        Args:
+            chunk: Newly streamed text
+
+        Returns:
+            Members completed by this chunk: (key, value) pairs for an
+            object, values for an array. Malformed members are skipped.
+        """
+        decoded = (self._decode(raw) for raw in self._scan(chunk))
+        return [member for member in decoded if member is not _INVALID]
+
+    def result(self) -> Any:
+        """
+        Decode everything seen so far.
+
+        Returns:
+            The dict or list; for output that never closed (truncated) or
+            that json rejects as a whole, the members that do decode
+
+        Raises:
+            ValueError: If no JSON value was found
+        """
+        if self._kind is None:
+            raise ValueError("No JSON found in response")
+
+        if self.done:
+            try:
+                return json.loads(self._kind + ",".join(self._raw) + _CLOSERS[self._kind])
+            except json.JSONDecodeError:
+                pass
+
+        members = [m for m in map(self._decode, self._raw) if m is not _INVALID]
+        if not members and not self.done:
+            raise ValueError("Incomplete JSON in response")
+        return dict(members) if self._kind == "{" else members
+
+    def _scan(self, chunk: str) -> List[str]:
+        """Advance the state machine over chunk and return completed raw members."""
+        if self.done or not chunk:
+            return []
+
+        completed = []
+        member_start = 0
+        # Position of a character escaped by a backslash, which must be ignored
+        skip = 1 if self._escape else 0
+        self._escape = False
+
+        for match in _STRUCTURAL.finditer(chunk):
+            pos = match.start()
+            if pos < skip:
+                continue
+            char = match.group()
+
+            if self._kind is None:
+                if char in self._openers:
+                    self._kind = char
+                    self._depth = 1
+                    member_start = pos + 1
+                continue
+
+            if self._in_string:
+                if char == "\\":
+                    skip = pos + 2
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{" or char == "[":
+                self._depth += 1
+            elif char == "}" or char == "]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append(self._take(chunk[member_start:pos]))
+                    self.done = True
+                    self.end = pos + 1
+                    break
+            elif char == "," and self._depth == 1:
+                completed.append(self._take(chunk[member_start:pos]))
+                member_start = pos + 1
+
+        if self._kind is not None and not self.done:
+            self._member.append(chunk[member_start:])
+            self._escape = skip > len(chunk)
+
+        # An empty trailing member ("[1, 2,]" or "{}") is not a member
+        completed = [raw for raw in completed if raw.strip()]
+        self._raw.extend(completed)
+        return completed
+
+    def _take(self, tail: str) -> str:
+        """Join the buffered start of the current member with its tail."""
+        if self._member:
+            self._member.append(tail)
+            tail = "".join(self._member)
+            self._member = []
+        return tail
+
+    def _decode(self, raw: str) -> Any:
+        """Decode one raw member, or return _INVALID."""
+        try:
+            if self._kind == "{":
+                items = list(json.loads("{" + raw + "}").items())
+                return items[0] if len(items) == 1 else _INVALID
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return _INVALID
+
+
+def extract_json(content: str, expect: str = "any") -> Any:
+    """
+    Extract the first top-level JSON object or array from LLM output.
+
+    Args:
+        content: Raw model output
+        expect: "object", "array" or "any"
+
+    Returns:
+        Parsed dict or list
+
+    Raises:
+        ValueError: If no usable JSON is found
+    """
+    # Fast path: well-formed JSON, with anything after it ignored
+    opener = _FIRST_OPENER[expect].search(content)
+    if opener is None:
+        raise ValueError("No JSON found in response")
+    try:
+        return _DECODER.raw_decode(content, opener.start())[0]
+    except json.JSONDecodeError:
+        pass
+
+    while True:
+        extractor = JSONExtractor(expect)
+        extractor._scan(content[opener.start():])
+        result = extractor.result()
+        # A bracketed aside in prose ("scores use the {0-100} scale") decodes
+        # to nothing; look for the real value after it
+        if result or not extractor._raw or not extractor.done:
+            return result
+        content = content[opener.start() + extractor.end:]
+        opener = _FIRST_OPENER[expect].search(content)
+        if opener is None:
+            raise ValueError("No JSON found in response")
+
+
+@lru_cache(maxsize=None)
+def field_adapters(model: Type[BaseModel]) -> Dict[str, TypeAdapter]:
+    """Per-field validators for a pydantic model."""
+    return {name: TypeAdapter(field.annotation) for name, field in model.model_fields.items()}
+
+
+_JSON_TYPES = {"string": "string", "integer": "int", "number": "number", "boolean": "bool", "null": "null"}
+
+
+@lru_cache(maxsize=None)
+def schema_outline(model: Type[BaseModel], exclude: Tuple[str, ...] = ()) -> str:
+    """
+    Compact outline of a model's JSON schema for use in prompts.
+
+    Much shorter than the JSON schema itself or a filled-in example: one line
+    per top-level field, nested objects inline, field descriptions as hints.
+
+    Args:
+        model: Pydantic model describing the reply
+        exclude: Fields the server fills in; left out of the outline
+
+    Returns:
+        Outline text, e.g. '{\n  "score": int  // 0-100\n}'
+    """
+    schema = model.model_json_schema()
+    defs = schema.get("$defs", {})
+    fields = [(name, prop) for name, prop in schema["properties"].items() if name not in exclude]
+
+    lines = []
+    for i, (name, prop) in enumerate(fields):
+        line = f'  "{name}": {_outline_type(prop, defs)}' + ("," if i < len(fields) - 1 else "")
+        if prop.get("description"):
+            line += f"  // {prop['description']}"
+        lines.append(line)
+    return "{\n" + "\n".join(lines) + "\n}"
+
+
+def _outline_type(prop: Dict, defs: Dict) -> str:
+    """Render one JSON schema node for schema_outline."""
+    if "$ref" in prop:
+        prop = defs[prop["$ref"].rsplit("/", 1)[-1]]
+    if "allOf" in prop and len(prop["allOf"]) == 1:
+        return _outline_type(prop["allOf"][0], defs)
+    if "anyOf" in prop:
+        return " | ".join(_outline_type(option, defs) for option in prop["anyOf"])
+
+    kind = prop.get("type")
+    if kind == "array":
+        return f"[{_outline_type(prop.get('items', {}), defs)}]"
+    if kind == "object" or "properties" in prop:
+        if "properties" in prop:
+            members = []
+            for name, member in prop["properties"].items():
+                rendered = f'"{name}": {_outline_type(member, defs)}'
+                if member.get("description"):
+                    rendered += f" ({member['description']})"
+                members.append(rendered)
+            return "{" + ", ".join(members) + "}"
+        values = prop.get("additionalProperties")
+        if isinstance(values, dict):
+            return "{<key>: " + _outline_type(values, defs) + "}"
+        return "object"
+    return _JSON_TYPES.get(kind, "any")
+
+
+def validate_fields(data: Any, model: Type[BaseModel], defaults: Optional[Dict] = None,
+                    exclude: Iterable[str] = ()) -> Dict:
+    """
+    Validate an LLM reply field by field against a response model.
+
+    Valid fields are coerced to the model's types (e.g. "85" -> 85); fields
+    that fail validation fall back to defaults or are dropped, so one bad
+    field doesn't cost the whole reply. Keys the model doesn't declare are
+    passed through untouched.
+
+    Args:
+        data: Parsed reply
+        model: Pydantic model describing the reply
+        defaults: Values for missing or invalid fields
+        exclude: Fields the server fills in; dropped from the reply
+
+    Returns:
+        JSON-compatible dict
+
+    Raises:
+        ValueError: If data is not an object or none of the model's fields validate
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object in response")
+
+    adapters = field_adapters(model)
+    excluded = set(exclude)
+    result = dict(defaults or {})
+    valid = 0
+
+    for name, value in data.items():
+        if name in excluded:
+            continue
+        adapter = adapters.get(name)
+        if adapter is None:
+            result[name] = value
+            continue
+        try:
+            result[name] = adapter.dump_python(adapter.validate_python(value), mode="json")
+            valid += 1
+        except ValidationError:
+            print(f"Dropping invalid field '{name}' from {model.__name__}")
+
+    if not valid:
+        raise ValueError(f"No valid {model.__name__} fields in response")
+    return result
@@ -1,9 +1,13 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+import asyncio
+import json
 import os
-import shutil
+import time
 from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from models import (
     JobDescriptionInput,
@@ -14,12 +18,32 @@ from models import (
     BulletPointResponse,
     InterviewQuestionsResponse,
     LearningRoadmapRequest,
-    MockInterviewRequest
+    MockInterviewRequest,
+    IndexedCandidate,
+    CandidateUploadResponse,
+    RankCandidatesRequest,
+    RankedCandidate,
+    RankCandidatesResponse,
+    FullReportResponse,
+    BatchJobStatus,
+    BatchItemResult,
+    BatchResultsResponse
 )
 from pdf_parser import PDFParser
 from embedding_service import EmbeddingService
 from vector_store import VectorStore
 from ai_analyzer import AIAnalyzer
+from rate_limiter import RateLimiter
+from http_pool import HTTPPool
+from section_retriever import SectionRetriever
+from skill_matcher import SkillMatcher
+from whatif_engine import WhatIfEngine
+from text_normalizer import normalize_text
+from token_budget import load_encoding
+from session_store import ResumeSession, SessionStore
+from json_stream import JSONExtractor, field_adapters
+from fanout import fan_out
+from batch_queue import BatchItem, BatchQueue, Checkpoint, PermanentError
 
 
 app = FastAPI(title="Career Compass API", version="1.0.0")
@@ -34,14 +58,397 @@ app.add_middleware(
 )
 
 # Initialize services
-pdf_parser = PDFParser()
-embedding_service = EmbeddingService()
-vector_store = VectorStore()
-ai_analyzer = AIAnalyzer()
+pdf_parser = PDFParser(
+    max_workers=int(os.getenv("PDF_WORKERS", "0")) or None,
+    timeout=float(os.getenv("PDF_TIMEOUT_SECONDS", "30"))
+)
+# One limiter and one connection pool for every OpenAI call the process makes
+rate_limiter = RateLimiter.from_env()
+http_pool = HTTPPool.from_env()
+embedding_service = EmbeddingService(limiter=rate_limiter, http_client=http_pool.client)
+section_retriever = SectionRetriever(
+    embedding_service,
+    chunks_per_requirement=int(os.getenv("SECTION_RETRIEVAL_TOP_K", "2"))
+)
+skill_matcher = SkillMatcher.from_env()
+whatif_engine = WhatIfEngine(embedding_service, skill_matcher)
+ai_analyzer = AIAnalyzer(
+    retriever=section_retriever if os.getenv("SECTION_RETRIEVAL", "true").lower() == "true" else None,
+    limiter=rate_limiter,
+    http_client=http_pool.client
+)
+
+# AIAnalyzer calls one /api/full-report runs at the same time
+FULL_REPORT_CONCURRENCY = int(os.getenv("FULL_REPORT_CONCURRENCY", "5"))
+
+# Largest resume upload accepted, checked while the upload is read
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "10")) * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
+# Candidate index, persisted so restarts don't require re-embedding
+DATA_DIR = Path(os.getenv("DATA_DIR", "data"))
+DATA_DIR.mkdir(exist_ok=True)
+vector_store = VectorStore(
+    dimension=embedding_service.dimension,
+    index_path=str(DATA_DIR / "candidates.faiss"),
+    metadata_path=str(DATA_DIR / "candidates.sqlite3"),
+    mmap=os.getenv("VECTOR_INDEX_MMAP", "false").lower() == "true",
+    index_type=os.getenv("VECTOR_INDEX_TYPE", "flat"),
+    nlist=int(os.getenv("VECTOR_INDEX_NLIST", "1024")),
+    nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "16")),
+    ef_search=int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64")),
+    max_deleted_ratio=float(os.getenv("VECTOR_INDEX_MAX_DELETED_RATIO", "0.2"))
+)
+
+# Resume sessions; stored in SQLite so every uvicorn worker can serve a resume_id
+session_store = SessionStore(
+    ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")),
+    max_sessions=int(os.getenv("SESSION_MAX_COUNT", "1000")),
+    db_path=str(DATA_DIR / "sessions.sqlite3") if os.getenv("SESSION_STORE", "sqlite") == "sqlite" else None
+)
+
+# Offline batch screening: its own small PDF pool so a batch never queues
+# ahead of interactive uploads
+batch_pdf_parser = PDFParser(
+    max_workers=int(os.getenv("BATCH_PDF_WORKERS", "1")),
+    timeout=float(os.getenv("PDF_TIMEOUT_SECONDS", "30"))
+)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+
+async def read_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Read an upload into memory, rejecting it as soon as it exceeds max_bytes.
+    
+    Args:
+        upload: Uploaded file
+        max_bytes: Size limit in bytes
+        
+    Returns:
+        File contents
+    """
+    buffer = bytearray()
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+            )
+    return bytes(buffer)
+
+
+async def resolve_resume(resume_id: Optional[str], resume_text: Optional[str],
+                   job_description: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Return (resume_text, job_description) for a follow-up request.
+    
+    A known resume_id wins and supplies the stored texts; explicit text is
+    used when no session is given. An unknown or expired ID without a text
+    fallback is a 404.
+    
+    Args:
+        resume_id: ID returned by /api/analyze
+        resume_text: Resume text sent by the client
+        job_description: Job description sent by the client (overrides the stored one)
+        
+    Returns:
+        Normalized resume text and job description
+    """
+    if resume_id:
+        session = await asyncio.to_thread(session_store.get, resume_id)
+        if session is not None:
+            return session.resume_text, normalize_text(job_description or "") or session.job_description
+        if not resume_text:
+            raise HTTPException(status_code=404, detail="Resume session expired - please analyze the resume again")
+    return normalize_text(resume_text or ""), normalize_text(job_description or "")
+
+
+async def prepare_resume(resume: UploadFile, job_description: str) -> Tuple[str, ResumeSession]:
+    """
+    Validate an upload, parse and embed it once, and open a resume session.
+    
+    Args:
+        resume: PDF file upload
+        job_description: Job description text
+        
+    Returns:
+        (resume_id, session) holding the normalized texts and embeddings
+    """
+    # Validate file type
+    if not resume.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    
+    job_description = normalize_text(job_description)
+    if not job_description or len(job_description) < 50:
+        raise HTTPException(status_code=400, detail="Job description is too short")
+    
+    # Extract text from PDF in memory, off the event loop
+    resume_text = await pdf_parser.extract_text_async(await read_upload(resume))
+    
+    if not resume_text or len(resume_text.strip()) < 100:
+        raise HTTPException(status_code=400, detail="Could not extract sufficient text from PDF")
+    
+    # Generate embeddings (one batched request)
+    resume_embedding, job_embedding = await embedding_service.generate_embeddings(
+        [resume_text, job_description]
+    )
+    
+    # Calculate similarity
+    similarity_score = embedding_service.calculate_cosine_similarity(
+        resume_embedding,
+        job_embedding
+    )
+    
+    session = ResumeSession(
+        resume_text=resume_text,
+        job_description=job_description,
+        resume_embedding=resume_embedding,
+        job_embedding=job_embedding,
+        similarity_score=similarity_score,
+        filename=resume.filename
+    )
+    return await asyncio.to_thread(session_store.create, session), session
+
+
+def build_analysis_response(analysis: Dict, similarity_score: float, resume_id: Optional[str],
+                            resume_text: str, job_description: str) -> AnalysisResponse:
+    """Fill an AnalysisResponse from an analyze_match result, defaulting missing fields."""
+    analysis = {**analysis, **skill_matcher.keyword_fields(resume_text, job_description)}
+    role_suit = analysis.get("role_suitability", {"level": "Mid-Level", "confidence": "Medium", "reasoning": "Based on experience"})
+    sections = analysis.get("resume_sections_analysis", {})
+    
+    return AnalysisResponse(
+        resume_id=resume_id,
+        match_score=round(similarity_score, 3),
+        match_percentage=analysis.get("match_percentage", int(similarity_score * 100)),
+        match_explanation=analysis.get("match_explanation", f"Resume shows {int(similarity_score * 100)}% match with job requirements."),
+        missing_skills=analysis.get("missing_skills", []),
+        weak_areas=analysis.get("weak_areas", []),
+        strengths=analysis.get("strengths", []),
+        ats_suggestions=analysis.get("ats_suggestions", []),
+        keywords_found=analysis.get("keywords_found", []),
+        keywords_missing=analysis.get("keywords_missing", []),
+        keyword_density_score=analysis.get("keyword_density_score", int(similarity_score * 100)),
+        role_suitability=RoleSuitability(**role_suit),
+        resume_sections_analysis={k: SectionAnalysis(**v) for k, v in sections.items()} if sections else {},
+        bullet_point_analysis=analysis.get("bullet_point_analysis", []),
+        consistency_issues=analysis.get("consistency_issues", []),
+        career_gaps=analysis.get("career_gaps", []),
+        summary=analysis.get("summary", "Analysis completed successfully."),
+        resume_text=resume_text[:1000],
+        job_description=job_description[:1000],
+        degraded=analysis.get("degraded", False)
+    )
+
+
+async def screen_batch_item(item: BatchItem, checkpoint: Checkpoint) -> Dict:
+    """
+    Parse, embed and analyze one batch item, checkpointing after each stage.
+    
+    Args:
+        item: Queued resume and job description
+        checkpoint: Saves the stages finished so far
+        
+    Returns:
+        AnalysisResponse fields
+    """
+    state = item.state
+    if "resume_text" not in state:
+        try:
+            resume_text = await batch_pdf_parser.extract_text_async(item.pdf)
+        except Exception as e:
+            raise PermanentError(str(e))
+        if not resume_text or len(resume_text.strip()) < 100:
+            raise PermanentError("Could not extract sufficient text from PDF")
+        state["resume_text"] = resume_text
+        await checkpoint(state)
+    
+    if "similarity_score" not in state:
+        resume_embedding, job_embedding = await embedding_service.generate_embeddings(
+            [state["resume_text"], item.job_description]
+        )
+        state["similarity_score"] = embedding_service.calculate_cosine_similarity(resume_embedding, job_embedding)
+        await checkpoint(state)
+    
+    analysis = await ai_analyzer.analyze_match(state["resume_text"], item.job_description, state["similarity_score"])
+    if analysis.get("degraded"):
+        # The LLM call failed and analyze_match fell back to placeholder
+        # results; retry the item later rather than storing them
+        raise Exception("LLM analysis unavailable")
+    return build_analysis_response(
+        analysis, state["similarity_score"], None, state["resume_text"], item.job_description
+    ).model_dump(mode="json")
+
+
+batch_queue = BatchQueue(
+    str(DATA_DIR / "batch_jobs.sqlite3"),
+    screen_batch_item,
+    workers=int(os.getenv("BATCH_WORKERS", "2")),
+    max_attempts=int(os.getenv("BATCH_MAX_ATTEMPTS", "3")),
+    retry_delay=float(os.getenv("BATCH_RETRY_DELAY_SECONDS", "5")),
+    lease_seconds=float(os.getenv("BATCH_LEASE_SECONDS", "60"))
+)
+
+
+# Validators for the AnalysisResponse fields the LLM fills in, used to check
+# each streamed section on its own
+STREAMED_SECTIONS = {
+    name: adapter
+    for name, adapter in field_adapters(AnalysisResponse).items()
+    if name not in ("resume_id", "match_score", "resume_text", "job_description")
+}
 
-# Create uploads directory
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_analysis(resume_id: str, resume_text: str, job_description: str,
+                          similarity_score: float) -> AsyncIterator[str]:
+    """
+    Server-sent events for a streaming /api/analyze.
+    
+    Events, in order:
+        score   - {"resume_id", "match_score"} from the embeddings, sent at once
+        delta   - {"text"} raw model output as it arrives
+        section - {"name", "value"} each AnalysisResponse field once its JSON
+                  value is complete and validates; the keyword fields come
+                  straight after score
+        result  - the full AnalysisResponse
+        error   - {"detail"} if the analysis fails
+    """
+    yield sse_event("score", {"resume_id": resume_id, "match_score": round(similarity_score, 3)})
+    
+    sent = set()
+    
+    def section_events(fields) -> List[str]:
+        events = []
+        for name, value in fields:
+            adapter = STREAMED_SECTIONS.get(name)
+            if adapter is None or name in sent:
+                continue
+            try:
+                value = adapter.validate_python(value)
+            except ValidationError:
+                continue
+            sent.add(name)
+            events.append(sse_event("section", {"name": name, "value": adapter.dump_python(value, mode="json")}))
+        return events
+    
+    try:
+        # Keyword fields are computed locally, so they go out before the model starts
+        for event in section_events(skill_matcher.keyword_fields(resume_text, job_description).items()):
+            yield event
+        
+        fields = JSONExtractor("object")
+        async for kind, payload in ai_analyzer.stream_analyze_match(resume_text, job_description, similarity_score):
+            if kind == "delta":
+                yield sse_event("delta", {"text": payload})
+                for event in section_events(fields.feed(payload)):
+                    yield event
+                continue
+            
+            # Sections the stream didn't produce (cache hit, fallback, or
+            # fields needing defaults) come from the final result
+            response = build_analysis_response(payload, similarity_score, resume_id, resume_text, job_description)
+            final = response.model_dump(mode="json")
+            for event in section_events((name, final[name]) for name in STREAMED_SECTIONS):
+                yield event
+            yield sse_event("result", final)
+    except Exception as e:
+        print(f"Error in stream_analysis: {str(e)}")
+        yield sse_event("error", {"detail": f"Analysis failed: {str(e)}"})
+
+
+# FullReportResponse fields produced by an AIAnalyzer call
+REPORT_PARTS = ("analysis", "mock_interview", "recruiter_lens", "interview_questions", "learning_roadmap")
+
+
+def full_report_calls(resume_id: str, session: ResumeSession,
+                      current_level: str) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    """
+    The independent AIAnalyzer calls of a full report, keyed by report field.
+    
+    The learning roadmap is built from the locally computed missing
+    keywords rather than the analysis' missing_skills, so it doesn't have
+    to wait for the analysis; it is left out when nothing is missing.
+    """
+    resume_text, job_description = session.resume_text, session.job_description
+    
+    async def analysis():
+        result = await ai_analyzer.analyze_match(resume_text, job_description, session.similarity_score)
+        response = build_analysis_response(result, session.similarity_score, resume_id, resume_text, job_description)
+        return response.model_dump(mode="json")
+    
+    calls = {
+        "analysis": analysis,
+        "mock_interview": lambda: ai_analyzer.generate_mock_interview_questions(resume_text, job_description),
+        "recruiter_lens": lambda: ai_analyzer.recruiter_lens_analysis(resume_text, job_description),
+        "interview_questions": lambda: ai_analyzer.generate_interview_questions(job_description),
+    }
+    missing = skill_matcher.keyword_fields(resume_text, job_description).get("keywords_missing", [])
+    if missing:
+        target_role = job_description.split("\n")[0][:100]
+        calls["learning_roadmap"] = lambda: ai_analyzer.generate_learning_roadmap(missing, current_level, target_role)
+    return calls
+
+
+def add_report_part(report: Dict, name: str, result: Any, error: Optional[Exception], seconds: float):
+    """Record one finished fan-out call in a full report dict."""
+    report["timings"][name] = round(seconds, 3)
+    if error is not None:
+        print(f"Full report part {name} failed: {str(error)}")
+        report["errors"][name] = str(error)
+    else:
+        report[name] = result
+
+
+async def stream_full_report(resume_id: str, session: ResumeSession,
+                             calls: Dict[str, Callable[[], Awaitable[Any]]]) -> AsyncIterator[str]:
+    """
+    Server-sent events for a streaming /api/full-report.
+    
+    Events, in order:
+        score  - {"resume_id", "match_score"} from the embeddings, sent at once
+        part   - {"name", "value", "seconds"} each report field as its call
+                 finishes, or {"name", "error", "seconds"} if it failed
+        result - the full FullReportResponse
+        error  - {"detail"} if the report fails
+    """
+    yield sse_event("score", {"resume_id": resume_id, "match_score": round(session.similarity_score, 3)})
+    
+    start = time.perf_counter()
+    report = {"resume_id": resume_id, "errors": {}, "timings": {}}
+    try:
+        async for name, result, error, seconds in fan_out(calls, FULL_REPORT_CONCURRENCY):
+            add_report_part(report, name, result, error, seconds)
+            if error is not None:
+                yield sse_event("part", {"name": name, "error": str(error), "seconds": round(seconds, 3)})
+            else:
+                yield sse_event("part", {"name": name, "value": result, "seconds": round(seconds, 3)})
+        report["timings"]["total"] = round(time.perf_counter() - start, 3)
+        yield sse_event("result", FullReportResponse(**report).model_dump(mode="json"))
+    except Exception as e:
+        print(f"Error in stream_full_report: {str(e)}")
+        yield sse_event("error", {"detail": f"Report failed: {str(e)}"})
+
+
+@app.on_event("startup")
+async def startup():
+    """Load the tokenizer and start the batch workers, resuming jobs interrupted by a restart."""
+    await asyncio.to_thread(load_encoding)
+    await batch_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the batch workers, the PDF worker pools and the HTTP pool."""
+    await batch_queue.stop()
+    pdf_parser.close()
+    batch_pdf_parser.close()
+    await http_pool.aclose()
 
 
 @app.get("/")
@@ -56,10 +463,28 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Cache and service counters."""
+    return {
+        "embedding_cache": embedding_service.cache.stats(),
+        "llm_cache": ai_analyzer.cache.stats(),
+        "embedding_singleflight": embedding_service.inflight.stats(),
+        "embedding_backend": embedding_service.backend.stats(),
+        "llm_singleflight": ai_analyzer.inflight.stats(),
+        "resume_sessions": await asyncio.to_thread(len, session_store),
+        "batch_queue": batch_queue.stats(),
+        "openai_rate_limits": rate_limiter.stats(),
+        "llm_latency": ai_analyzer.latency.stats(),
+        "http_pool": http_pool.stats()
+    }
+
+
 @app.post("/api/analyze", response_model=AnalysisResponse)
 async def analyze_resume(
     resume: UploadFile = File(...),
-    job_description: str = Form(...)
+    job_description: str = Form(...),
+    stream: bool = Form(False)
 ):
     """
     Analyze resume against job description.
@@ -67,83 +492,104 @@ async def analyze_resume(
     Args:
         resume: PDF file upload
         job_description: Job description text
+        stream: Return server-sent events (see stream_analysis) instead of one JSON body
         
     Returns:
         Detailed analysis with match score and recommendations
     """
-    temp_file_path = None
-    
     try:
-        # Validate file type
-        if not resume.filename.endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Only PDF files are supported")
+        resume_id, session = await prepare_resume(resume, job_description)
+        resume_text, job_description = session.resume_text, session.job_description
+        similarity_score = session.similarity_score
         
-        if not job_description or len(job_description.strip()) < 50:
-            raise HTTPException(status_code=400, detail="Job description is too short")
+        if stream:
+            return StreamingResponse(
+                stream_analysis(resume_id, resume_text, job_description, similarity_score),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
         
-        # Save uploaded file temporarily
-        temp_file_path = UPLOAD_DIR / f"temp_{resume.filename}"
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(resume.file, buffer)
+        # Get AI analysis
+        analysis = await ai_analyzer.analyze_match(resume_text, job_description, similarity_score)
         
-        # Extract text from PDF
-        resume_text = pdf_parser.extract_text(str(temp_file_path))
+        response = build_analysis_response(analysis, similarity_score, resume_id, resume_text, job_description)
         
-        if not resume_text or len(resume_text.strip()) < 100:
-            raise HTTPException(status_code=400, detail="Could not extract sufficient text from PDF")
+        return response
         
-        # Generate embeddings
-        resume_embedding = embedding_service.generate_embedding(resume_text)
-        job_embedding = embedding_service.generate_embedding(job_description)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in analyze_resume: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@app.post("/api/full-report", response_model=FullReportResponse)
+async def full_report(
+    resume: Optional[UploadFile] = File(None),
+    job_description: str = Form(""),
+    resume_id: Optional[str] = Form(None),
+    parts: str = Form(""),
+    current_level: str = Form("Mid-Level"),
+    stream: bool = Form(False)
+):
+    """
+    Run every AI analysis of a resume in one request.
+    
+    The resume is parsed and embedded once, then the analysis, mock
+    interview, recruiter lens, interview questions and learning roadmap run
+    concurrently (at most FULL_REPORT_CONCURRENCY at a time), so the
+    report takes about as long as its slowest part.
+    
+    Args:
+        resume: PDF file upload (or resume_id)
+        job_description: Job description text
+        resume_id: Session from /api/analyze, instead of an upload; lets a
+            client fetch the other parts while its analysis still streams
+        parts: Comma-separated report fields to produce (default: all)
+        current_level: Candidate level for the learning roadmap
+        stream: Return server-sent events (see stream_full_report) instead of one JSON body
         
-        # Calculate similarity
-        similarity_score = embedding_service.calculate_cosine_similarity(
-            resume_embedding,
-            job_embedding
-        )
+    Returns:
+        Combined report with per-part timings and errors
+    """
+    try:
+        if resume_id:
+            session = await asyncio.to_thread(session_store.get, resume_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail="Resume session expired - please analyze the resume again")
+        elif resume is not None:
+            resume_id, session = await prepare_resume(resume, job_description)
+        else:
+            raise HTTPException(status_code=400, detail="Upload a resume or pass a resume_id")
         
-        # Get AI analysis
-        analysis = ai_analyzer.analyze_match(resume_text, job_description, similarity_score)
-        
-        # Prepare comprehensive response
-        role_suit = analysis.get("role_suitability", {"level": "Mid-Level", "confidence": "Medium", "reasoning": "Based on experience"})
-        sections = analysis.get("resume_sections_analysis", {})
-        
-        response = AnalysisResponse(
-            match_score=round(similarity_score, 3),
-            match_percentage=analysis.get("match_percentage", int(similarity_score * 100)),
-            match_explanation=analysis.get("match_explanation", f"Resume shows {int(similarity_score * 100)}% match with job requirements."),
-            missing_skills=analysis.get("missing_skills", []),
-            weak_areas=analysis.get("weak_areas", []),
-            strengths=analysis.get("strengths", []),
-            ats_suggestions=analysis.get("ats_suggestions", []),
-            keywords_found=analysis.get("keywords_found", []),
-            keywords_missing=analysis.get("keywords_missing", []),
-            keyword_density_score=analysis.get("keyword_density_score", int(similarity_score * 100)),
-            role_suitability=RoleSuitability(**role_suit),
-            resume_sections_analysis={k: SectionAnalysis(**v) for k, v in sections.items()} if sections else {},
-            bullet_point_analysis=analysis.get("bullet_point_analysis", []),
-            consistency_issues=analysis.get("consistency_issues", []),
-            career_gaps=analysis.get("career_gaps", []),
-            summary=analysis.get("summary", "Analysis completed successfully."),
-            resume_text=resume_text[:1000],
-            job_description=job_description[:1000]
-        )
+        calls = full_report_calls(resume_id, session, current_level)
+        if parts:
+            wanted = [part.strip() for part in parts.split(",") if part.strip()]
+            unknown = set(wanted) - set(REPORT_PARTS)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown report parts: {', '.join(sorted(unknown))}")
+            calls = {name: fn for name, fn in calls.items() if name in wanted}
         
-        return response
+        if stream:
+            return StreamingResponse(
+                stream_full_report(resume_id, session, calls),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        start = time.perf_counter()
+        report = {"resume_id": resume_id, "errors": {}, "timings": {}}
+        async for name, result, error, seconds in fan_out(calls, FULL_REPORT_CONCURRENCY):
+            add_report_part(report, name, result, error, seconds)
+        report["timings"]["total"] = round(time.perf_counter() - start, 3)
+        
+        return FullReportResponse(**report)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in analyze_resume: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
-    finally:
-        # Clean up temporary file
-        if temp_file_path and temp_file_path.exists():
-            try:
-                os.remove(temp_file_path)
-            except:
-                pass
+        print(f"Error in full_report: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Report failed: {str(e)}")
 
 
 @app.post("/api/bullet-points", response_model=BulletPointResponse)
@@ -164,8 +610,8 @@ async def generate_bullet_points(request: BulletPointRequest):
         if not request.job_title:
             raise HTTPException(status_code=400, detail="Job title is required")
         
-        bullet_points = ai_analyzer.generate_bullet_points(
-            request.experience,
+        bullet_points = await ai_analyzer.generate_bullet_points(
+            normalize_text(request.experience),
             request.job_title
         )
         
@@ -193,7 +639,7 @@ async def get_interview_questions(job_input: JobDescriptionInput):
         if not job_input.text or len(job_input.text.strip()) < 50:
             raise HTTPException(status_code=400, detail="Job description is too short")
         
-        questions = ai_analyzer.generate_interview_questions(job_input.text)
+        questions = await ai_analyzer.generate_interview_questions(normalize_text(job_input.text))
         
         return InterviewQuestionsResponse(questions=questions)
         
@@ -219,7 +665,7 @@ async def generate_learning_roadmap(request: LearningRoadmapRequest):
         if not request.missing_skills:
             raise HTTPException(status_code=400, detail="Missing skills list is required")
         
-        roadmap = ai_analyzer.generate_learning_roadmap(
+        roadmap = await ai_analyzer.generate_learning_roadmap(
             request.missing_skills,
             request.current_level,
             request.target_role
@@ -246,16 +692,17 @@ async def generate_mock_interview(request: MockInterviewRequest):
         List of targeted interview questions with guidance
     """
     try:
-        if not request.resume_text or len(request.resume_text.strip()) < 100:
+        resume_text, job_description = await resolve_resume(
+            request.resume_id, request.resume_text, request.job_description
+        )
+        
+        if len(resume_text) < 100:
             raise HTTPException(status_code=400, detail="Resume text is too short")
         
-        if not request.job_description or len(request.job_description.strip()) < 50:
+        if len(job_description) < 50:
             raise HTTPException(status_code=400, detail="Job description is too short")
         
-        questions = ai_analyzer.generate_mock_interview_questions(
-            request.resume_text,
-            request.job_description
-        )
+        questions = await ai_analyzer.generate_mock_interview_questions(resume_text, job_description)
         
         return {"questions": questions}
         
@@ -271,13 +718,19 @@ async def analyze_voice_answer(request: dict):
     try:
         from models import VoiceInterviewRequest
         
-        result = ai_analyzer.analyze_voice_answer(
-            request.get("transcript", ""),
+        resume_text, job_description = await resolve_resume(
+            request.get("resume_id"), request.get("resume_text"), request.get("job_description")
+        )
+        
+        result = await ai_analyzer.analyze_voice_answer(
+            normalize_text(request.get("transcript", "")),
             request.get("question", ""),
-            request.get("job_description", ""),
-            request.get("resume_text", "")
+            job_description,
+            resume_text
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Voice interview error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -288,11 +741,15 @@ async def check_consistency(request: dict):
     try:
         from models import ConsistencyCheckRequest
         
-        result = ai_analyzer.check_consistency(
-            request.get("resume_text", ""),
+        resume_text, _ = await resolve_resume(request.get("resume_id"), request.get("resume_text"))
+        
+        result = await ai_analyzer.check_consistency(
+            resume_text,
             request.get("interview_answers", [])
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Consistency check error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -303,11 +760,14 @@ async def recruiter_lens(request: dict):
     try:
         from models import RecruiterLensRequest
         
-        result = ai_analyzer.recruiter_lens_analysis(
-            request.get("resume_text", ""),
-            request.get("job_description", "")
+        resume_text, job_description = await resolve_resume(
+            request.get("resume_id"), request.get("resume_text"), request.get("job_description")
         )
+        
+        result = await ai_analyzer.recruiter_lens_analysis(resume_text, job_description)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Recruiter lens error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -318,11 +778,15 @@ async def career_switch(request: dict):
     try:
         from models import CareerSwitchRequest
         
-        result = ai_analyzer.career_switch_analysis(
-            request.get("resume_text", ""),
+        resume_text, _ = await resolve_resume(request.get("resume_id"), request.get("resume_text"))
+        
+        result = await ai_analyzer.career_switch_analysis(
+            resume_text,
             request.get("target_job", "")
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Career switch error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -330,23 +794,314 @@ async def career_switch(request: dict):
 
 @app.post("/api/whatif-simulation")
 async def whatif_simulation(request: dict):
+    """
+    Predict the match score after adding or removing skills and experience.
+    
+    Scored locally by WhatIfEngine from the session's embeddings; the model
+    is only called when "explain" is true, to write the narrative.
+    """
     try:
         from models import WhatIfSimulation
         
-        result = ai_analyzer.simulate_whatif(
-            request.get("resume_text", ""),
-            request.get("job_description", ""),
-            request.get("add_skills", []),
-            request.get("remove_skills", []),
-            request.get("add_experience", ""),
-            request.get("original_score", 0)
+        resume_text, job_description = await resolve_resume(
+            request.get("resume_id"), request.get("resume_text"), request.get("job_description")
+        )
+        session = await asyncio.to_thread(session_store.get, request["resume_id"]) if request.get("resume_id") else None
+        add_skills = request.get("add_skills", [])
+        remove_skills = request.get("remove_skills", [])
+        add_experience = request.get("add_experience", "")
+        
+        result = await whatif_engine.simulate(
+            resume_text,
+            job_description,
+            add_skills,
+            remove_skills,
+            add_experience,
+            request.get("original_score", 0),
+            resume_embedding=session.resume_embedding if session else None,
+            # A job description sent with the request replaces the stored one
+            job_embedding=session.job_embedding if session and not request.get("job_description") else None
         )
+        if request.get("explain"):
+            result = await ai_analyzer.explain_whatif(job_description, add_skills, remove_skills, add_experience, result)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"What-if simulation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/batch-jobs", response_model=BatchJobStatus)
+async def submit_batch_job(
+    resumes: List[UploadFile] = File(...),
+    job_description: str = Form(""),
+    job_descriptions: str = Form("")
+):
+    """
+    Queue resumes for offline screening against a job description.
+    
+    The request only stores the files; background workers parse, embed and
+    analyze them (see batch_queue.BatchQueue). Poll the job for progress and
+    page through /results as items finish.
+    
+    Args:
+        resumes: PDF file uploads
+        job_description: Job description used for every resume
+        job_descriptions: JSON list with one job description per resume,
+            instead of job_description
+        
+    Returns:
+        Job ID and initial progress, with any files rejected up front
+    """
+    if len(resumes) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} resumes per batch")
+    
+    if job_descriptions:
+        try:
+            descriptions = json.loads(job_descriptions)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="job_descriptions must be a JSON list")
+        if not isinstance(descriptions, list) or len(descriptions) != len(resumes):
+            raise HTTPException(status_code=400, detail="job_descriptions needs one entry per resume")
+    else:
+        descriptions = [job_description] * len(resumes)
+    descriptions = [normalize_text(str(text)) for text in descriptions]
+    if any(len(text) < 50 for text in descriptions):
+        raise HTTPException(status_code=400, detail="Job description is too short")
+    
+    items, rejected = [], []
+    for resume, description in zip(resumes, descriptions):
+        if not resume.filename.endswith('.pdf'):
+            rejected.append({"filename": resume.filename, "error": "Only PDF files are supported"})
+            continue
+        
+        try:
+            data = await read_upload(resume)
+        except HTTPException as e:
+            rejected.append({"filename": resume.filename, "error": e.detail})
+            continue
+        
+        items.append({"filename": resume.filename, "job_description": description, "pdf": data})
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="No valid PDF resumes in the batch")
+    
+    try:
+        job_id = await asyncio.to_thread(batch_queue.submit, items)
+        job = await asyncio.to_thread(batch_queue.job, job_id)
+    except Exception as e:
+        print(f"Error in submit_batch_job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Could not queue batch: {str(e)}")
+    
+    return BatchJobStatus(**job, rejected=rejected)
+
+
+@app.get("/api/batch-jobs/{job_id}", response_model=BatchJobStatus)
+async def get_batch_job(job_id: str):
+    """
+    Progress of a batch job.
+    
+    Args:
+        job_id: ID returned by /api/batch-jobs
+        
+    Returns:
+        Job status and item counts per state
+    """
+    job = await asyncio.to_thread(batch_queue.job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    
+    return BatchJobStatus(**job)
+
+
+@app.get("/api/batch-jobs/{job_id}/results", response_model=BatchResultsResponse)
+async def get_batch_results(job_id: str, offset: int = 0, limit: int = 50, status: Optional[str] = None):
+    """
+    Page through a batch job's items in submission order.
+    
+    Args:
+        job_id: ID returned by /api/batch-jobs
+        offset: Items to skip
+        limit: Items per page (1-200)
+        status: Only items in this state, e.g. "done" or "failed"
+        
+    Returns:
+        Items with their analysis or error, and the offset of the next page
+    """
+    job = await asyncio.to_thread(batch_queue.job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    
+    limit = max(1, min(limit, 200))
+    rows = await asyncio.to_thread(batch_queue.results, job_id, max(0, offset), limit, status)
+    
+    return BatchResultsResponse(
+        job_id=job_id,
+        status=job["status"],
+        items=[BatchItemResult(**row) for row in rows],
+        next_offset=max(0, offset) + len(rows) if len(rows) == limit else None
+    )
+
+
+@app.delete("/api/batch-jobs/{job_id}", response_model=BatchJobStatus)
+async def cancel_batch_job(job_id: str):
+    """
+    Cancel a batch job's queued items; items already being screened finish.
+    
+    Args:
+        job_id: ID returned by /api/batch-jobs
+        
+    Returns:
+        Job status after cancelling
+    """
+    job = await asyncio.to_thread(batch_queue.job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    
+    await asyncio.to_thread(batch_queue.cancel, job_id)
+    return BatchJobStatus(**await asyncio.to_thread(batch_queue.job, job_id))
+
+
+@app.post("/api/candidates", response_model=CandidateUploadResponse)
+async def upload_candidates(resumes: List[UploadFile] = File(...)):
+    """
+    Parse, embed and index a batch of resumes for ranking.
+    
+    Args:
+        resumes: PDF file uploads
+        
+    Returns:
+        Candidate IDs for the indexed resumes and any files that failed
+    """
+    filenames, failed, texts = [], [], []
+    pending, pending_names = [], []
+    
+    for resume in resumes:
+        if not resume.filename.endswith('.pdf'):
+            failed.append({"filename": resume.filename, "error": "Only PDF files are supported"})
+            continue
+        
+        try:
+            data = await read_upload(resume)
+        except HTTPException as e:
+            failed.append({"filename": resume.filename, "error": e.detail})
+            continue
+        
+        pending.append(pdf_parser.extract_text_async(data))
+        pending_names.append(resume.filename)
+    
+    # Parse all PDFs concurrently in the worker pool
+    extracted = await asyncio.gather(*pending, return_exceptions=True)
+    
+    for filename, resume_text in zip(pending_names, extracted):
+        if isinstance(resume_text, Exception):
+            failed.append({"filename": filename, "error": str(resume_text)})
+            continue
+        
+        if not resume_text or len(resume_text.strip()) < 100:
+            failed.append({"filename": filename, "error": "Could not extract sufficient text from PDF"})
+            continue
+        
+        filenames.append(filename)
+        texts.append(resume_text)
+    
+    try:
+        embeddings = await embedding_service.generate_embeddings(texts)
+        # Adding rewrites the saved index; keep it off the event loop
+        candidate_ids = await asyncio.to_thread(
+            vector_store.add_vectors,
+            embeddings,
+            texts,
+            [{"filename": filename} for filename in filenames]
+        )
+    except Exception as e:
+        print(f"Error in upload_candidates: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
+    
+    total_candidates = await asyncio.to_thread(lambda: vector_store.ntotal)
+    return CandidateUploadResponse(
+        indexed=[
+            IndexedCandidate(candidate_id=cid, filename=filename)
+            for cid, filename in zip(candidate_ids, filenames)
+        ],
+        failed=failed,
+        total_candidates=total_candidates
+    )
+
+
+@app.delete("/api/candidates/{candidate_id}")
+async def delete_candidate(candidate_id: int):
+    """
+    Remove a candidate from the ranking index.
+    
+    Args:
+        candidate_id: ID returned by /api/candidates
+        
+    Returns:
+        Remaining number of indexed candidates
+    """
+    if not await asyncio.to_thread(vector_store.remove, [candidate_id]):
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    
+    return {"deleted": candidate_id, "total_candidates": await asyncio.to_thread(lambda: vector_store.ntotal)}
+
+
+@app.post("/api/rank", response_model=RankCandidatesResponse)
+async def rank_candidates(request: RankCandidatesRequest):
+    """
+    Rank indexed candidates against a job description.
+    
+    Similarity ranking uses the vector index only; the full GPT analysis
+    runs just for the first `analyze_top` shortlisted candidates.
+    
+    Args:
+        request: Job description, number of results and analysis depth
+        
+    Returns:
+        Top-k candidates ordered by similarity
+    """
+    try:
+        if not request.job_description or len(request.job_description.strip()) < 50:
+            raise HTTPException(status_code=400, detail="Job description is too short")
+        
+        job_description = normalize_text(request.job_description)
+        job_embedding = await embedding_service.generate_embedding(job_description)
+        matches = await asyncio.to_thread(vector_store.search_candidates, job_embedding, request.top_k)
+        
+        # Analyses share the full report's concurrency cap; a failed one leaves its candidate unanalysed
+        calls = {
+            i: (lambda m=m: ai_analyzer.analyze_match(m["text"], job_description, m["score"]))
+            for i, m in enumerate(matches[:request.analyze_top])
+        }
+        analyses = {}
+        async for i, analysis, error, _ in fan_out(calls, FULL_REPORT_CONCURRENCY):
+            if error is not None:
+                print(f"Error analysing candidate {matches[i]['candidate_id']}: {str(error)}")
+                continue
+            analyses[i] = build_analysis_response(analysis, matches[i]["score"], None, matches[i]["text"],
+                                                  job_description)
+        
+        candidates = [
+            RankedCandidate(
+                candidate_id=m["candidate_id"],
+                filename=m.get("filename", ""),
+                match_score=round(m["score"], 3),
+                analysis=analyses.get(i)
+            )
+            for i, m in enumerate(matches)
+        ]
+        
+        total_candidates = await asyncio.to_thread(lambda: vector_store.ntotal)
+        return RankCandidatesResponse(candidates=candidates, total_candidates=total_candidates)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in rank_candidates: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Ranking failed: {str(e)}")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,6 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
+from fanout import MAX_FAN_OUT
+
+# Most candidates /api/rank returns
+MAX_RANK_RESULTS = 200
+
 
 class JobDescriptionInput(BaseModel):
     """Job description input model."""
@@ -9,36 +14,38 @@ class JobDescriptionInput(BaseModel):
 
 class RoleSuitability(BaseModel):
     """Role suitability assessment."""
-    level: str
-    confidence: str
+    level: str = Field(description="Entry/Mid-Level/Senior/Lead")
+    confidence: str = Field(description="High/Medium/Low")
     reasoning: str
 
 class SectionAnalysis(BaseModel):
     """Analysis of a resume section."""
-    score: int
-    impact: str
+    score: int = Field(description="0-100")
+    impact: str = Field(description="High/Medium/Low")
     feedback: str
 
 class AnalysisResponse(BaseModel):
     """Response model for resume analysis with advanced features."""
+    resume_id: Optional[str] = None
     match_score: float
-    match_percentage: int
-    match_explanation: str
-    missing_skills: List[str]
-    weak_areas: List[str]
-    strengths: List[str]
-    ats_suggestions: List[str]
-    keywords_found: List[str]
-    keywords_missing: List[str]
-    keyword_density_score: int
+    match_percentage: int = Field(description="0-100")
+    match_explanation: str = Field(description="specific reason for the score")
+    missing_skills: List[str] = Field(description="3-5 required skills absent from the resume")
+    weak_areas: List[str] = Field(description="2-3 skills present but below the required level")
+    strengths: List[str] = Field(description="2-3 areas exceeding the requirements")
+    ats_suggestions: List[str] = Field(description="3-4 actionable improvements")
+    keywords_found: List[str] = Field(description="job keywords explicitly in the resume")
+    keywords_missing: List[str] = Field(description="job keywords not in the resume")
+    keyword_density_score: int = Field(description="0-100")
     role_suitability: RoleSuitability
-    resume_sections_analysis: Dict[str, SectionAnalysis]
+    resume_sections_analysis: Dict[str, SectionAnalysis] = Field(description="keys: experience, skills, education")
     bullet_point_analysis: List[str]
     consistency_issues: List[str]
     career_gaps: List[str]
-    summary: str
+    summary: str = Field(description="2-3 sentence honest assessment")
     resume_text: str
     job_description: str
+    degraded: bool = False
 
 class LearningRoadmapRequest(BaseModel):
     """Request for learning roadmap generation."""
@@ -46,10 +53,41 @@ class LearningRoadmapRequest(BaseModel):
     current_level: str
     target_role: str
 
+class RoadmapPhase(BaseModel):
+    """One phase of a learning roadmap."""
+    focus: str
+    skills: List[str]
+    resources: List[str]
+    projects: List[str]
+    milestones: List[str]
+
+class LearningRoadmapResponse(BaseModel):
+    """30-60-90 day learning roadmap."""
+    days_0_30: RoadmapPhase = Field(description="foundations")
+    days_31_60: RoadmapPhase = Field(description="intermediate practice")
+    days_61_90: RoadmapPhase = Field(description="advanced application, portfolio project")
+    weekly_time_commitment: str = Field(description='e.g. "10-15 hours"')
+    success_metrics: List[str]
+
 class MockInterviewRequest(BaseModel):
     """Request for mock interview questions."""
-    resume_text: str
-    job_description: str
+    resume_id: Optional[str] = None
+    resume_text: str = ""
+    job_description: str = ""
+
+class MockInterviewQuestion(BaseModel):
+    """A mock interview question with answer guidance."""
+    question: str
+    category: str = Field(description="Technical/Behavioral/Situational")
+    difficulty: str = Field(description="Easy/Medium/Hard")
+    why_asked: str
+    key_points: List[str] = Field(description="3 points a strong answer covers")
+    sample_answer: str = Field(description="brief STAR-method approach")
+    red_flags: List[str] = Field(description="mistakes to avoid")
+
+class MockInterviewResponse(BaseModel):
+    """Mock interview questions."""
+    questions: List[MockInterviewQuestion]
 
 
 class BulletPointRequest(BaseModel):
@@ -91,7 +129,7 @@ class ATSOptimizationResponse(BaseModel):
 class RoleSuggestion(BaseModel):
     """Job role suggestion."""
     role: str
-    match_percentage: int
+    match_percentage: int = Field(description="0-100")
     reason: str
     required_skills: List[str]
 
@@ -108,83 +146,163 @@ class SkillGapDetail(BaseModel):
 class VoiceInterviewRequest(BaseModel):
     transcript: str
     question: str
-    job_description: str
-    resume_text: str
+    resume_id: Optional[str] = None
+    job_description: str = ""
+    resume_text: str = ""
 
 
 class VoiceInterviewResponse(BaseModel):
-    relevance_score: int
-    clarity_score: int
-    skill_alignment_score: int
-    overall_score: int
+    relevance_score: int = Field(description="0-100, how well it answers the question")
+    clarity_score: int = Field(description="0-100, structure and clarity")
+    skill_alignment_score: int = Field(description="0-100, required skills demonstrated")
+    overall_score: int = Field(description="0-100")
     feedback: List[str]
-    improved_answer: str
+    improved_answer: str = Field(description="better version using the STAR method")
     follow_up_questions: List[str]
     key_points_covered: List[str]
     missing_points: List[str]
 
 
 class ConsistencyCheckRequest(BaseModel):
-    resume_text: str
+    resume_id: Optional[str] = None
+    resume_text: str = ""
     interview_answers: List[Dict[str, str]]
 
 
 class ConsistencyCheckResponse(BaseModel):
-    overall_consistency: int
-    contradictions: List[Dict[str, str]]
-    weak_claims: List[Dict[str, str]]
+    overall_consistency: int = Field(description="0-100")
+    contradictions: List[Dict[str, str]] = Field(description="each {claim: resume quote, answer: interview quote, severity: High/Medium/Low}")
+    weak_claims: List[Dict[str, str]] = Field(description="each {claim, issue: why the answers don't support it}")
     areas_to_clarify: List[str]
     red_flags: List[str]
 
 
 class RecruiterLensRequest(BaseModel):
-    resume_text: str
-    job_description: str
+    resume_id: Optional[str] = None
+    resume_text: str = ""
+    job_description: str = ""
 
 
 class RecruiterLensResponse(BaseModel):
-    first_impression_score: int
+    first_impression_score: int = Field(description="0-100")
     attention_grabbers: List[str]
     red_flags: List[str]
     missing_essentials: List[str]
-    visual_appeal_score: int
-    time_to_decision: str
-    likelihood: str
+    visual_appeal_score: int = Field(description="0-100")
+    time_to_decision: str = Field(description='e.g. "20 seconds"')
+    likelihood: str = Field(description='e.g. "Would interview"')
 
 
 class CareerSwitchRequest(BaseModel):
-    resume_text: str
+    resume_id: Optional[str] = None
+    resume_text: str = ""
     target_job: str
 
 
 class CareerSwitchResponse(BaseModel):
     is_feasible: bool
-    gap_percentage: int
-    alternative_roles: List[RoleSuggestion]
-    transition_difficulty: str
-    recommended_path: List[str]
-    timeline: str
+    gap_percentage: int = Field(description="0-100 skill gap to the target role")
+    alternative_roles: List[RoleSuggestion] = Field(description="2-3 closer roles")
+    transition_difficulty: str = Field(description="Easy/Moderate/Hard")
+    recommended_path: List[str] = Field(description="ordered steps")
+    timeline: str = Field(description='e.g. "6-12 months"')
 
 
 class WhatIfSimulation(BaseModel):
-    resume_text: str
-    job_description: str
+    resume_id: Optional[str] = None
+    resume_text: str = ""
+    job_description: str = ""
     add_skills: List[str] = []
     remove_skills: List[str] = []
     add_experience: str = ""
+    original_score: int = 0
+    explain: bool = False
 
 
 class WhatIfResponse(BaseModel):
     original_score: int
-    new_score: int
+    new_score: int = Field(description="0-100 predicted match after the changes")
     score_change: int
     impact_analysis: str
     recommendations: List[str]
-    skill: str
-    importance: str
-    current_level: str
-    target_level: str
-    learning_resources: List[str]
+    keyword_score_change: int = 0
+    similarity_change: float = 0.0
+    degraded: bool = False
+
+
+class FullReportResponse(BaseModel):
+    """Every AI analysis of one resume, from /api/full-report."""
+    resume_id: str
+    analysis: Optional[AnalysisResponse] = None
+    mock_interview: Optional[List[Dict[str, Any]]] = None
+    recruiter_lens: Optional[Dict[str, Any]] = None
+    interview_questions: Optional[List[str]] = None
+    learning_roadmap: Optional[Dict[str, Any]] = None
+    errors: Dict[str, str] = {}
+    timings: Dict[str, float] = {}
+
+
+class BatchJobStatus(BaseModel):
+    """Progress of a batch screening job."""
+    job_id: str
+    status: str = Field(description="queued/running/done/cancelled")
+    total: int
+    counts: Dict[str, int] = Field(description="items per state: pending, running, done, failed, cancelled")
+    created_at: float
+    rejected: List[Dict[str, str]] = []
+
+
+class BatchItemResult(BaseModel):
+    """One screened resume of a batch job."""
+    position: int
+    filename: str
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    result: Optional[AnalysisResponse] = None
+
+
+class BatchResultsResponse(BaseModel):
+    """A page of batch job results."""
+    job_id: str
+    status: str
+    items: List[BatchItemResult]
+    next_offset: Optional[int] = None
+
+
+class IndexedCandidate(BaseModel):
+    """Candidate added to the ranking index."""
+    candidate_id: int
+    filename: str
+
+
+class CandidateUploadResponse(BaseModel):
+    """Result of a bulk resume upload."""
+    indexed: List[IndexedCandidate]
+    failed: List[Dict[str, str]]
+    total_candidates: int
+
+
+class RankCandidatesRequest(BaseModel):
+    """Request for ranking indexed candidates against a job description."""
+    job_description: str
+    top_k: int = Field(10, ge=1, le=MAX_RANK_RESULTS)
+    # Each analysed candidate is a full LLM call
+    analyze_top: int = Field(0, ge=0, le=MAX_FAN_OUT)
+
+
+class RankedCandidate(BaseModel):
+    """Single ranked candidate, with optional full analysis."""
+    candidate_id: int
+    filename: str
+    match_score: float
+    analysis: Optional[AnalysisResponse] = None
+
+
+class RankCandidatesResponse(BaseModel):
+    """Top-k candidates for a job description."""
+    candidates: List[RankedCandidate]
+    total_candidates: int
 
 
 class ExportReportRequest(BaseModel):
@@ -1,44 +1,136 @@
+import asyncio
 import fitz  # PyMuPDF
-import re
-from typing import Optional
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+from text_normalizer import normalize_text
+
+
+def _extract_page_range(data: bytes, start: int, stop: int) -> str:
+    """Extract raw text for pages [start, stop); runs inside a pool worker."""
+    return _extract_counted(data, start, stop)[1]
+
+
+def _extract_counted(data: bytes, start: int, stop: int) -> Tuple[int, str]:
+    """(page count, raw text for pages [start, stop)); runs inside a pool worker."""
+    doc = fitz.open(stream=data, filetype="pdf")
+    try:
+        return len(doc), "".join(doc[page_num].get_text() for page_num in range(start, min(stop, len(doc))))
+    finally:
+        doc.close()
 
 
 class PDFParser:
     """Extract text from PDF files."""
-    
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: float = 30.0,
+                 pages_per_task: int = 8):
+        """
+        Configure the worker pool used by extract_text_async.
+
+        Args:
+            max_workers: Worker processes (defaults to the CPU count)
+            timeout: Seconds allowed per document before giving up
+            pages_per_task: Page range handed to each worker; larger documents are split
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.pages_per_task = pages_per_task
+        self._executor: Optional[ProcessPoolExecutor] = None
+
     @staticmethod
-    def extract_text(pdf_path: str) -> str:
+    def extract_text(source: Union[str, bytes, BinaryIO]) -> str:
         """
         Extract text from a PDF file.
-        
+
         Args:
-            pdf_path: Path to the PDF file
-            
+            source: Path to the PDF file, its raw bytes, or a binary file-like object
+
         Returns:
             Extracted text as a string
         """
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text += page.get_text()
-            
+            if isinstance(source, str):
+                doc = fitz.open(source)
+            else:
+                data = source if isinstance(source, (bytes, bytearray)) else source.read()
+                doc = fitz.open(stream=data, filetype="pdf")
+
+            text = "".join(page.get_text() for page in doc)
             doc.close()
-            
+
             # Clean up text
             text = PDFParser._clean_text(text)
             return text
-            
+
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
-    
+
+    async def extract_text_async(self, data: bytes) -> str:
+        """
+        Extract text in the worker pool without blocking the event loop.
+
+        The first worker task opens the document, counts its pages and
+        extracts the first pages_per_task of them; for longer documents the
+        remaining page ranges are extracted in parallel and joined in order,
+        so nothing is parsed on the event loop. If a worker died (crash or
+        OOM kill) and broke the pool, the pool is replaced and the document
+        tried once more.
+
+        Args:
+            data: Raw PDF bytes
+
+        Returns:
+            Extracted text as a string
+        """
+        for attempt in range(2):
+            executor = self._pool()
+            try:
+                parts = await asyncio.wait_for(self._extract_pages(executor, data), timeout=self.timeout)
+                break
+            except asyncio.TimeoutError:
+                raise Exception(f"Failed to extract text from PDF: timed out after {self.timeout:g}s")
+            except BrokenProcessPool as e:
+                self._reset_pool(executor)
+                if attempt:
+                    raise Exception(f"Failed to extract text from PDF: {str(e)}")
+                print("PDF worker pool broken, retrying on a new pool")
+            except Exception as e:
+                raise Exception(f"Failed to extract text from PDF: {str(e)}")
+
+        return PDFParser._clean_text("".join(parts))
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """The worker pool, started on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _reset_pool(self, broken: ProcessPoolExecutor):
+        """Drop a broken pool so the next call starts a new one (unless another call already did)."""
+        broken.shutdown(wait=False, cancel_futures=True)
+        if self._executor is broken:
+            self._executor = None
+
+    async def _extract_pages(self, executor: ProcessPoolExecutor, data: bytes) -> List[str]:
+        """Extract every page range in the pool, in order."""
+        loop = asyncio.get_running_loop()
+        page_count, first = await loop.run_in_executor(executor, _extract_counted, data, 0, self.pages_per_task)
+        tasks = [
+            loop.run_in_executor(executor, _extract_page_range, data, start, start + self.pages_per_task)
+            for start in range(self.pages_per_task, page_count, self.pages_per_task)
+        ]
+        return [first, *await asyncio.gather(*tasks)]
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     @staticmethod
     def _clean_text(text: str) -> str:
         """Clean and normalize extracted text."""
-        # Remove multiple whitespaces
-        text = re.sub(r'\s+', ' ', text)
-        # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,;:()\-@]', '', text)
-        return text.strip()
+        return normalize_text(text)
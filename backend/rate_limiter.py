@@ -0,0 +1,363 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import openai
+
+# Requests and tokens per minute per model (OpenAI usage tier 1). Override
+# with OPENAI_RATE_LIMITS; unlisted models use the "default" entry.
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (500, 200000),
+    "text-embedding-3-small": (3000, 1000000),
+    "default": (500, 200000),
+}
+
+# Errors worth retrying: the request may succeed later as sent
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                    openai.InternalServerError)
+
+
+class TokenBucket:
+    """
+    Continuously refilling budget of requests or tokens per minute.
+
+    Callers take what they need in arrival order. A request larger than the
+    whole bucket is let through once the bucket is full and leaves it in
+    debt, so oversized prompts are slowed down rather than rejected.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            per_minute: Refill rate, also the bucket size
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Wait until amount is available and take it.
+
+        Args:
+            amount: Requests or tokens to take
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                self._refill()
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                needed = min(amount, self.capacity)
+                if self.level >= needed:
+                    self.level -= amount
+                    return time.monotonic() - start
+                await asyncio.sleep((needed - self.level) / self.rate)
+
+    def refund(self, amount: float):
+        """Give back an over-estimate once the real usage is known."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def pause(self, seconds: float):
+        """Hold every caller for seconds, e.g. for a Retry-After."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """
+    In-flight request limit tuned by AIMD.
+
+    Each success below the latency target raises the limit by about one per
+    round trip of the whole window (1 / limit per request). A 429 halves it
+    and a slow response takes 10% off, at most once per cooldown, so one
+    burst of errors counts as one congestion signal.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64,
+                 latency_target: float = 30.0, cooldown: float = 1.0):
+        """
+        Initialize the limit.
+
+        Args:
+            initial: Starting limit
+            minimum: Lowest limit
+            maximum: Highest limit
+            latency_target: Seconds above which a response counts as congestion
+            cooldown: Seconds between two decreases
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.waiting = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for a free slot."""
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+    async def release(self, latency: Optional[float] = None, throttled: bool = False):
+        """
+        Free a slot and adjust the limit.
+
+        Args:
+            latency: Seconds the request took, None if it failed otherwise
+            throttled: The request was rate limited
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self._decrease(0.5)
+            elif latency is not None and latency > self.latency_target:
+                self._decrease(0.9)
+            elif latency is not None:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown:
+            self.limit = max(self.minimum, self.limit * factor)
+            self._last_decrease = now
+            self.decreases += 1
+
+
+class ModelLimiter:
+    """Request and token buckets plus adaptive concurrency for one model."""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, concurrency: AdaptiveConcurrency):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = concurrency
+        self.calls = 0
+        self.successes = 0
+        self.attempts = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.wait_seconds = 0.0
+        self.latency_seconds = 0.0
+
+
+class RateLimiter:
+    """
+    Client-side rate limiting and retries for OpenAI calls.
+
+    Every call first waits for its model's request and token buckets and a
+    concurrency slot, so bursts queue here instead of failing upstream.
+    Rate-limit, timeout, connection and 5xx errors are retried with full
+    jitter backoff, and a 429's Retry-After pauses the model's request
+    bucket for every caller. Clients should be created with
+    max_retries=0 so the limiter sees each 429.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None, max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0, initial_concurrency: int = 8,
+                 min_concurrency: int = 1, max_concurrency: int = 64, latency_target: float = 30.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            limits: {model: (requests per minute, tokens per minute)}; defaults to DEFAULT_LIMITS
+            max_retries: Retries after the first attempt
+            backoff_base: First backoff ceiling in seconds, doubled per retry
+            backoff_max: Largest backoff ceiling in seconds
+            initial_concurrency: Starting in-flight limit per model
+            min_concurrency: Lowest in-flight limit per model
+            max_concurrency: Highest in-flight limit per model
+            latency_target: Seconds above which a response lowers the limit
+        """
+        self.limits = dict(limits if limits is not None else DEFAULT_LIMITS)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self._models: Dict[str, ModelLimiter] = {}
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Build a limiter configured from OPENAI_* environment variables.
+
+        OPENAI_RATE_LIMITS takes per-model "requests:tokens" per minute, e.g.
+        "gpt-4o-mini=5000:2000000,text-embedding-3-small=5000:5000000".
+        """
+        limits = dict(DEFAULT_LIMITS)
+        for item in os.getenv("OPENAI_RATE_LIMITS", "").split(","):
+            if "=" in item:
+                model, value = item.split("=", 1)
+                requests, tokens = value.split(":", 1)
+                limits[model.strip()] = (float(requests), float(tokens))
+        return cls(
+            limits=limits,
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "4")),
+            backoff_base=float(os.getenv("OPENAI_BACKOFF_BASE_SECONDS", "0.5")),
+            backoff_max=float(os.getenv("OPENAI_BACKOFF_MAX_SECONDS", "20")),
+            initial_concurrency=int(os.getenv("OPENAI_INITIAL_CONCURRENCY", "8")),
+            min_concurrency=int(os.getenv("OPENAI_MIN_CONCURRENCY", "1")),
+            max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "64")),
+            latency_target=float(os.getenv("OPENAI_LATENCY_TARGET_SECONDS", "30"))
+        )
+
+    def model(self, name: str) -> ModelLimiter:
+        """The limiter state for a model, created on first use."""
+        limiter = self._models.get(name)
+        if limiter is None:
+            requests, tokens = self.limits.get(name, self.limits["default"])
+            limiter = ModelLimiter(requests, tokens, AdaptiveConcurrency(
+                self.initial_concurrency, self.min_concurrency, self.max_concurrency, self.latency_target
+            ))
+            self._models[name] = limiter
+        return limiter
+
+    @staticmethod
+    def _retry_after(error: Exception) -> float:
+        """Seconds the server asked us to wait (Retry-After), 0 if it didn't say."""
+        response = getattr(error, "response", None)
+        if response is None:
+            return 0.0
+        try:
+            return float(response.headers.get("retry-after", 0))
+        except ValueError:
+            return 0.0
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number attempt + 1."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def call(self, model: str, tokens: int, fn: Callable[[], Awaitable[Any]],
+                   on_sent: Optional[Callable[[], None]] = None,
+                   on_latency: Optional[Callable[[float], None]] = None) -> Any:
+        """
+        Run an OpenAI request within the model's limits, retrying transient errors.
+
+        Args:
+            model: Model the request is for
+            tokens: Estimated tokens it uses (prompt plus max completion)
+            fn: Zero-argument coroutine function sending the request
+            on_sent: Called each time a try leaves the limiter for the API
+            on_latency: Called with the seconds the successful try took
+                upstream, excluding queueing and backoff
+
+        Returns:
+            Result of fn; after the last retry the error is raised
+        """
+        limiter = self.model(model)
+        limiter.calls += 1
+        attempt = 0
+        while True:
+            waited = await limiter.requests.acquire(1)
+            waited += await limiter.tokens.acquire(tokens)
+            queued = time.monotonic()
+            await limiter.concurrency.acquire()
+            limiter.wait_seconds += waited + time.monotonic() - queued
+            limiter.attempts += 1
+            if on_sent is not None:
+                on_sent()
+
+            start = time.monotonic()
+            try:
+                result = await fn()
+            except RETRYABLE_ERRORS as e:
+                throttled = isinstance(e, openai.RateLimitError)
+                await limiter.concurrency.release(throttled=throttled)
+                # A quota error is a 429 too, but waiting won't fix it
+                if throttled and getattr(e, "code", None) == "insufficient_quota":
+                    limiter.failures += 1
+                    raise
+                if throttled:
+                    limiter.rate_limited += 1
+                if attempt >= self.max_retries:
+                    limiter.failures += 1
+                    raise
+                # The server's Retry-After holds back every caller; the
+                # jitter only spreads this caller's retry
+                retry_after = self._retry_after(e)
+                if throttled and retry_after:
+                    limiter.requests.pause(retry_after)
+                delay = max(retry_after, self._backoff(attempt))
+                attempt += 1
+                limiter.retries += 1
+                print(f"OpenAI {model} {type(e).__name__}, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except asyncio.CancelledError:
+                # A hedged request that lost the race, or a caller that gave up
+                await limiter.concurrency.release()
+                limiter.cancelled += 1
+                raise
+            except BaseException:
+                await limiter.concurrency.release()
+                limiter.failures += 1
+                raise
+
+            latency = time.monotonic() - start
+            limiter.successes += 1
+            limiter.latency_seconds += latency
+            if on_latency is not None:
+                on_latency(latency)
+            await limiter.concurrency.release(latency=latency)
+            usage = getattr(result, "usage", None)
+            used = getattr(usage, "total_tokens", None)
+            if isinstance(used, int) and used < tokens:
+                limiter.tokens.refund(tokens - used)
+            return result
+
+    def stats(self) -> Dict:
+        """Per-model counters, bucket levels and concurrency limits."""
+        stats = {}
+        for name, limiter in self._models.items():
+            limiter.requests._refill()
+            limiter.tokens._refill()
+            stats[name] = {
+                "calls": limiter.calls,
+                "successes": limiter.successes,
+                "attempts": limiter.attempts,
+                "rate_limited": limiter.rate_limited,
+                "retries": limiter.retries,
+                "failures": limiter.failures,
+                "cancelled": limiter.cancelled,
+                "concurrency_limit": round(limiter.concurrency.limit, 2),
+                "in_flight": limiter.concurrency.in_flight,
+                "waiting": limiter.concurrency.waiting,
+                "concurrency_decreases": limiter.concurrency.decreases,
+                "requests_available": round(limiter.requests.level, 1),
+                "tokens_available": round(limiter.tokens.level),
+                "avg_wait_ms": round(1000 * limiter.wait_seconds / limiter.attempts, 1) if limiter.attempts else 0.0,
+                "avg_latency_ms": (
+                    round(1000 * limiter.latency_seconds / limiter.successes, 1) if limiter.successes else 0.0
+                )
+            }
+        return stats
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache for parsed LLM responses, with an optional SQLite tier.
+
+    The SQLite tier is bounded too: each write purges expired rows and
+    evicts the least recently used ones beyond max_disk_entries. With it
+    enabled, get and put block on SQLite, so async code calls them from a
+    thread.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400, max_entries: int = 1024,
+                 db_path: Optional[str] = None, max_disk_entries: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Lifetime of a cached response
+            max_entries: Responses held in memory before LRU eviction
+            db_path: SQLite file for a persistent tier (None keeps it in memory only)
+            max_disk_entries: Responses kept on disk before LRU eviction
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.method_hits: Dict[str, int] = {}
+
+        self._db = None
+        self._disk_count = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "last_used REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}
+            if "last_used" not in columns:
+                self._db.execute("ALTER TABLE responses ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires_at ON responses(expires_at)")
+            self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Build a cache configured from LLM_CACHE_* environment variables."""
+        return cls(
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+            max_entries=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+            db_path=os.getenv("LLM_CACHE_PATH") or None,
+            max_disk_entries=int(os.getenv("LLM_CACHE_DISK_SIZE", "10000"))
+        )
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+        """Hash the full request that determines a completion."""
+        prompt = json.dumps(messages, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(f"{model}\0{temperature}\0{max_tokens}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str, method: str = "") -> Optional[Any]:
+        """
+        Return a fresh copy of a cached response, or None.
+
+        Blocking (SQLite) when the disk tier is enabled.
+
+        Args:
+            key: Cache key from make_key
+            method: Analyzer method name, for per-method hit counts
+
+        Returns:
+            Parsed response, or None on a miss or expiry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] < now:
+                del self._memory[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at >= ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    entry = (row[1], row[0])
+                    self._remember(key, entry)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._memory.move_to_end(key)
+            self.hits += 1
+            self.method_hits[method] = self.method_hits.get(method, 0) + 1
+            # Stored serialized so callers can mutate what they get back
+            return json.loads(entry[1])
+
+    def put(self, key: str, value: Any):
+        """
+        Cache a parsed (JSON-serializable) response.
+
+        Blocking (SQLite) when the disk tier is enabled.
+
+        Args:
+            key: Cache key from make_key
+            value: Parsed response
+        """
+        now = time.time()
+        entry = (now + self.ttl_seconds, json.dumps(value))
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._disk_count -= self._db.execute("DELETE FROM responses WHERE expires_at < ?", (now,)).rowcount
+                exists = self._db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, entry[1], entry[0], now)
+                )
+                self._disk_count += 0 if exists else 1
+                overflow = self._disk_count - self.max_disk_entries
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._disk_count -= overflow
+                    self.evictions += overflow
+                self._db.commit()
+
+    def _remember(self, key: str, entry: tuple):
+        """Insert into the memory tier; caller must hold the lock."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._memory),
+            "disk_entries": self._disk_count,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hits_by_method": dict(self.method_hits)
+        }
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+                self._disk_count = 0
@@ -0,0 +1,215 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from embedding_service import EmbeddingService
+from singleflight import SingleFlight
+from token_budget import count_tokens, prepare_document
+from vector_store import VectorStore
+
+# A line starting with a bullet or list number begins a new chunk
+_BULLET = re.compile(r"^\s*(?:[•\-*–]|\d+[.)])\s+")
+
+# Job description sections whose lines are used as retrieval queries
+QUERY_MIN_PRIORITY = 0.5
+
+
+# Resume sections kept whenever they fit: short and relevant to any job
+PINNED_SECTIONS = ("skills",)
+
+# Lines up to this size directly above a bullet list (a role or project
+# title) are kept as context for those bullets rather than as chunks
+MAX_CONTEXT_TOKENS = 24
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A bullet or short paragraph of a document, with the heading and title it sits under."""
+    section: str
+    heading: str
+    context: str
+    text: str
+    tokens: int
+
+
+def chunk_document(text: str, kind: str, max_chunk_tokens: int = 80) -> List[Chunk]:
+    """
+    Split a document into bullet- or paragraph-sized chunks.
+
+    PDF text wraps lines mid-sentence, so consecutive lines are merged until
+    a bullet, a sentence end or max_chunk_tokens starts a new chunk. A short
+    line introducing a bullet list becomes the context of those bullets.
+
+    Args:
+        text: Normalized document text
+        kind: "resume" or "job"
+        max_chunk_tokens: Soft size limit per chunk
+
+    Returns:
+        Chunks in document order
+    """
+    chunks = []
+    for section in prepare_document(text, kind):
+        lines = section.text.split("\n")
+        heading = ""
+        if section.name != "preamble":
+            heading, lines = lines[0].strip(), lines[1:]
+
+        # (text, starts with a bullet) for each run of merged lines
+        pieces: List[Tuple[str, bool]] = []
+        current: List[str] = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if current and (
+                _BULLET.match(line)
+                or current[-1].endswith((".", ";", ":"))
+                or count_tokens(" ".join(current)) >= max_chunk_tokens
+            ):
+                pieces.append((" ".join(current), bool(_BULLET.match(current[0]))))
+                current = []
+            current.append(line)
+        if current:
+            pieces.append((" ".join(current), bool(_BULLET.match(current[0]))))
+
+        context = ""
+        for i, (body, bullet) in enumerate(pieces):
+            tokens = count_tokens(body)
+            if not bullet:
+                followed_by_bullets = i + 1 < len(pieces) and pieces[i + 1][1]
+                if followed_by_bullets and tokens <= MAX_CONTEXT_TOKENS:
+                    context = body
+                    continue
+                context = ""
+            chunks.append(Chunk(section.name, heading, context, body, tokens))
+    return chunks
+
+
+class SectionRetriever:
+    """Pick the resume chunks most relevant to a job description's requirements."""
+
+    def __init__(self, embedding_service: EmbeddingService, chunks_per_requirement: int = 2,
+                 max_requirements: int = 25, max_documents: int = 64):
+        """
+        Initialize the retriever.
+
+        Args:
+            embedding_service: Service used to embed chunks and requirements
+            chunks_per_requirement: Resume chunks retrieved for each requirement
+            max_requirements: Job description lines used as queries
+            max_documents: Per-document indexes kept in memory (LRU)
+        """
+        self.embedding_service = embedding_service
+        self.chunks_per_requirement = chunks_per_requirement
+        self.max_requirements = max_requirements
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, Tuple[List[Chunk], VectorStore]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Prompts built concurrently for one resume share a single index build
+        self._building = SingleFlight()
+
+    async def _document_index(self, text: str) -> Tuple[List[Chunk], Optional[VectorStore]]:
+        """Chunks of a resume and a VectorStore over them (None if there are none), built once per document."""
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            entry = self._documents.get(key)
+            if entry is not None:
+                self._documents.move_to_end(key)
+                return entry
+        return await self._building.do(key, lambda: self._build_index(key, text), copy_result=False)
+
+    async def _build_index(self, key: str, text: str) -> Tuple[List[Chunk], Optional[VectorStore]]:
+        """Chunk, embed and index a resume, then keep it in the LRU."""
+        chunks = chunk_document(text, "resume")
+        if not chunks:
+            return chunks, None
+        vectors = await self.embedding_service.generate_embeddings([chunk.text for chunk in chunks])
+        store = VectorStore(dimension=len(vectors[0]))
+        store.add_vectors(vectors, [chunk.text for chunk in chunks], [{"position": i} for i in range(len(chunks))])
+
+        with self._lock:
+            self._documents[key] = (chunks, store)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return chunks, store
+
+    def _requirements(self, job_description: str) -> List[str]:
+        """Job description lines to retrieve for: requirements, responsibilities and the like."""
+        chunks = chunk_document(job_description, "job")
+        priorities = {section.name: section.priority for section in prepare_document(job_description, "job")}
+        queries = [chunk.text for chunk in chunks if priorities.get(chunk.section, 0) >= QUERY_MIN_PRIORITY]
+        return (queries or [chunk.text for chunk in chunks])[:self.max_requirements]
+
+    async def select(self, resume_text: str, job_description: str, max_tokens: int) -> str:
+        """
+        Build a resume excerpt from the chunks that best match the job's requirements.
+
+        A resume that fits in max_tokens is returned whole. Otherwise each
+        requirement retrieves its nearest chunks; the union, plus the pinned
+        sections, is ranked by best similarity and taken until max_tokens,
+        any budget left is filled with the other chunks in document order,
+        and the result is returned in document order under the original
+        headings and titles.
+
+        Args:
+            resume_text: Normalized resume text
+            job_description: Normalized job description
+            max_tokens: Token budget for the excerpt
+
+        Returns:
+            Resume excerpt
+        """
+        if not resume_text or count_tokens(resume_text) <= max_tokens:
+            return resume_text
+        requirements = self._requirements(job_description)
+        if not requirements:
+            return resume_text
+
+        chunks, store = await self._document_index(resume_text)
+        if not chunks:
+            return resume_text
+        query_vectors = await self.embedding_service.generate_embeddings(requirements)
+
+        # Pinned sections rank above every retrieved chunk
+        best: Dict[int, float] = {i: 2.0 for i, chunk in enumerate(chunks) if chunk.section in PINNED_SECTIONS}
+        for vector in query_vectors:
+            for hit in store.search_candidates(vector, k=self.chunks_per_requirement):
+                position = hit["position"]
+                best[position] = max(best.get(position, -1.0), hit["score"])
+
+        # Best matches first, then the rest of the resume in document order,
+        # until the budget is spent; each heading and title is counted once
+        ranked = sorted(best, key=best.get, reverse=True)
+        ranked += [position for position in range(len(chunks)) if position not in best]
+        selected = []
+        shown = set()
+        texts = set()
+        used = 0
+        for position in ranked:
+            chunk = chunks[position]
+            if chunk.text in texts:
+                continue
+            labels = [label for label in (chunk.heading, chunk.context) if label and label not in shown]
+            cost = chunk.tokens + sum(count_tokens(label) for label in labels)
+            if used + cost > max_tokens:
+                continue
+            selected.append(position)
+            texts.add(chunk.text)
+            shown.update(labels)
+            used += cost
+
+        lines = []
+        heading = context = None
+        for position in sorted(selected):
+            chunk = chunks[position]
+            if chunk.heading and chunk.heading != heading:
+                lines.append(chunk.heading)
+            if chunk.context and (chunk.context != context or chunk.heading != heading):
+                lines.append(chunk.context)
+            heading, context = chunk.heading, chunk.context
+            lines.append(chunk.text)
+        return "\n".join(lines)
@@ -0,0 +1,166 @@
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class ResumeSession:
+    """Everything derived from one /api/analyze call that follow-up endpoints reuse."""
+    resume_text: str
+    job_description: str
+    resume_embedding: List[float]
+    job_embedding: List[float]
+    similarity_score: float
+    filename: str = ""
+
+
+class SessionStore:
+    """
+    Resume sessions with sliding TTL and a size bound.
+
+    Without db_path sessions live in this process's memory, so follow-up
+    calls only find them on the worker that ran /api/analyze (one uvicorn
+    worker, or sticky routing). With db_path they are kept in SQLite, where
+    every worker sharing the file can serve them; create and get then
+    block on SQLite, so async code calls them from a thread.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_sessions: int = 1000, db_path: Optional[str] = None):
+        """
+        Initialize the store.
+
+        Args:
+            ttl_seconds: Idle time after which a session expires
+            max_sessions: Sessions kept before the least recently used is evicted
+            db_path: SQLite file shared by every worker (None keeps sessions in memory)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, expires_at REAL NOT NULL, data TEXT NOT NULL, "
+                "resume_embedding BLOB NOT NULL, job_embedding BLOB NOT NULL)"
+            )
+            # With a fixed TTL, expiry order is also least-recently-used order
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+            self._db.commit()
+
+    def create(self, session: ResumeSession) -> str:
+        """
+        Store a session and return its opaque ID.
+
+        Args:
+            session: Parsed resume data
+
+        Returns:
+            resume_id to hand back to the client
+        """
+        resume_id = secrets.token_urlsafe(16)
+        if self._db is not None:
+            self._create_stored(resume_id, session)
+            return resume_id
+        with self._lock:
+            self._purge_expired()
+            self._sessions[resume_id] = (time.monotonic() + self.ttl_seconds, session)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return resume_id
+
+    def get(self, resume_id: str) -> Optional[ResumeSession]:
+        """
+        Look up a session, extending its TTL.
+
+        Args:
+            resume_id: ID returned by create
+
+        Returns:
+            The session, or None if it is unknown or expired
+        """
+        if self._db is not None:
+            return self._get_stored(resume_id)
+        with self._lock:
+            entry = self._sessions.get(resume_id)
+            if entry is None:
+                return None
+            expires_at, session = entry
+            if expires_at < time.monotonic():
+                del self._sessions[resume_id]
+                return None
+            self._sessions[resume_id] = (time.monotonic() + self.ttl_seconds, session)
+            self._sessions.move_to_end(resume_id)
+            return session
+
+    def _create_stored(self, resume_id: str, session: ResumeSession):
+        """Insert a session into SQLite, dropping expired and least recently used ones."""
+        now = time.time()
+        data = {
+            "resume_text": session.resume_text,
+            "job_description": session.job_description,
+            "similarity_score": session.similarity_score,
+            "filename": session.filename,
+        }
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+            self._db.execute(
+                "INSERT INTO sessions (id, expires_at, data, resume_embedding, job_embedding) VALUES (?, ?, ?, ?, ?)",
+                (resume_id, now + self.ttl_seconds, json.dumps(data),
+                 np.asarray(session.resume_embedding, dtype=np.float32).tobytes(),
+                 np.asarray(session.job_embedding, dtype=np.float32).tobytes())
+            )
+            overflow = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY expires_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+            self._db.commit()
+
+    def _get_stored(self, resume_id: str) -> Optional[ResumeSession]:
+        """Read a live session from SQLite and slide its expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, resume_embedding, job_embedding FROM sessions WHERE id = ? AND expires_at >= ?",
+                (resume_id, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE sessions SET expires_at = ? WHERE id = ?", (now + self.ttl_seconds, resume_id))
+            self._db.commit()
+        data, resume_embedding, job_embedding = row
+        return ResumeSession(
+            resume_embedding=np.frombuffer(resume_embedding, dtype=np.float32).tolist(),
+            job_embedding=np.frombuffer(job_embedding, dtype=np.float32).tolist(),
+            **json.loads(data)
+        )
+
+    def _purge_expired(self):
+        """Drop expired sessions from the old end; caller must hold the lock."""
+        now = time.monotonic()
+        while self._sessions:
+            oldest_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at >= now:
+                break
+            del self._sessions[oldest_id]
+
+    def __len__(self) -> int:
+        if self._db is not None:
+            with self._lock:
+                return self._db.execute(
+                    "SELECT COUNT(*) FROM sessions WHERE expires_at >= ?", (time.time(),)
+                ).fetchone()[0]
+        return len(self._sessions)
@@ -0,0 +1,107 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a content key into one upstream call."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], copy_result: bool = True,
+                 cancel_abandoned: bool = False) -> Any:
+        """
+        Run fn once for every concurrent caller using the same key.
+
+        The call runs as its own task, so a caller that disconnects does not
+        cancel it for the others still waiting.
+
+        Args:
+            key: Content key identifying identical requests
+            fn: Zero-argument coroutine function performing the upstream call
+            copy_result: Hand each caller its own deep copy of the result
+            cancel_abandoned: Cancel the call once every caller waiting for
+                it has been cancelled (e.g. by a deadline)
+
+        Returns:
+            Result of fn (or the exception it raised)
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.followers += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if cancel_abandoned and self._waiters[key] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+        return copy.deepcopy(result) if copy_result else result
+
+    def claim(self, keys: Iterable[str]) -> Tuple[List[str], Dict[str, asyncio.Future]]:
+        """
+        Split keys into ones the caller must fetch and ones already in flight.
+
+        Every owned key must later be passed to settle(), even on failure.
+
+        Args:
+            keys: Content keys the caller needs
+
+        Returns:
+            (owned keys, {key: future to await} for keys someone else is fetching)
+        """
+        loop = asyncio.get_running_loop()
+        owned, waiting = [], {}
+        for key in keys:
+            future = self._inflight.get(key)
+            if future is None:
+                self.leaders += 1
+                self._inflight[key] = loop.create_future()
+                owned.append(key)
+            else:
+                self.followers += 1
+                waiting[key] = future
+        return owned, waiting
+
+    def settle(self, key: str, result: Any = None, error: BaseException = None):
+        """Publish the outcome for a claimed key and release it."""
+        future = self._inflight.pop(key, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            # Mark retrieved so nobody-was-waiting failures don't warn
+            future.exception()
+        else:
+            future.set_result(result)
+
+    def _finish(self, key: str, task: asyncio.Future):
+        """Release a finished do() task."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        """Return leader/follower counters."""
+        total = self.leaders + self.followers
+        return {
+            "upstream_calls": self.leaders,
+            "coalesced_calls": self.followers,
+            "coalesced_rate": round(self.followers / total, 4) if total else 0.0,
+            "in_flight": len(self._inflight)
+        }
@@ -0,0 +1,303 @@
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from token_budget import prepare_document
+
+# Canonical skill -> synonyms and spellings. The canonical name always
+# matches too; matching is case-insensitive except for EXACT_CASE terms.
+# Ordinary words that only sometimes mean a skill ("monitoring",
+# "containers", "analytics") are left out: a missed synonym costs less
+# than crediting every resume that uses the word.
+SKILLS: Dict[str, Tuple[str, ...]] = {
+    # Languages
+    "Python": ("python3",),
+    "Java": (),
+    "JavaScript": ("JS", "ecmascript", "es6"),
+    "TypeScript": ("TS",),
+    "Go": ("golang",),
+    "Rust": (),
+    "C++": ("cpp",),
+    "C#": ("csharp", "c sharp"),
+    "Ruby": (),
+    "PHP": (),
+    "Kotlin": (),
+    "Swift": (),
+    "Scala": (),
+    "SQL": (),
+    "Bash": ("shell scripting", "shell script"),
+    "HTML": ("html5",),
+    "CSS": ("css3", "sass", "scss"),
+    # Frameworks and libraries
+    "React": ("react.js", "reactjs"),
+    "Angular": ("angularjs", "angular.js"),
+    "Vue.js": ("vue", "vuejs"),
+    "Next.js": ("nextjs",),
+    "Node.js": ("nodejs", "node js"),
+    "Express": ("express.js", "expressjs"),
+    "Django": (),
+    "Flask": (),
+    "FastAPI": ("fast api",),
+    "Spring": ("spring boot", "springboot", "spring framework"),
+    "Ruby on Rails": ("Rails", "ror"),
+    ".NET": ("dotnet", "asp.net", ".net core"),
+    "GraphQL": (),
+    "REST": ("rest api", "rest apis", "restful", "restful api", "restful apis"),
+    "gRPC": (),
+    "Microservices": ("microservice", "micro-services", "service oriented architecture", "soa"),
+    # Data and ML
+    "PostgreSQL": ("postgres", "psql"),
+    "MySQL": (),
+    "SQL Server": ("mssql", "ms sql"),
+    # Not plain "Oracle", which is as often the employer
+    "Oracle Database": ("oracle db", "pl sql", "plsql"),
+    "MongoDB": ("mongo",),
+    "Redis": (),
+    "Elasticsearch": ("elastic search", "opensearch", "elk"),
+    "Cassandra": (),
+    "DynamoDB": ("dynamo db",),
+    "Snowflake": (),
+    "BigQuery": ("big query",),
+    "Kafka": ("apache kafka",),
+    "RabbitMQ": ("rabbit mq",),
+    "Spark": ("apache spark", "pyspark"),
+    "Hadoop": (),
+    "Airflow": ("apache airflow",),
+    "dbt": (),
+    "ETL": ("elt", "data pipelines", "data pipeline"),
+    "Pandas": (),
+    "NumPy": (),
+    "scikit-learn": ("sklearn", "scikit learn"),
+    "TensorFlow": (),
+    "PyTorch": ("torch",),
+    "Machine Learning": ("ML",),
+    "Deep Learning": (),
+    "NLP": ("natural language processing",),
+    "Computer Vision": (),
+    "LLMs": ("llm", "large language models", "large language model", "generative ai", "genai"),
+    "Data Analysis": ("data analytics",),
+    "Statistics": ("statistical analysis", "statistical modeling"),
+    "Tableau": (),
+    "Power BI": ("powerbi",),
+    "Excel": (),
+    # Cloud and infrastructure
+    "AWS": ("amazon web services", "ec2", "s3", "Lambda", "eks", "ecs"),
+    "Azure": ("microsoft azure",),
+    "GCP": ("google cloud", "google cloud platform", "gke"),
+    "Docker": ("dockerfile", "docker compose"),
+    "Kubernetes": ("k8s", "helm"),
+    "Terraform": (),
+    "Ansible": (),
+    # Not plain "Chef" ("Head Chef")
+    "Chef Infra": ("opscode chef", "chef cookbooks"),
+    "Puppet": (),
+    "CloudFormation": ("cloud formation",),
+    "Infrastructure as Code": ("iac",),
+    "Linux": ("unix",),
+    "Nginx": (),
+    "Serverless": (),
+    "CI/CD": ("ci cd", "continuous integration", "continuous delivery", "continuous deployment"),
+    "Jenkins": (),
+    "GitHub Actions": (),
+    "GitLab CI": ("gitlab",),
+    "Git": ("github",),
+    "Observability": ("opentelemetry", "distributed tracing"),
+    "Prometheus": (),
+    "Grafana": (),
+    "Datadog": (),
+    "Networking": ("tcp ip", "dns", "load balancing"),
+    "Security": ("cybersecurity", "appsec", "application security", "owasp"),
+    "OAuth": ("oauth2", "openid connect", "oidc", "sso"),
+    # Practices
+    "Testing": ("unit testing", "integration testing", "automated testing", "test automation", "tdd"),
+    "System Design": ("distributed systems",),
+    "Agile": ("scrum", "kanban", "sprint planning"),
+    "Code Review": ("code reviews",),
+    "Mobile Development": ("ios", "android", "react native", "flutter"),
+    "Product Management": ("roadmapping", "product roadmap"),
+    "Project Management": ("pmp", "stakeholder management"),
+    "Mentoring": ("mentor", "mentored", "mentorship"),
+    "Leadership": ("team lead", "tech lead", "led a team", "people management"),
+    "Communication": ("written communication", "verbal communication", "presentation skills"),
+}
+
+# Spellings that are ordinary words in lower case ("go", "react to", "the
+# rest of") and only count as skills written exactly like this. Single
+# letters (C, R) are left out: "C-level" and "R&D" would match them.
+EXACT_CASE = frozenset({"Go", "React", "REST", "Spring", "Excel", "Puppet", "Swift", "Rust", "Rails",
+                        "Express", "Spark", "Lambda", "TS", "JS", "ML"})
+
+# Capitalised, those words still start phrases and dates ("Go-to-market",
+# "Spring 2021"); an EXACT_CASE term directly followed by a hyphen or by a
+# number is not a skill
+_EXACT_CASE_STOP = re.compile(r"-|\s*\d")
+
+# A skill token: letters/digits with the symbols skills use (C++, C#,
+# Node.js), or a dotted name (.NET). A trailing sentence period is not kept.
+_TOKEN = re.compile(r"[A-Za-z0-9+#]+(?:\.[A-Za-z0-9+#]+)*|\.[A-Za-z]+")
+
+# Trie key holding the skills that end at a node
+_END = ""
+
+
+def tokenize(text: str) -> List[str]:
+    """Skill tokens of text, in original case."""
+    return _TOKEN.findall(text)
+
+
+class SkillMatcher:
+    """
+    Deterministic skill extraction over a synonym taxonomy.
+
+    Every spelling is tokenized into a trie keyed by lower-case tokens, so a
+    document is matched in one pass over its tokens: at each position the
+    trie is walked until no child matches, which finds every multi-word
+    skill ("continuous integration", "spring boot") without regex
+    alternation. find and job_skills are memoised per text, so the same
+    resume or job description is only scanned once.
+    """
+
+    def __init__(self, skills: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Initialize the matcher.
+
+        Args:
+            skills: {canonical name: synonyms}; defaults to SKILLS
+        """
+        self.skills = dict(skills if skills is not None else SKILLS)
+        self._root: Dict = {}
+        for canonical, synonyms in self.skills.items():
+            for term in (canonical, *synonyms):
+                self._add(term, canonical)
+        self.find = lru_cache(maxsize=512)(self._find)
+        self.job_skills = lru_cache(maxsize=256)(self._job_skills)
+
+    @classmethod
+    def from_env(cls) -> "SkillMatcher":
+        """Build a matcher, merging the JSON file at SKILL_TAXONOMY_PATH ({skill: [synonyms]}) if set."""
+        skills = dict(SKILLS)
+        path = os.getenv("SKILL_TAXONOMY_PATH")
+        if path:
+            with open(path) as handle:
+                for canonical, synonyms in json.load(handle).items():
+                    skills[canonical] = tuple(skills.get(canonical, ())) + tuple(synonyms)
+        return cls(skills)
+
+    def _add(self, term: str, canonical: str):
+        """Insert one spelling of a skill into the trie."""
+        tokens = tokenize(term)
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token.lower(), {})
+        exact = tuple(tokens) if term in EXACT_CASE else None
+        node.setdefault(_END, []).append((canonical, exact))
+
+    def _find(self, text: str) -> Dict[str, int]:
+        """Mentions of each skill in text, in order of first appearance."""
+        matches = list(_TOKEN.finditer(text))
+        tokens = [match.group() for match in matches]
+        lowered = [token.lower() for token in tokens]
+        counts: Dict[str, int] = {}
+        root = self._root
+        n = len(tokens)
+
+        for i in range(n):
+            node = root.get(lowered[i])
+            j = i + 1
+            while node is not None:
+                for canonical, exact in node.get(_END, ()):
+                    if exact is None or (tuple(tokens[i:j]) == exact
+                                         and not _EXACT_CASE_STOP.match(text, matches[j - 1].end())):
+                        counts[canonical] = counts.get(canonical, 0) + 1
+                if j == n:
+                    break
+                node = node.get(lowered[j])
+                j += 1
+        return counts
+
+    def canonical(self, name: str) -> Optional[str]:
+        """
+        Canonical skill for a name typed by a user ("k8s", "golang", "go").
+
+        Unlike find, the whole name must be one spelling of a skill and case
+        is ignored, since a lone skill name is never an ordinary word.
+
+        Args:
+            name: Skill name
+
+        Returns:
+            Canonical name, or None if the skill is unknown
+        """
+        node = self._root
+        for token in tokenize(name):
+            node = node.get(token.lower())
+            if node is None:
+                return None
+        ends = node.get(_END) if node is not self._root else None
+        return ends[0][0] if ends else None
+
+    def _job_skills(self, job_description: str) -> Dict[str, float]:
+        """
+        Skills a job asks for, weighted by where they are mentioned.
+
+        The weight is the priority of the most important section naming the
+        skill (requirements 1.0 ... benefits 0.1, see token_budget), so a
+        tool named only in the company blurb counts for little.
+
+        Args:
+            job_description: Normalized job description
+
+        Returns:
+            {skill: weight}, most important first
+        """
+        weights: Dict[str, float] = {}
+        for section in prepare_document(job_description, "job"):
+            for skill in self.find(section.text):
+                weights[skill] = max(weights.get(skill, 0.0), section.priority)
+        order = {skill: i for i, skill in enumerate(self.find(job_description))}
+        return dict(sorted(weights.items(), key=lambda item: (-item[1], order.get(item[0], 0))))
+
+    def coverage(self, resume_skills: Iterable[str], job_description: str) -> Optional[int]:
+        """
+        Weighted share (0-100) of the job's skills present in a resume.
+
+        Args:
+            resume_skills: Canonical skills the resume has
+            job_description: Normalized job description
+
+        Returns:
+            Percentage, or None if the job names no known skills
+        """
+        weights = self.job_skills(job_description)
+        total = sum(weights.values())
+        if not total:
+            return None
+        have = set(resume_skills)
+        return round(100 * sum(w for skill, w in weights.items() if skill in have) / total)
+
+    def keyword_fields(self, resume_text: str, job_description: str) -> Dict:
+        """
+        The keyword fields of an AnalysisResponse.
+
+        Args:
+            resume_text: Normalized resume text
+            job_description: Normalized job description
+
+        Returns:
+            keywords_found, keywords_missing and keyword_density_score, or
+            an empty dict if the job names no known skills
+        """
+        resume_skills = self.find(resume_text)
+        score = self.coverage(resume_skills, job_description)
+        if score is None:
+            return {}
+        job = self.job_skills(job_description)
+        return {
+            "keywords_found": [skill for skill in job if skill in resume_skills],
+            "keywords_missing": [skill for skill in job if skill not in resume_skills],
+            "keyword_density_score": score,
+        }
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import httpx
+from openai import AsyncOpenAI
+
+from rate_limiter import RateLimiter
+
+MODEL = "gpt-4o-mini"
+
+
+class Upstream:
+    """Stub chat completions endpoint that answers 429 beyond `capacity` requests in flight."""
+
+    def __init__(self, capacity: int, delay: float = 0.01):
+        self.capacity = capacity
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.throttled = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.capacity is not None and self.in_flight >= self.capacity:
+            self.throttled += 1
+            return httpx.Response(429, json={"error": {"message": "Rate limit reached", "type": "requests",
+                                                       "code": "rate_limit_exceeded"}})
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return httpx.Response(200, json={
+            "id": "stub", "object": "chat.completion", "created": 0, "model": MODEL,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": json.dumps({"ok": True})}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        })
+
+
+async def burst(limiter: RateLimiter, client: AsyncOpenAI, calls: int):
+    await asyncio.gather(*[
+        limiter.call(MODEL, 20, lambda: client.chat.completions.create(
+            model=MODEL, messages=[{"role": "user", "content": "hi"}]
+        ))
+        for _ in range(calls)
+    ])
+
+
+def test_concurrency_backs_off_on_429_and_recovers():
+    async def scenario():
+        upstream = Upstream(capacity=4)
+        client = AsyncOpenAI(api_key="stub", base_url="http://stub/v1", max_retries=0,
+                             http_client=httpx.AsyncClient(transport=httpx.MockTransport(upstream)))
+        limiter = RateLimiter(limits={"default": (1e6, 1e9)}, max_retries=20, backoff_base=0.005,
+                              backoff_max=0.05, initial_concurrency=32, max_concurrency=64)
+        concurrency = limiter.model(MODEL).concurrency
+        concurrency.cooldown = 0.02
+
+        # Overloaded: the limit is halved until it fits under the upstream's capacity
+        await burst(limiter, client, 200)
+        stats = limiter.stats()[MODEL]
+        assert upstream.throttled > 0
+        assert stats["rate_limited"] == upstream.throttled
+        assert stats["failures"] == 0 and stats["successes"] == 200
+        assert concurrency.decreases > 0
+        backed_off = concurrency.limit
+        assert backed_off < 32
+
+        # Capacity restored: successes grow the limit again
+        upstream.capacity = None
+        upstream.throttled = 0
+        await burst(limiter, client, 400)
+        assert upstream.throttled == 0
+        assert concurrency.limit > backed_off + 5
+        assert upstream.peak > 4
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+import pytest
+
+from skill_matcher import SkillMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return SkillMatcher()
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Led the Spring 2021 hiring round", "Spring"),
+    ("Owned the Go-to-market plan for two launches", "Go"),
+    ("Senior Analyst at Oracle, 2018-2022", "Oracle Database"),
+    ("Head Chef at a 60-cover restaurant", "Chef Infra"),
+    ("Coordinated shipping containers through the port", "Docker"),
+    ("Responsible for patient monitoring on the night shift", "Observability"),
+    ("Reported web analytics to the marketing team", "Data Analysis"),
+    ("Exported hcl colour values for the design system", "Terraform"),
+])
+def test_ordinary_words_are_not_skills(matcher, text, skill):
+    assert skill not in matcher.find(text)
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Built services in Go and Python", "Go"),
+    ("Java developer using Spring Boot", "Spring"),
+    ("Backend in Spring, deployed on Kubernetes", "Spring"),
+    ("Wrote PL/SQL procedures on Oracle DB", "Oracle Database"),
+    ("Automated servers with Ansible and Opscode Chef", "Chef Infra"),
+    ("Maintained Rails apps and a Dockerfile per service", "Ruby on Rails"),
+    ("Maintained Rails apps and a Dockerfile per service", "Docker"),
+    ("Instrumented services with OpenTelemetry", "Observability"),
+    ("Kubernetes (k8s), Terraform, GitHub Actions", "Terraform"),
+])
+def test_skills_still_match(matcher, text, skill):
+    assert skill in matcher.find(text)
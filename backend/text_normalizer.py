@@ -0,0 +1,70 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+
+def _build_translation_table() -> dict:
+    """Map every character that needs rewriting to its canonical form ("" drops it)."""
+    table = {}
+
+    # Control characters are dropped; whitespace controls are left to str.split()
+    for code in list(range(0x20)) + [0x7f]:
+        if not chr(code).isspace():
+            table[chr(code)] = ""
+
+    # Invisible characters left behind by PDF exporters
+    for char in "\u00ad\u200b\u200c\u200d\u2060\ufeff":
+        table[char] = ""
+
+    # Typographic punctuation -> ASCII equivalents
+    for char in "\u2018\u2019\u201a\u201b\u2032":
+        table[char] = "'"
+    for char in "\u201c\u201d\u201e\u201f\u2033":
+        table[char] = '"'
+    for char in "\u2010\u2011\u2012\u2013\u2014\u2015\u2212":
+        table[char] = "-"
+    table["\u2026"] = "..."
+
+    # Bullet glyphs (including Symbol-font private-use bullets) -> one bullet
+    for char in "\u2022\u2023\u2043\u2219\u25aa\u25ab\u25cf\u25cb\u25e6\u25a0\u25a1\u27a2\u2794\uf0a7\uf0b7\uf0d8\uf076":
+        table[char] = "\u2022"
+
+    # Ligatures produced by PDF text extraction
+    for char in "\ufb00\ufb01\ufb02\ufb03\ufb04\ufb05\ufb06":
+        table[char] = unicodedata.normalize("NFKC", char)
+
+    return table
+
+
+_TRANSLATION_TABLE = _build_translation_table()
+
+# One compiled character class over the table keys: the scan only stops on
+# characters that actually need rewriting, which are rare in real resumes
+_SPECIAL_CHARS = re.compile("[%s]" % re.escape("".join(_TRANSLATION_TABLE)))
+
+
+def _translate(match: re.Match) -> str:
+    return _TRANSLATION_TABLE[match.group()]
+
+
+@lru_cache(maxsize=256)
+def normalize_text(text: str) -> str:
+    """
+    Canonicalise resume / job description text.
+
+    Special characters are rewritten from a precompiled table in one regex
+    scan; whitespace is then collapsed with str.splitlines/str.split, which
+    understand every Unicode space and line separator. Unlike a character
+    whitelist this keeps every printable character, so names (José,
+    Łukasz), skills (C++, C#, CI/CD, R&D) and apostrophes survive. The
+    function is idempotent and memoised, so re-normalising a document that
+    was already processed is free.
+
+    Args:
+        text: Raw extracted or user-supplied text
+
+    Returns:
+        Text with canonical punctuation and bullets, single spaces and single line breaks
+    """
+    text = _SPECIAL_CHARS.sub(_translate, text)
+    return "\n".join(filter(None, (" ".join(line.split()) for line in text.splitlines())))
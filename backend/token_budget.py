@@ -0,0 +1,293 @@
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+# Tokenizer of the gpt-4o model family
+ENCODING_NAME = "o200k_base"
+
+# Sections smaller than this after allocation are dropped rather than kept
+# as a meaningless fragment
+MIN_SECTION_TOKENS = 16
+
+# (section, heading keywords) checked in order; the first match names the section
+RESUME_SECTIONS = (
+    ("skills", ("skill", "technolog", "tools", "competenc", "tech stack", "expertise")),
+    ("experience", ("experience", "employment", "work history", "career history", "professional background")),
+    ("projects", ("project",)),
+    ("summary", ("summary", "profile", "objective", "about me")),
+    ("certifications", ("certific", "licen", "award", "achievement")),
+    ("education", ("education", "academic", "degree")),
+)
+JOB_SECTIONS = (
+    ("preferred", ("preferred", "nice to have", "bonus")),
+    ("benefits", ("benefit", "perks", "compensation", "salary", "we offer", "equal opportunity")),
+    ("responsibilities", ("responsibilit", "what you'll do", "what you will do", "duties", "the role", "day to day")),
+    ("requirements", ("requirement", "qualification", "must have", "what you", "you have", "you bring", "skills", "experience")),
+    ("company", ("about", "who we are", "company", "mission", "culture")),
+)
+
+# How much of the budget each section deserves relative to the others.
+# "preamble" is the text before the first heading (name/contact details in a
+# resume, title and intro in a job description).
+RESUME_PRIORITIES = {
+    "skills": 1.0, "experience": 0.9, "projects": 0.6, "summary": 0.5,
+    "certifications": 0.4, "education": 0.4, "preamble": 0.3, "other": 0.3,
+}
+JOB_PRIORITIES = {
+    "requirements": 1.0, "responsibilities": 0.8, "preferred": 0.7, "preamble": 0.5,
+    "other": 0.4, "company": 0.15, "benefits": 0.1,
+}
+
+_KINDS = {
+    "resume": (RESUME_SECTIONS, RESUME_PRIORITIES),
+    "job": (JOB_SECTIONS, JOB_PRIORITIES),
+}
+
+# Per-endpoint input budgets in tokens (~ the character slices they replace / 4)
+DEFAULT_BUDGETS: Dict[str, Dict[str, int]] = {
+    "analyze_match": {"resume": 625, "job": 625},
+    "generate_interview_questions": {"job": 375},
+    "generate_mock_interview_questions": {"resume": 375, "job": 375},
+    "analyze_voice_answer": {"resume": 200, "job": 200},
+    "check_consistency": {"resume": 500},
+    "recruiter_lens_analysis": {"resume": 300, "job": 150},
+    "career_switch_analysis": {"resume": 250},
+    "simulate_whatif": {"job": 150},
+}
+
+_HEADING_CHARS = re.compile(r"[^a-z' ]+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """The tiktoken encoding, or None if tiktoken or its data is unavailable."""
+    if tiktoken is None:
+        print("tiktoken not installed, estimating token counts from characters")
+        return None
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        print(f"tiktoken unavailable, estimating token counts from characters: {str(e)}")
+        return None
+
+
+def load_encoding() -> bool:
+    """
+    Load the tokenizer ahead of the first request.
+
+    tiktoken downloads the BPE file on first use (unless it is in
+    TIKTOKEN_CACHE_DIR), which blocks; the server calls this from a thread
+    at startup so no request waits for it.
+
+    Returns:
+        True if token counts are exact, False if they are estimated
+    """
+    return _encoding() is not None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text (estimated at ~4 characters per token without tiktoken)."""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1 if text else 0
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass(frozen=True)
+class Section:
+    """A titled part of a document with its token count."""
+    name: str
+    text: str
+    tokens: int
+    priority: float
+    token_ids: Optional[Tuple[int, ...]] = None
+
+    def truncate(self, max_tokens: int) -> str:
+        """Section text cut to max_tokens, at a line or word boundary where possible."""
+        if max_tokens >= self.tokens:
+            return self.text
+        if self.token_ids is not None:
+            text = _encoding().decode(list(self.token_ids[:max_tokens]))
+        else:
+            text = self.text[:max_tokens * 4]
+        cut = text.rfind("\n")
+        if cut <= len(text) // 2:
+            cut = text.rfind(" ")
+        if cut > len(text) // 2:
+            text = text[:cut]
+        return text.rstrip()
+
+
+def _classify_heading(line: str, sections: Sequence[Tuple[str, Tuple[str, ...]]]) -> Optional[str]:
+    """Section name if line looks like a heading, else None."""
+    stripped = line.strip().rstrip(":")
+    # Headings are short and carry no figures or sentence punctuation
+    if not stripped or len(stripped) > 40 or stripped.endswith(".") or any(c.isdigit() for c in stripped):
+        return None
+    words = _HEADING_CHARS.sub(" ", stripped.lower()).strip()
+    if not words:
+        return None
+    for name, keywords in sections:
+        if any(keyword in words for keyword in keywords):
+            # Longer lines mentioning a keyword are content, not headings
+            if len(words.split()) <= 4:
+                return name
+    if stripped.isupper() and len(stripped) <= 30:
+        return "other"
+    return None
+
+
+@lru_cache(maxsize=256)
+def prepare_document(text: str, kind: str) -> Tuple[Section, ...]:
+    """
+    Split a document into prioritized sections and tokenize each once.
+
+    Cached per (text, kind), so follow-up calls for the same resume or job
+    description reuse the split and token counts.
+
+    Args:
+        text: Normalized document text
+        kind: "resume" or "job"
+
+    Returns:
+        Sections in document order
+    """
+    section_keywords, priorities = _KINDS[kind]
+    encoding = _encoding()
+
+    parts: List[Tuple[str, List[str]]] = [("preamble", [])]
+    for line in text.split("\n"):
+        name = _classify_heading(line, section_keywords)
+        if name is not None:
+            parts.append((name, [line]))
+        else:
+            parts[-1][1].append(line)
+
+    sections = []
+    for name, lines in parts:
+        body = "\n".join(lines).strip()
+        if not body:
+            continue
+        token_ids = tuple(encoding.encode(body, disallowed_special=())) if encoding is not None else None
+        tokens = len(token_ids) if token_ids is not None else len(body) // 4 + 1
+        sections.append(Section(name, body, tokens, priorities.get(name, priorities["other"]), token_ids))
+    return tuple(sections)
+
+
+def allocate(sections: Sequence[Section], budget: int) -> List[int]:
+    """
+    Split a token budget across sections in proportion to their priority.
+
+    Water-filling: a section that needs less than its share is kept whole
+    and the rest is shared among the others, so short high-value sections
+    (skills, requirements) survive intact and long ones absorb the cuts.
+
+    Args:
+        sections: Document sections
+        budget: Total tokens available
+
+    Returns:
+        Tokens allotted to each section, in the same order
+    """
+    allotted = [0] * len(sections)
+    open_sections = [i for i, section in enumerate(sections) if section.priority > 0]
+    remaining = budget
+
+    while open_sections and remaining > 0:
+        weight = sum(sections[i].priority for i in open_sections)
+        satisfied = [i for i in open_sections if sections[i].tokens <= remaining * sections[i].priority / weight]
+        if not satisfied:
+            for i in open_sections:
+                allotted[i] = int(remaining * sections[i].priority / weight)
+            break
+        for i in satisfied:
+            allotted[i] = sections[i].tokens
+            remaining -= sections[i].tokens
+        open_sections = [i for i in open_sections if i not in satisfied]
+
+    return allotted
+
+
+def fit_to_budget(text: str, kind: str, max_tokens: int) -> str:
+    """
+    Shrink a document to roughly max_tokens, keeping its most valuable sections.
+
+    Args:
+        text: Normalized document text
+        kind: "resume" or "job"
+        max_tokens: Token budget
+
+    Returns:
+        The text unchanged if it fits, otherwise its sections trimmed by
+        priority and joined in their original order
+    """
+    if not text:
+        return text
+    sections = prepare_document(text, kind)
+    if sum(section.tokens for section in sections) <= max_tokens:
+        return text
+
+    kept = []
+    for section, tokens in zip(sections, allocate(sections, max_tokens)):
+        if tokens >= min(section.tokens, MIN_SECTION_TOKENS):
+            kept.append(section.truncate(tokens))
+    return "\n".join(kept)
+
+
+class PromptBudgets:
+    """Per-endpoint token budgets for the documents placed in prompts."""
+
+    def __init__(self, budgets: Optional[Dict[str, Dict[str, int]]] = None, scale: float = 1.0,
+                 method_scales: Optional[Dict[str, float]] = None):
+        """
+        Initialize the budgets.
+
+        Args:
+            budgets: {method: {"resume"/"job": tokens}}; defaults to DEFAULT_BUDGETS
+            scale: Multiplier for every budget (quality vs prompt size)
+            method_scales: Extra multiplier per method
+        """
+        self.budgets = budgets or DEFAULT_BUDGETS
+        self.scale = scale
+        self.method_scales = method_scales or {}
+
+    @classmethod
+    def from_env(cls) -> "PromptBudgets":
+        """
+        Build budgets configured from the environment.
+
+        PROMPT_BUDGET_SCALE scales every budget; PROMPT_BUDGET_SCALES takes
+        per-method multipliers, e.g. "analyze_match=1.5,recruiter_lens_analysis=0.5".
+        """
+        method_scales = {}
+        for item in os.getenv("PROMPT_BUDGET_SCALES", "").split(","):
+            if "=" in item:
+                method, value = item.split("=", 1)
+                method_scales[method.strip()] = float(value)
+        return cls(scale=float(os.getenv("PROMPT_BUDGET_SCALE", "1.0")), method_scales=method_scales)
+
+    def limit(self, method: str, document: str) -> int:
+        """Token budget for one document in one method's prompt."""
+        base = self.budgets[method][document]
+        return max(MIN_SECTION_TOKENS, int(base * self.scale * self.method_scales.get(method, 1.0)))
+
+    def fit(self, method: str, document: str, text: str) -> str:
+        """
+        Fit a resume or job description into a method's budget.
+
+        Args:
+            method: Analyzer method name
+            document: "resume" or "job"
+            text: Document text
+
+        Returns:
+            Text trimmed to the budget
+        """
+        return fit_to_budget(text, document, self.limit(method, document))
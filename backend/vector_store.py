@@ -1,62 +1,492 @@
 import faiss
+import json
+import os
+import sqlite3
+import threading
+import zlib
 import numpy as np
-from typing import List, Dict, Tuple
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within the process
+    fcntl = None
+
+
+class MetadataStore:
+    """SQLite side store holding text and metadata for indexed vectors."""
+
+    def __init__(self, db_path: str = ":memory:"):
+        """
+        Open (or create) the metadata database.
+
+        Args:
+            db_path: SQLite file path, or ":memory:" for a process-local store
+        """
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, text BLOB NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def insert(self, texts: List[str], metadata: List[Dict]) -> List[int]:
+        """Store texts (zlib-compressed) and metadata, returning their new 64-bit IDs."""
+        ids = []
+        with self._lock:
+            for text, meta in zip(texts, metadata):
+                cursor = self._db.execute(
+                    "INSERT INTO vectors (text, metadata) VALUES (?, ?)",
+                    (zlib.compress(text.encode("utf-8")), json.dumps(meta))
+                )
+                ids.append(cursor.lastrowid)
+            self._db.commit()
+        return ids
+
+    def get_many(self, ids: List[int]) -> Dict[int, Tuple[str, Dict]]:
+        """Fetch (text, metadata) for each known ID."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, text, metadata FROM vectors WHERE id IN ({placeholders})",
+                [int(i) for i in ids]
+            ).fetchall()
+        return {row[0]: (zlib.decompress(row[1]).decode("utf-8"), json.loads(row[2])) for row in rows}
+
+    def delete(self, ids: List[int]):
+        """Remove rows for the given IDs."""
+        if not ids:
+            return
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            self._db.execute(f"DELETE FROM vectors WHERE id IN ({placeholders})", [int(i) for i in ids])
+            self._db.commit()
+
+    def count(self) -> int:
+        """Number of stored rows."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def ids(self) -> List[int]:
+        """Every stored ID, ascending."""
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT id FROM vectors ORDER BY id")]
+
+    def clear(self):
+        """Remove every row."""
+        with self._lock:
+            self._db.execute("DELETE FROM vectors")
+            self._db.commit()
+
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+IVF_TYPES = ("ivf_flat", "ivf_pq")
+
+# FAISS k-means wants at least this many training vectors per IVF cluster
+TRAIN_POINTS_PER_CENTROID = 39
 
 
 class VectorStore:
-    """Manage FAISS vector store for similarity search."""
-    
-    def __init__(self, dimension: int = 1536):
+    """Manage a persistent FAISS vector store for similarity search."""
+
+    def __init__(self, dimension: int = 1536, index_path: Optional[str] = None,
+                 metadata_path: Optional[str] = None, mmap: bool = False,
+                 index_type: str = "flat", nlist: int = 1024, pq_m: int = 64,
+                 hnsw_m: int = 32, nprobe: int = 16, ef_search: int = 64,
+                 max_deleted_ratio: float = 0.2):
         """
-        Initialize FAISS index.
-        
+        Initialize FAISS index, loading it from disk when a saved copy exists.
+
+        Vectors are keyed by stable 64-bit IDs allocated by the metadata
+        store (IndexIDMap2 for flat/HNSW, native IVF IDs otherwise). When
+        index_path is set, every add/remove is written back atomically, and
+        with mmap=True the saved index is mapped read-only so several worker
+        processes share the same pages. Processes sharing index_path take a
+        lock file around each read-modify-write and reload the index
+        whenever another process has replaced it.
+
+        IVF modes start out as a flat staging index; once it holds
+        train_size vectors (TRAIN_POINTS_PER_CENTROID per cluster), the add
+        that reaches it trains the IVF index on them and moves them across
+        (train() does it earlier from a sample).
+
         Args:
-            dimension: Dimension of embedding vectors (1536 for text-embedding-3-small)
+            dimension: Dimension of embedding vectors (EmbeddingService.dimension)
+            index_path: File the FAISS index is persisted to (None keeps it in memory)
+            metadata_path: SQLite file for texts and metadata (None keeps it in memory)
+            mmap: Map the persisted index read-only instead of loading a private copy
+            index_type: One of INDEX_TYPES; ignored when loading a saved index
+            nlist: Number of IVF clusters (ivf_flat, ivf_pq)
+            pq_m: Number of PQ sub-quantizers, one byte each (ivf_pq)
+            hnsw_m: Graph neighbours per node (hnsw)
+            nprobe: IVF clusters visited per query
+            ef_search: HNSW candidate list size per query
+            max_deleted_ratio: Share of removed-but-still-indexed vectors at
+                which an HNSW index is rebuilt from the live ones
         """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index_type '{index_type}', expected one of {INDEX_TYPES}")
         self.dimension = dimension
-        self.index = faiss.IndexFlatIP(dimension)  # Inner Product (for normalized vectors = cosine)
-        self.texts = []
-    
-    def add_vector(self, vector: List[float], text: str):
+        self.index_path = index_path
+        self.mmap = mmap
+        self.index_type = index_type
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.hnsw_m = hnsw_m
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.max_deleted_ratio = max_deleted_ratio
+        self.metadata = MetadataStore(metadata_path or ":memory:")
+        # PQ also trains 256 centroids per sub-quantizer
+        self.train_size = (max(nlist, 256) if index_type == "ivf_pq" else nlist) * TRAIN_POINTS_PER_CENTROID
+        self._lock = threading.Lock()
+        self._loaded_version = None
+        self._staging = False
+
+        if index_path and os.path.exists(index_path):
+            self.index = self._read_index(mmap)
+        else:
+            self.index = self._new_index()
+
+    def _new_index(self):
+        """Create an empty ID-mapped index of the configured type (flat staging for IVF)."""
+        # Inner Product (for normalized vectors = cosine)
+        metric = faiss.METRIC_INNER_PRODUCT
+        if self.index_type == "hnsw":
+            index = faiss.IndexIDMap2(faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, metric))
+        else:
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+        return self._configure(index)
+
+    def _new_ivf(self):
+        """Create an empty, untrained IVF index of the configured type."""
+        # IVF indexes store IDs natively; wrapping them in an ID map would
+        # corrupt the mapping on remove_ids
+        quantizer = faiss.IndexFlatIP(self.dimension)
+        if self.index_type == "ivf_pq":
+            return faiss.IndexIVFPQ(quantizer, self.dimension, self.nlist, self.pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexIVFFlat(quantizer, self.dimension, self.nlist, faiss.METRIC_INNER_PRODUCT)
+
+    def _configure(self, index):
+        """Apply query-time parameters (nprobe / efSearch) to an index."""
+        base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+        self._staging = False
+        if isinstance(base, faiss.IndexIVF):
+            self.index_type = "ivf_pq" if isinstance(base, faiss.IndexIVFPQ) else "ivf_flat"
+            base.nprobe = self.nprobe
+        elif isinstance(base, faiss.IndexHNSW):
+            self.index_type = "hnsw"
+            base.hnsw.efSearch = self.ef_search
+        elif self.index_type in IVF_TYPES:
+            # A flat index under an IVF type is the staging index filled until training
+            self._staging = True
+        else:
+            self.index_type = "flat"
+        return index
+
+    def _train(self, index, sample: Optional[np.ndarray] = None):
+        """
+        Train a new IVF index and move the staged vectors into it.
+
+        Args:
+            index: Current index; its vectors are moved across if it is the staging index
+            sample: Training vectors (the staged vectors when None)
+
+        Returns:
+            The trained IVF index
+        """
+        staged = None
+        if self._staging and index.ntotal:
+            staged = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+        trained = self._new_ivf()
+        trained.train(sample if sample is not None else staged)
+        if staged is not None:
+            trained.add_with_ids(staged, faiss.vector_to_array(index.id_map))
+        return self._configure(trained)
+
+    def _read_index(self, mmap: bool):
+        """Load the persisted index, optionally memory-mapped read-only."""
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+        self._loaded_version = self._file_version()
+        index = faiss.read_index(self.index_path, flags)
+        if index.d != self.dimension:
+            raise ValueError(
+                f"Index at {self.index_path} has dimension {index.d}, expected {self.dimension} "
+                "(built with a different embedding model? remove it and re-index)"
+            )
+        return self._configure(index)
+
+    def _file_version(self) -> Optional[Tuple[int, int, int]]:
+        """Identity of the saved index file; every save replaces the file, so it changes."""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Pick up an index saved by another process since we last loaded it."""
+        if not self.index_path:
+            return
+        version = self._file_version()
+        if version is not None and version != self._loaded_version:
+            self.index = self._read_index(self.mmap)
+
+    @contextmanager
+    def _write_lock(self):
+        """Hold the thread lock and, for a persisted index, an exclusive lock shared with other processes."""
+        with self._lock:
+            if not self.index_path or fcntl is None:
+                yield
+                return
+            with open(f"{self.index_path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _begin_write(self):
+        """Return a writable copy of the latest index; caller must hold the write lock."""
+        if not self.index_path:
+            return self.index
+        self._refresh()
+        if self.mmap and os.path.exists(self.index_path):
+            return self._read_index(mmap=False)
+        return self.index
+
+    def _commit_write(self, index):
+        """Persist a modified index and make it current; caller must hold the write lock."""
+        if not self.index_path:
+            self.index = index
+            return
+        tmp_path = f"{self.index_path}.tmp"
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, self.index_path)
+        self.index = self._read_index(self.mmap) if self.mmap else index
+        self._loaded_version = self._file_version()
+
+    @property
+    def ntotal(self) -> int:
+        """Number of live vectors (removed HNSW nodes still in the graph excluded)."""
+        self._refresh()
+        if self.index_type == "hnsw":
+            return self.metadata.count()
+        return self.index.ntotal
+
+    @property
+    def deleted(self) -> int:
+        """Removed vectors an HNSW index still holds until its next rebuild."""
+        self._refresh()
+        if self.index_type != "hnsw":
+            return 0
+        return max(0, self.index.ntotal - self.metadata.count())
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether the configured index is in use (False while IVF/PQ are still staging)."""
+        self._refresh()
+        return self.index.is_trained and not self._staging
+
+    def train(self, vectors: List[List[float]]):
+        """
+        Train IVF centroids / PQ codebooks on a representative sample.
+
+        Needs at least nlist vectors (ideally 30-100x more). Vectors already
+        staged are moved into the trained index. A no-op for flat and HNSW
+        indexes.
+
+        Args:
+            vectors: Sample embedding vectors
+        """
+        if self.index_type not in IVF_TYPES:
+            return
+        vectors_np = np.array(vectors, dtype=np.float32)
+        faiss.normalize_L2(vectors_np)
+
+        with self._write_lock():
+            index = self._begin_write()
+            if not self._staging and index.ntotal > 0:
+                raise ValueError("Cannot retrain an index that already holds vectors")
+            self._commit_write(self._train(index, vectors_np))
+
+    def add_vector(self, vector: List[float], text: str, metadata: Optional[Dict] = None) -> int:
         """
         Add a vector to the index.
-        
+
         Args:
             vector: Embedding vector
             text: Original text corresponding to the vector
+            metadata: Extra fields stored alongside the vector
+
+        Returns:
+            ID assigned to the vector
         """
-        # Normalize vector for cosine similarity
-        vector_np = np.array([vector], dtype=np.float32)
-        faiss.normalize_L2(vector_np)
-        
-        self.index.add(vector_np)
-        self.texts.append(text)
-    
+        return self.add_vectors([vector], [text], [metadata])[0]
+
+    def add_vectors(self, vectors: List[List[float]], texts: List[str],
+                    metadata: Optional[List[Optional[Dict]]] = None) -> List[int]:
+        """
+        Add a batch of vectors to the index in one call.
+
+        Args:
+            vectors: Embedding vectors
+            texts: Original texts, aligned with vectors
+            metadata: Optional extra fields, aligned with vectors
+
+        Returns:
+            IDs assigned to the vectors, in input order
+        """
+        if not vectors:
+            return []
+
+        # Normalize vectors for cosine similarity
+        vectors_np = np.array(vectors, dtype=np.float32)
+        faiss.normalize_L2(vectors_np)
+
+        metadata = metadata or [None] * len(vectors)
+        ids = self.metadata.insert(texts, [meta or {} for meta in metadata])
+
+        with self._write_lock():
+            index = self._begin_write()
+            index.add_with_ids(vectors_np, np.array(ids, dtype=np.int64))
+            if self._staging and index.ntotal >= self.train_size:
+                print(f"Training {self.index_type} index on {index.ntotal} staged vectors")
+                index = self._train(index)
+            self._commit_write(index)
+
+        return ids
+
+    def remove(self, ids: List[int]) -> int:
+        """
+        Remove vectors by ID.
+
+        Args:
+            ids: IDs returned by add_vector(s)
+
+        Returns:
+            Number of vectors removed from the index
+        """
+        if self.index_type == "hnsw":
+            # HNSW graphs can't drop nodes; forgetting the metadata hides them
+            # from results, and the graph is rebuilt once enough are dead
+            with self._write_lock():
+                removed = len(self.metadata.get_many(ids))
+                self.metadata.delete(ids)
+                index = self._begin_write()
+                live = self.metadata.count()
+                if index.ntotal - live > self.max_deleted_ratio * index.ntotal:
+                    self._commit_write(self._rebuild(index))
+            return removed
+
+        with self._write_lock():
+            index = self._begin_write()
+            removed = index.remove_ids(np.array(ids, dtype=np.int64))
+            self._commit_write(index)
+        self.metadata.delete(ids)
+        return int(removed)
+
+    def _rebuild(self, index):
+        """A fresh HNSW index holding only the vectors that still have metadata."""
+        rebuilt = self._new_index()
+        live = np.array(self.metadata.ids(), dtype=np.int64)
+        if len(live):
+            # Stored vectors are already normalised
+            vectors = np.vstack([index.reconstruct(int(i)) for i in live])
+            rebuilt.add_with_ids(vectors, live)
+        return rebuilt
+
+    def _search_ids(self, query_vector: List[float], k: int) -> List[Tuple[int, float]]:
+        """Return (id, score) pairs for the k nearest vectors."""
+        self._refresh()
+        if self.index.ntotal == 0:
+            return []
+
+        # Normalize query vector
+        query_np = np.array([query_vector], dtype=np.float32)
+        faiss.normalize_L2(query_np)
+
+        # Removed HNSW nodes stay in the graph, so over-fetch by their number to fill k
+        fetch = k + self.deleted if self.index_type == "hnsw" else k
+        distances, ids = self.index.search(query_np, min(fetch, self.index.ntotal))
+        return [(int(i), float(d)) for i, d in zip(ids[0], distances[0]) if i != -1]
+
     def search(self, query_vector: List[float], k: int = 1) -> List[Tuple[str, float]]:
         """
         Search for similar vectors.
-        
+
         Args:
             query_vector: Query embedding vector
             k: Number of results to return
-            
+
         Returns:
             List of (text, similarity_score) tuples
         """
-        # Normalize query vector
-        query_np = np.array([query_vector], dtype=np.float32)
+        hits = self._search_ids(query_vector, k)
+        stored = self.metadata.get_many([i for i, _ in hits])
+        return [(stored[i][0], score) for i, score in hits if i in stored][:k]
+
+    def search_candidates(self, query_vector: List[float], k: int = 10) -> List[Dict]:
+        """
+        Search for the most similar stored candidates.
+
+        Args:
+            query_vector: Query embedding vector
+            k: Number of results to return
+
+        Returns:
+            List of dicts with candidate_id, text, score and stored metadata
+        """
+        hits = self._search_ids(query_vector, k)
+        stored = self.metadata.get_many([i for i, _ in hits])
+        return [
+            {**stored[i][1], "candidate_id": i, "text": stored[i][0], "score": score}
+            for i, score in hits if i in stored
+        ][:k]
+
+    def search_ids(self, query_vectors: List[List[float]], k: int = 10) -> np.ndarray:
+        """
+        Batch search returning only IDs (used for recall and benchmarks).
+
+        Args:
+            query_vectors: Query embedding vectors
+            k: Number of results per query
+
+        Returns:
+            (len(query_vectors), k) array of IDs, -1 where fewer than k exist
+        """
+        self._refresh()
+        query_np = np.array(query_vectors, dtype=np.float32)
         faiss.normalize_L2(query_np)
-        
-        distances, indices = self.index.search(query_np, k)
-        
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.texts):
-                results.append((self.texts[idx], float(distances[0][i])))
-        
-        return results
-    
+        _, ids = self.index.search(query_np, k)
+        return ids
+
     def clear(self):
-        """Clear the index and stored texts."""
-        self.index = faiss.IndexFlatIP(self.dimension)
-        self.texts = []
+        """Clear the index, stored texts and candidate data."""
+        with self._write_lock():
+            self._commit_write(self._new_index())
+        self.metadata.clear()
+
+
+def recall_at_k(approx_ids: np.ndarray, exact_ids: np.ndarray, k: int) -> float:
+    """
+    Fraction of the exact top-k neighbours that an approximate search returned.
+
+    Args:
+        approx_ids: IDs from the approximate index, shape (n_queries, >=k)
+        exact_ids: IDs from a flat index over the same vectors, shape (n_queries, >=k)
+        k: Cut-off
+
+    Returns:
+        Mean recall@k in [0, 1]
+    """
+    hits = 0
+    for approx, exact in zip(approx_ids[:, :k], exact_ids[:, :k]):
+        hits += len(set(approx.tolist()) & set(i for i in exact.tolist() if i != -1))
+    return hits / max(1, int((exact_ids[:, :k] != -1).sum()))
@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from embedding_service import EmbeddingService
+from skill_matcher import SkillMatcher
+from token_budget import count_tokens
+
+# Share of the local score taken from embedding similarity; the rest is
+# weighted coverage of the job's skills
+SEMANTIC_WEIGHT = 0.5
+
+# A removal never takes away more than this share of the resume's weight
+MAX_REMOVED_SHARE = 0.5
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity, 0 for a zero vector."""
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(np.dot(a, b) / norm) if norm else 0.0
+
+
+class WhatIfEngine:
+    """
+    Re-score a resume after hypothetical edits without an LLM call.
+
+    The embedding of the edited resume is approximated from the stored one:
+    embeddings are close to a token-weighted mean of their parts, so added
+    text is mixed in and removed skills are subtracted in proportion to
+    their share of the document. Only the delta text is embedded, and skill
+    names hit the embedding cache after the first use. Keyword coverage
+    comes from SkillMatcher, so the result is deterministic.
+    """
+
+    def __init__(self, embedding_service: EmbeddingService, skills: SkillMatcher):
+        """
+        Initialize the engine.
+
+        Args:
+            embedding_service: Service used to embed the edits
+            skills: Matcher for job skill coverage
+        """
+        self.embedding_service = embedding_service
+        self.skills = skills
+
+    async def simulate(self, resume_text: str, job_description: str, add_skills: List[str],
+                       remove_skills: List[str], add_experience: str, original_score: int,
+                       resume_embedding: Optional[List[float]] = None,
+                       job_embedding: Optional[List[float]] = None) -> Dict:
+        """
+        Predict the match score after adding or removing skills and experience.
+
+        Args:
+            resume_text: Normalized resume text
+            job_description: Normalized job description
+            add_skills: Skills to add
+            remove_skills: Skills to remove
+            add_experience: Experience text to add
+            original_score: Match percentage of the unedited resume
+            resume_embedding: Stored resume embedding, embedded here if missing
+            job_embedding: Stored job embedding, embedded here if missing
+
+        Returns:
+            WhatIfResponse fields
+        """
+        add_skills = [s.strip() for s in add_skills if s.strip()]
+        remove_skills = [s.strip() for s in remove_skills if s.strip()]
+        add_experience = add_experience.strip()
+        added_text = "\n".join(filter(None, [", ".join(add_skills), add_experience]))
+        removed_text = ", ".join(remove_skills)
+
+        # One batched request for whatever isn't known yet
+        texts = {}
+        if resume_embedding is None:
+            texts["resume"] = resume_text
+        if job_embedding is None:
+            texts["job"] = job_description
+        if added_text:
+            texts["added"] = added_text
+        if removed_text:
+            texts["removed"] = removed_text
+        vectors = {}
+        if texts:
+            vectors = dict(zip(texts, await self.embedding_service.generate_embeddings(list(texts.values()))))
+
+        resume_vec = np.asarray(vectors.get("resume", resume_embedding), dtype=np.float64)
+        job_vec = np.asarray(vectors.get("job", job_embedding), dtype=np.float64)
+        resume_tokens = max(1, count_tokens(resume_text))
+        edited_vec = resume_vec * resume_tokens
+        if added_text:
+            edited_vec = edited_vec + np.asarray(vectors["added"]) * count_tokens(added_text)
+        if removed_text:
+            mentions = self.skills.find(resume_text)
+            removed_tokens = sum(
+                count_tokens(skill) * mentions.get(self.skills.canonical(skill), 1) for skill in remove_skills
+            )
+            removed_weight = min(removed_tokens, resume_tokens * MAX_REMOVED_SHARE)
+            edited_vec = edited_vec - np.asarray(vectors["removed"]) * removed_weight
+        similarity_before = _cosine(resume_vec, job_vec)
+        similarity_after = _cosine(edited_vec, job_vec)
+
+        have = set(self.skills.find(resume_text))
+        added = {self.skills.canonical(skill) for skill in add_skills} | set(self.skills.find(add_experience))
+        removed = {self.skills.canonical(skill) for skill in remove_skills}
+        edited = (have | added) - removed
+        coverage_before = self.skills.coverage(have, job_description)
+        coverage_after = self.skills.coverage(edited, job_description)
+
+        if coverage_before is None:
+            change = (similarity_after - similarity_before) * 100
+            keyword_change = 0
+        else:
+            keyword_change = coverage_after - coverage_before
+            change = (SEMANTIC_WEIGHT * (similarity_after - similarity_before) * 100
+                      + (1 - SEMANTIC_WEIGHT) * keyword_change)
+        new_score = max(0, min(100, original_score + round(change)))
+
+        job_skills = self.skills.job_skills(job_description)
+        gained = [skill for skill in job_skills if skill in edited and skill not in have]
+        lost = [skill for skill in job_skills if skill in have and skill not in edited]
+        irrelevant = [skill for skill in add_skills if self.skills.canonical(skill) not in job_skills]
+
+        impact = [f"Semantic similarity to the job goes from {similarity_before:.3f} to {similarity_after:.3f}."]
+        if coverage_before is not None:
+            impact.insert(0, f"Coverage of the job's skills goes from {coverage_before}% to {coverage_after}%.")
+        if gained:
+            impact.append(f"Adds {', '.join(gained)}, which the job asks for.")
+        if lost:
+            impact.append(f"Removes {', '.join(lost)}, which the job asks for.")
+
+        recommendations = [f"Show evidence of {skill}" for skill in job_skills if skill not in edited][:3]
+        if irrelevant:
+            recommendations.append(f"Not mentioned in the job description: {', '.join(irrelevant)}")
+        if lost:
+            recommendations.append(f"Keep {', '.join(lost)} on the resume")
+
+        return {
+            "original_score": original_score,
+            "new_score": new_score,
+            "score_change": new_score - original_score,
+            "impact_analysis": " ".join(impact),
+            "recommendations": recommendations or ["These changes cover every skill the job names"],
+            "keyword_score_change": keyword_change,
+            "similarity_change": round(similarity_after - similarity_before, 4),
+        }
@@ -13,7 +13,7 @@ import CareerSwitch from './CareerSwitch';
 import WhatIfSimulator from './WhatIfSimulator';
 import ConsistencyCheck from './ConsistencyCheck';
 import ResumeBuilder from './ResumeBuilder';
-import { analyzeResume } from './api';
+import { analyzeResumeStream, fullReportStream } from './api';
 import './index.css';
 
 function App() {
@@ -22,6 +22,9 @@ function App() {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
   const [resumeText, setResumeText] = useState('');
+  const [resumeId, setResumeId] = useState(null);
+  const [partialResults, setPartialResults] = useState(null);
+  const [report, setReport] = useState({});
   const [jobDescription, setJobDescription] = useState('');
   const [analysisHistory, setAnalysisHistory] = useState([]);
 
@@ -29,15 +32,35 @@ function App() {
     setIsLoading(true);
     setError(null);
     setResults(null);
+    setPartialResults(null);
+    setReport({});
     setJobDescription(jobDesc);
 
     try {
-      const data = await analyzeResume(resumeFile, jobDesc);
+      const data = await analyzeResumeStream(resumeFile, jobDesc, (event, payload) => {
+        if (event === 'score') {
+          setResumeId(payload.resume_id);
+          setPartialResults({ match_score: payload.match_score, sections: {} });
+          // Prepare the other tabs concurrently while the analysis streams
+          fullReportStream(payload.resume_id, ['mock_interview', 'recruiter_lens', 'learning_roadmap'], (partEvent, part) => {
+            if (partEvent === 'part' && part.value !== undefined) {
+              setReport(prev => ({ ...prev, [part.name]: part.value }));
+            }
+          }).catch(reportError => console.error('Error prefetching report:', reportError));
+        } else if (event === 'section') {
+          setPartialResults(prev => ({
+            ...prev,
+            sections: { ...prev?.sections, [payload.name]: payload.value }
+          }));
+        }
+      });
       setResults(data);
+      setPartialResults(null);
       
       if (data.resume_text) {
         setResumeText(data.resume_text);
       }
+      setResumeId(data.resume_id || null);
 
       const historyRecord = {
         timestamp: new Date().toLocaleString(),
@@ -146,6 +169,27 @@ function App() {
               </div>
             )}
 
+            {isLoading && partialResults && (
+              <div className="max-w-4xl mx-auto">
+                <div className="bg-slate-900/50 border border-slate-800/50 rounded-lg p-4 backdrop-blur-sm">
+                  <div className="flex items-center justify-between">
+                    <p className="text-sm text-slate-300">
+                      Semantic match: <span className="font-semibold text-indigo-300">{Math.round(partialResults.match_score * 100)}%</span>
+                      {partialResults.sections.match_percentage !== undefined && (
+                        <> &middot; Overall match: <span className="font-semibold text-indigo-300">{partialResults.sections.match_percentage}%</span></>
+                      )}
+                    </p>
+                    <p className="text-xs text-slate-500">
+                      {Object.keys(partialResults.sections).length} sections ready
+                    </p>
+                  </div>
+                  {partialResults.sections.match_explanation && (
+                    <p className="text-sm text-slate-400 mt-2">{partialResults.sections.match_explanation}</p>
+                  )}
+                </div>
+              </div>
+            )}
+
             {results && (
               <>
                 <ResultsSection results={results} />
@@ -159,28 +203,32 @@ function App() {
 
         {activeTab === 'voice' && (
           <VoiceInterview 
+            resumeId={resumeId}
             resumeText={resumeText}
             jobDescription={jobDescription}
           />
         )}
 
         {activeTab === 'consistency' && (
-          <ConsistencyCheck resumeText={resumeText} />
+          <ConsistencyCheck resumeId={resumeId} resumeText={resumeText} />
         )}
 
         {activeTab === 'recruiter' && (
           <RecruiterLens 
+            resumeId={resumeId}
             resumeText={resumeText}
             jobDescription={jobDescription}
+            initialAnalysis={report.recruiter_lens}
           />
         )}
 
         {activeTab === 'switch' && (
-          <CareerSwitch resumeText={resumeText} />
+          <CareerSwitch resumeId={resumeId} resumeText={resumeText} />
         )}
 
         {activeTab === 'whatif' && (
           <WhatIfSimulator 
+            resumeId={resumeId}
             resumeText={resumeText}
             jobDescription={jobDescription}
             originalScore={results?.match_percentage || 0}
@@ -200,13 +248,16 @@ function App() {
             missingSkills={results?.missing_skills || []}
             currentLevel="Mid-Level"
             targetRole={jobDescription.split('\n')[0] || 'Software Engineer'}
+            initialRoadmap={report.learning_roadmap}
           />
         )}
 
         {activeTab === 'mock' && (
           <MockInterview 
+            resumeId={resumeId}
             resumeText={resumeText}
             jobDescription={jobDescription}
+            initialQuestions={report.mock_interview}
           />
         )}
       </main>
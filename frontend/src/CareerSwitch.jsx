@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 
-const CareerSwitch = ({ resumeText }) => {
+const CareerSwitch = ({ resumeId, resumeText }) => {
   const [targetJob, setTargetJob] = useState('');
   const [analysis, setAnalysis] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
@@ -20,7 +20,8 @@ const CareerSwitch = ({ resumeText }) => {
     setIsLoading(true);
     try {
       const response = await axios.post('http://localhost:8000/api/career-switch', {
-        resume_text: resumeText,
+        resume_id: resumeId,
+        resume_text: resumeId ? undefined : resumeText,
         target_job: targetJob
       });
       setAnalysis(response.data);
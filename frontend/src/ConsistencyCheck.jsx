@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 
-const ConsistencyCheck = ({ resumeText }) => {
+const ConsistencyCheck = ({ resumeId, resumeText }) => {
   const [interviewAnswers, setInterviewAnswers] = useState([
     { question: '', answer: '' }
   ]);
@@ -35,7 +35,8 @@ const ConsistencyCheck = ({ resumeText }) => {
     setIsLoading(true);
     try {
       const response = await axios.post('http://localhost:8000/api/consistency-check', {
-        resume_text: resumeToCheck,
+        resume_id: resumeId,
+        resume_text: resumeId ? undefined : resumeToCheck,
         interview_answers: validAnswers
       });
       setAnalysis(response.data);
@@ -1,10 +1,15 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 
-const LearningRoadmap = ({ missingSkills, currentLevel, targetRole }) => {
-  const [roadmap, setRoadmap] = useState(null);
+const LearningRoadmap = ({ missingSkills, currentLevel, targetRole, initialRoadmap }) => {
+  const [roadmap, setRoadmap] = useState(initialRoadmap || null);
   const [isLoading, setIsLoading] = useState(false);
 
+  // Roadmap prefetched by the full report arrives after the first render
+  useEffect(() => {
+    if (initialRoadmap) setRoadmap(initialRoadmap);
+  }, [initialRoadmap]);
+
   const generateRoadmap = async () => {
     setIsLoading(true);
     try {
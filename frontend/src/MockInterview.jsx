@@ -1,11 +1,16 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 
-const MockInterview = ({ resumeText, jobDescription }) => {
-  const [questions, setQuestions] = useState(null);
+const MockInterview = ({ resumeId, resumeText, jobDescription, initialQuestions }) => {
+  const [questions, setQuestions] = useState(initialQuestions || null);
   const [isLoading, setIsLoading] = useState(false);
   const [expandedQuestion, setExpandedQuestion] = useState(null);
 
+  // Questions prefetched by the full report arrive after the first render
+  useEffect(() => {
+    if (initialQuestions) setQuestions(initialQuestions);
+  }, [initialQuestions]);
+
   const generateQuestions = async () => {
     if (!resumeText || !jobDescription) {
       alert('Please analyze a resume first in the "Resume Analysis" tab before generating mock interview questions');
@@ -15,8 +20,9 @@ const MockInterview = ({ resumeText, jobDescription }) => {
     setIsLoading(true);
     try {
       const response = await axios.post('http://localhost:8000/api/mock-interview', {
-        resume_text: resumeText,
-        job_description: jobDescription
+        resume_id: resumeId,
+        resume_text: resumeId ? undefined : resumeText,
+        job_description: resumeId ? undefined : jobDescription
       });
       console.log('Mock interview response:', response.data);
       setQuestions(response.data.questions || []);
@@ -1,10 +1,15 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 
-const RecruiterLens = ({ resumeText, jobDescription }) => {
-  const [analysis, setAnalysis] = useState(null);
+const RecruiterLens = ({ resumeId, resumeText, jobDescription, initialAnalysis }) => {
+  const [analysis, setAnalysis] = useState(initialAnalysis || null);
   const [isLoading, setIsLoading] = useState(false);
 
+  // Analysis prefetched by the full report arrives after the first render
+  useEffect(() => {
+    if (initialAnalysis) setAnalysis(initialAnalysis);
+  }, [initialAnalysis]);
+
   const analyzeResume = async () => {
     if (!resumeText || !jobDescription) {
       alert('Please analyze a resume first');
@@ -14,8 +19,9 @@ const RecruiterLens = ({ resumeText, jobDescription }) => {
     setIsLoading(true);
     try {
       const response = await axios.post('http://localhost:8000/api/recruiter-lens', {
-        resume_text: resumeText,
-        job_description: jobDescription
+        resume_id: resumeId,
+        resume_text: resumeId ? undefined : resumeText,
+        job_description: resumeId ? undefined : jobDescription
       });
       setAnalysis(response.data);
     } catch (error) {
@@ -33,6 +33,11 @@ const ResultsSection = ({ results }) => {
             </span>
           </div>
           <p className="mt-6 text-slate-300 text-lg">{results.summary}</p>
+          {results.degraded && (
+            <p className="mt-3 text-sm text-yellow-300">
+              The AI analysis didn't finish in time, so this is an estimate from the semantic match. Analyze again for the full report.
+            </p>
+          )}
         </div>
       </div>
 
@@ -1,7 +1,7 @@
 import React, { useState, useRef } from 'react';
 import axios from 'axios';
 
-const VoiceInterview = ({ resumeText, jobDescription }) => {
+const VoiceInterview = ({ resumeId, resumeText, jobDescription }) => {
   const [isRecording, setIsRecording] = useState(false);
   const [transcript, setTranscript] = useState('');
   const [currentQuestion, setCurrentQuestion] = useState('');
@@ -67,8 +67,9 @@ const VoiceInterview = ({ resumeText, jobDescription }) => {
       const response = await axios.post('http://localhost:8000/api/voice-interview', {
         transcript: transcript,
         question: currentQuestion || sampleQuestions[questionIndex],
-        job_description: jobDescription,
-        resume_text: resumeText
+        resume_id: resumeId,
+        job_description: resumeId ? undefined : jobDescription,
+        resume_text: resumeId ? undefined : resumeText
       });
       setFeedback(response.data);
     } catch (error) {
@@ -1,28 +1,36 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 
-const WhatIfSimulator = ({ resumeText, jobDescription, originalScore }) => {
+const WhatIfSimulator = ({ resumeId, resumeText, jobDescription, originalScore }) => {
   const [addSkills, setAddSkills] = useState('');
   const [removeSkills, setRemoveSkills] = useState('');
   const [addExperience, setAddExperience] = useState('');
   const [result, setResult] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
+  const [isExplaining, setIsExplaining] = useState(false);
 
-  const runSimulation = async () => {
+  // Scores are computed locally on the server; explain=true also asks the AI for the narrative
+  const runSimulation = async (explain = false) => {
     if (!resumeText || !jobDescription) {
       alert('Please analyze a resume first');
       return;
     }
 
-    setIsLoading(true);
+    if (explain) {
+      setIsExplaining(true);
+    } else {
+      setIsLoading(true);
+    }
     try {
       const response = await axios.post('http://localhost:8000/api/whatif-simulation', {
-        resume_text: resumeText,
-        job_description: jobDescription,
+        resume_id: resumeId,
+        resume_text: resumeId ? undefined : resumeText,
+        job_description: resumeId ? undefined : jobDescription,
         add_skills: addSkills.split(',').map(s => s.trim()).filter(s => s),
         remove_skills: removeSkills.split(',').map(s => s.trim()).filter(s => s),
         add_experience: addExperience,
-        original_score: originalScore || 0
+        original_score: originalScore || 0,
+        explain
       });
       setResult(response.data);
     } catch (error) {
@@ -30,6 +38,7 @@ const WhatIfSimulator = ({ resumeText, jobDescription, originalScore }) => {
       alert('Failed to run simulation');
     } finally {
       setIsLoading(false);
+      setIsExplaining(false);
     }
   };
 
@@ -92,7 +101,7 @@ const WhatIfSimulator = ({ resumeText, jobDescription, originalScore }) => {
           </div>
 
           <button
-            onClick={runSimulation}
+            onClick={() => runSimulation()}
             disabled={isLoading || !resumeText}
             className="btn-primary disabled:opacity-50"
           >
@@ -125,6 +134,13 @@ const WhatIfSimulator = ({ resumeText, jobDescription, originalScore }) => {
                 <span>Impact Analysis</span>
               </h3>
               <p className="text-slate-300 leading-relaxed">{result.impact_analysis}</p>
+              <button
+                onClick={() => runSimulation(true)}
+                disabled={isExplaining}
+                className="mt-4 text-sm text-purple-400 hover:text-purple-300 disabled:opacity-50"
+              >
+                {isExplaining ? 'Asking AI...' : '✨ Explain with AI'}
+              </button>
             </div>
 
             <div className="bg-gradient-to-r from-blue-500/10 to-purple-500/10 border border-blue-500/30 rounded-lg p-6">
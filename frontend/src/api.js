@@ -16,6 +16,84 @@ export const analyzeResume = async (resumeFile, jobDescription) => {
   return response.data;
 };
 
+// POST a form to an endpoint that answers with server-sent events. Calls
+// onEvent(event, data) for each event and resolves with the "result" payload.
+const postEventStream = async (path, formData, onEvent, failureMessage) => {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    body: formData,
+  });
+
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}));
+    const error = new Error(data.detail || failureMessage);
+    error.response = { data };
+    throw error;
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result = null;
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : null;
+
+      if (event === 'error') {
+        const error = new Error(payload.detail);
+        error.response = { data: payload };
+        throw error;
+      }
+      if (event === 'result') result = payload;
+      if (onEvent) onEvent(event, payload);
+    }
+  }
+
+  if (!result) {
+    throw new Error(`${failureMessage}: stream ended before a result was received`);
+  }
+  return result;
+};
+
+// Streaming variant of analyzeResume. Calls onEvent(event, data) for each
+// server-sent event (score, delta, section, result, error) and resolves with
+// the final analysis.
+export const analyzeResumeStream = async (resumeFile, jobDescription, onEvent) => {
+  const formData = new FormData();
+  formData.append('resume', resumeFile);
+  formData.append('job_description', jobDescription);
+  formData.append('stream', 'true');
+
+  return postEventStream('/api/analyze', formData, onEvent, 'Analysis failed');
+};
+
+// Runs the other AI analyses of an analyzed resume concurrently on the
+// server. onEvent receives a "part" event ({name, value}) as each finishes;
+// resolves with the combined report.
+export const fullReportStream = async (resumeId, parts, onEvent) => {
+  const formData = new FormData();
+  formData.append('resume_id', resumeId);
+  formData.append('parts', parts.join(','));
+  formData.append('stream', 'true');
+
+  return postEventStream('/api/full-report', formData, onEvent, 'Report failed');
+};
+
 export const generateBulletPoints = async (experience, jobTitle) => {
   const response = await axios.post(`${API_BASE_URL}/api/bullet-points`, {
     experience,
@@ -90,7 +168,7 @@ export const analyzeCareerSwitch = async (resumeText, targetJob) => {
   return response.data;
 };
 
-export const simulateWhatIf = async (resumeText, jobDescription, addSkills, removeSkills, addExperience, originalScore) => {
+export const simulateWhatIf = async (resumeText, jobDescription, addSkills, removeSkills, addExperience, originalScore, explain = false) => {
   const response = await axios.post(`${API_BASE_URL}/api/whatif-simulation`, {
     resume_text: resumeText,
     job_description: jobDescription,
@@ -98,6 +176,7 @@ export const simulateWhatIf = async (resumeText, jobDescription, addSkills, remo
     remove_skills: removeSkills,
     add_experience: addExperience,
     original_score: originalScore,
+    explain,
   });
 
   return response.data;